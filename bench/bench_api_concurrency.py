@@ -0,0 +1,216 @@
+"""Latency of the web API under 100 parallel clients, optionally against an older revision.
+
+Usage: python bench/bench_api_concurrency.py [--clients 100] [--seconds 30] [--think 1.0] [--rows 200000]
+                                             [--baseline REV] [--json]
+
+Creates temporary capture segments (``--rows`` flows each) and an eve.json
+with alert history, starts webapi/main.py under uvicorn and runs ``--clients``
+concurrent clients, each looping over a weighted mix of requests with
+``--think`` seconds (exponentially distributed) between them, like dashboards:
+
+  light   /api/alerts/stats, /api/files, /api/health           (70 %)
+  page    /api/alerts?limit=200, /api/file/<seg>?limit=500     (25 %)
+  heavy   /api/file/<seg>?limit=5000                           ( 5 %)
+  stream  /api/file/<seg>/stream, whole segment as NDJSON       (one extra
+          client, every 5 s, when the endpoint exists)
+
+Per class: requests completed and p50/p99/max latency. With ``--baseline REV``
+the same load is also run against webapi/ exported from that git revision.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+WEIGHTS = (("light", 70), ("page", 25), ("heavy", 5))
+COLUMNS = ["src_ip", "dst_ip", "src_port", "dst_port", "protocol", "timestamp", "flow_duration",
+           "tot_fwd_pkts", "tot_bwd_pkts", "flow_byts_s"] + [f"feature_{i}" for i in range(30)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def write_fixtures(root, segments, rows, alerts):
+    csv_dir = os.path.join(root, "csv")
+    os.makedirs(csv_dir)
+    rng = random.Random(0)
+    line_values = [f"{rng.random() * 1e5:.3f}" for _ in range(30)]
+    names = []
+    for s in range(segments):
+        name = f"flows_{s:03d}.csv"
+        with open(os.path.join(csv_dir, name), "w") as f:
+            f.write(",".join(COLUMNS) + "\n")
+            for i in range(rows):
+                f.write(f"10.0.{i % 256}.{i % 251},10.81.50.100,{1024 + i % 60000},443,6,"
+                        f"2026-10-16 10:{i // 60 % 60:02d}:{i % 60:02d},{i * 7},{i % 90},{i % 70},{i * 1.5}," +
+                        ",".join(line_values) + "\n")
+        names.append(name)
+    with open(os.path.join(root, "eve.json"), "w") as f:
+        for seq in range(alerts):
+            f.write(json.dumps({
+                "timestamp": f"2026-10-16T10:{seq // 60 % 60:02d}:{seq % 60:02d}.{seq:06d}+0000",
+                "event_type": "alert", "src_ip": f"10.1.{seq % 250}.{seq % 200}", "dest_ip": "10.81.50.100",
+                "proto": "TCP",
+                "alert": {"signature_id": 2000000 + seq % 50, "signature": f"BENCH {seq % 50}", "severity": 1 + seq % 3},
+            }) + "\n")
+    return csv_dir, names
+
+
+def export_webapi(rev, dest):
+    archive = subprocess.run(["git", "-C", ROOT, "archive", rev, "webapi"], capture_output=True, check=True)
+    subprocess.run(["tar", "-x", "-C", dest], input=archive.stdout, check=True)
+    return os.path.join(dest, "webapi")
+
+
+def pick_class(rng):
+    r = rng.uniform(0, sum(w for _, w in WEIGHTS))
+    for name, weight in WEIGHTS:
+        r -= weight
+        if r <= 0:
+            return name
+    return WEIGHTS[-1][0]
+
+
+def request_path(kind, rng, segments, rows):
+    seg = rng.choice(segments)
+    if kind == "light":
+        return rng.choice(("/api/alerts/stats", "/api/files", "/api/health"))
+    if kind == "page":
+        if rng.random() < 0.5:
+            return "/api/alerts?limit=200"
+        return f"/api/file/{seg}?limit=500&offset={rng.randrange(rows)}"
+    return f"/api/file/{seg}?limit=5000"
+
+
+async def client_loop(client, seed, deadline, think, segments, rows, latencies, errors):
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        await asyncio.sleep(rng.expovariate(1 / think) if think > 0 else 0)
+        kind = pick_class(rng)
+        path = request_path(kind, rng, segments, rows)
+        start = time.perf_counter()
+        try:
+            r = await client.get(path)
+            r.read()
+            if r.status_code >= 400:
+                errors[kind] = errors.get(kind, 0) + 1
+        except httpx.HTTPError:
+            errors[kind] = errors.get(kind, 0) + 1
+            continue
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+
+
+async def stream_loop(client, deadline, segments, latencies):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        async with client.stream("GET", f"/api/file/{segments[0]}/stream") as r:
+            if r.status_code != 200:
+                return
+            async for _ in r.aiter_bytes():
+                pass
+        latencies.setdefault("stream", []).append(time.perf_counter() - start)
+        await asyncio.sleep(5)
+
+
+async def run_load(base_url, clients, seconds, think, segments, rows):
+    latencies, errors = {}, {}
+    limits = httpx.Limits(max_connections=clients + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        deadline = time.monotonic() + seconds
+        tasks = [asyncio.create_task(client_loop(client, i, deadline, think, segments, rows, latencies, errors))
+                 for i in range(clients)]
+        tasks.append(asyncio.create_task(stream_loop(client, deadline, segments, latencies)))
+        await asyncio.gather(*tasks)
+    return latencies, errors
+
+
+def run_server(label, webapi_dir, fixtures, args):
+    root, csv_dir, segments = fixtures
+    port = free_port()
+    env = dict(os.environ, EVE_PATH=os.path.join(root, "eve.json"), TRAFFIC_CSV_DIR=csv_dir,
+               ALERTS_DIR=os.path.join(root, f"alerts-{label}"))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                              cwd=webapi_dir, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/api/health", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        time.sleep(3)  # let the tailer ingest the history
+        # Warm-up pass: row indexes and page cache, so both runs start warm
+        for seg in segments:
+            httpx.get(f"{base_url}/api/file/{seg}?limit=1&tail=true", timeout=120)
+        latencies, errors = asyncio.run(run_load(base_url, args.clients, args.seconds, args.think, segments, args.rows))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    results = []
+    for kind in ("light", "page", "heavy", "stream"):
+        lat = np.array(latencies.get(kind, [])) * 1000
+        results.append({
+            "server": label,
+            "class": kind,
+            "requests": int(lat.size),
+            "errors": errors.get(kind, 0),
+            "p50_ms": round(float(np.percentile(lat, 50)), 1) if lat.size else None,
+            "p99_ms": round(float(np.percentile(lat, 99)), 1) if lat.size else None,
+            "max_ms": round(float(lat.max()), 1) if lat.size else None,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--think", type=float, default=1.0, help="mean pause between a client's requests")
+    parser.add_argument("--rows", type=int, default=200_000, help="flows per capture segment")
+    parser.add_argument("--segments", type=int, default=3)
+    parser.add_argument("--alerts", type=int, default=20000, help="alerts in the synthetic eve.json")
+    parser.add_argument("--baseline", help="git revision whose webapi/ is also measured")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        csv_dir, segments = write_fixtures(tmp, args.segments, args.rows, args.alerts)
+        print(f"[BENCH] Wrote {args.segments} segments x {args.rows:,} flows in {time.perf_counter() - start:.1f}s",
+              file=sys.stderr)
+        fixtures = (tmp, csv_dir, segments)
+        servers = []
+        if args.baseline:
+            servers.append((args.baseline, export_webapi(args.baseline, tmp)))
+        servers.append(("current", os.path.join(ROOT, "webapi")))
+        results = []
+        for label, webapi_dir in servers:
+            results += run_server(label, webapi_dir, fixtures, args)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'server':<10} {'class':<7} {'requests':>9} {'errors':>7} {'p50 ms':>8} {'p99 ms':>9} {'max ms':>9}")
+    for r in results:
+        print(f"{r['server']:<10} {r['class']:<7} {r['requests']:>9} {r['errors']:>7} "
+              f"{r['p50_ms'] if r['p50_ms'] is not None else '-':>8} {r['p99_ms'] if r['p99_ms'] is not None else '-':>9} "
+              f"{r['max_ms'] if r['max_ms'] is not None else '-':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Packet drops of the capture process under a CPU-bound model: inline inference vs. shared-memory rings.
+
+Usage: python bench/bench_capture_drops.py [--pps 1500] [--seconds 20] [--workers 1,2] [--trees 600]
+                                           [--pcap file] [--model artifact] [--json]
+
+A sender process replays a pcap (``--pcap``, or flows generated with scapy)
+at ``--pps`` as UDP datagrams on loopback to the capture loop, whose socket
+receive buffer (``--rcvbuf``) stands in for the NIC ring: when the loop falls
+behind, the kernel drops datagrams just as it drops packets on a live
+interface. The loop feeds cicflowmeter's FlowSession and a FlowBatcher, as in
+snids.py stream mode, with one of:
+
+  inline    batches are predicted in the capture process (SNIDS_INFERENCE_WORKERS=0)
+  ring-N    batches go through FlowRings to N inference_worker.py processes
+
+The model is an ExtraTreesClassifier with ``--trees`` fully grown trees
+fitted on random data (``--model`` uses an artifact instead), saved to a temp
+dir and loaded with load_model like snids.py does. Reported per mode: packets
+sent/received, packet drop %, flows closed, flows predicted and flows dropped
+because the rings were full.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import struct
+import argparse
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from model_registry import CIC_FEATURE_NAMES, CIC_IDS2017_LABELS, load_model  # noqa: E402
+from flow_stream import FlowBatcher  # noqa: E402
+from flow_ingest import records_to_matrix  # noqa: E402
+from inference_worker import InferencePool, count_verdicts  # noqa: E402
+
+FEATURES = list(CIC_FEATURE_NAMES.values())
+MALICIOUS_LABELS = {k: v for k, v in CIC_IDS2017_LABELS.items() if v != "BENIGN"}
+# SYN, SYN-ACK, ACK, request, response, FIN, ACK: (flags, from server, payload bytes)
+CONVERSATION = (("S", False, 0), ("SA", True, 0), ("A", False, 0), ("PA", False, 300),
+                ("PA", True, 1200), ("FA", False, 0), ("A", True, 0))
+
+
+def synthetic_pcap(path, flows, server="10.81.50.100", gap=0.05, scanners=0, scan_ports=200, seed=0):
+    """Write ``flows`` short TCP conversations from random 10/8 clients, ``gap`` seconds apart per packet.
+
+    Packet times advance fast enough that cicflowmeter expires (and emits)
+    the earlier flows while later ones are still arriving. ``scanners``
+    sources each add a SYN scan of ``scan_ports`` ports answered with RSTs.
+    """
+    from scapy.all import Ether, IP, TCP, Raw, wrpcap
+
+    rng = random.Random(seed)
+    t = 1_700_000_000.0
+    packets = []
+
+    def add(pkt):
+        nonlocal t
+        t += gap
+        pkt.time = t
+        packets.append(pkt)
+
+    for f in range(flows):
+        client = f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+        sport = rng.randrange(1024, 65535)
+        for flags, from_server, payload in CONVERSATION:
+            if from_server:
+                pkt = Ether() / IP(src=server, dst=client) / TCP(sport=80, dport=sport, flags=flags)
+            else:
+                pkt = Ether() / IP(src=client, dst=server) / TCP(sport=sport, dport=80, flags=flags)
+            add(pkt / Raw(b"x" * payload) if payload else pkt)
+    for _ in range(scanners):
+        scanner = f"172.16.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+        sport = rng.randrange(1024, 65535)
+        for port in range(1, scan_ports + 1):
+            add(Ether() / IP(src=scanner, dst=server) / TCP(sport=sport, dport=port, flags="S"))
+            add(Ether() / IP(src=server, dst=scanner) / TCP(sport=port, dport=sport, flags="RA"))
+    wrpcap(path, packets)
+    return len(packets)
+
+
+def read_frames(path):
+    """``[(timestamp, frame bytes)]`` of a pcap."""
+    from scapy.all import PcapReader
+
+    with PcapReader(path) as reader:
+        return [(float(pkt.time), bytes(pkt)) for pkt in reader]
+
+
+def send_frames(frames, port, pps, seconds, sent):
+    # Loop over the pcap, shifting timestamps so repeated flows are new flows to cicflowmeter
+    span = frames[-1][0] - frames[0][0] + 600
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    start = time.perf_counter()
+    n = 0
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            break
+        due = int(elapsed * pps)
+        while n < due:
+            ts, frame = frames[n % len(frames)]
+            sock.sendto(struct.pack("<d", ts + span * (n // len(frames))) + frame, ("127.0.0.1", port))
+            n += 1
+        time.sleep(0.001)
+    sent.value = n
+
+
+def cpu_bound_model(directory, trees):
+    import joblib
+    from sklearn.ensemble import ExtraTreesClassifier
+
+    rng = np.random.default_rng(0)
+    X = rng.random((5000, len(FEATURES)), dtype=np.float32)
+    y = rng.integers(0, len(CIC_IDS2017_LABELS), len(X))
+    path = os.path.join(directory, f"extra_trees_{trees}.pkl")
+    joblib.dump(ExtraTreesClassifier(n_estimators=trees, n_jobs=1, random_state=0).fit(X, y), path)
+    return path
+
+
+def run_mode(name, workers, frames, model_path, args):
+    from scapy.all import Ether
+    from cicflowmeter.flow_session import FlowSession
+
+    # What create_sniffer() sets before scapy instantiates the session
+    for attr, value in (("output_mode", "csv"), ("output", os.devnull), ("fields", None), ("verbose", False)):
+        setattr(FlowSession, attr, value)
+
+    predicted = [0]
+    pool = None
+    if workers:
+        def on_verdicts(n_flows, hits):
+            predicted[0] += n_flows
+        pool = InferencePool(workers, FEATURES, model_path, on_verdicts, capacity=args.ring_capacity,
+                             batch_size=args.batch).start()
+
+        def handler(rows):
+            X, src_ips = records_to_matrix(rows, FEATURES)
+            pool.submit(X, src_ips)
+    else:
+        backend = load_model(model_path, FEATURES)
+
+        def handler(rows):
+            X, src_ips = records_to_matrix(rows, FEATURES)
+            count_verdicts(backend.predict_batch(X), src_ips, MALICIOUS_LABELS, "0.0.0.0")
+            predicted[0] += len(X)
+
+    session = FlowSession()
+    batcher = FlowBatcher(handler, batch_size=args.batch, max_delay=0.5, stats_interval=1e9)
+    session.output_writer = batcher
+    closed = [0]
+    write = batcher.write
+
+    def count_write(data):
+        closed[0] += 1
+        write(data)
+    batcher.write = count_write
+    batcher.start()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, args.rcvbuf)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(0.5)
+    if pool is not None:
+        time.sleep(3)  # workers load the model before traffic starts
+
+    sent = multiprocessing.Value("q", 0)
+    sender = multiprocessing.get_context("fork").Process(
+        target=send_frames, args=(frames, sock.getsockname()[1], args.pps, args.seconds, sent))
+    sender.start()
+    received = 0
+    while True:
+        try:
+            data = sock.recv(65536)
+        except socket.timeout:
+            if not sender.is_alive():
+                break
+            continue
+        pkt = Ether(data[8:])
+        pkt.time = struct.unpack("<d", data[:8])[0]
+        session.on_packet_received(pkt)
+        received += 1
+    sender.join()
+    sock.close()
+
+    # Flush flows still open and wait for the model to catch up
+    session.garbage_collect(None)
+    batcher.stop(timeout=120)
+    if pool is not None:
+        deadline = time.monotonic() + 120
+        while predicted[0] < pool.submitted and time.monotonic() < deadline:
+            time.sleep(0.1)
+        pool.stop()
+    return {
+        "mode": name,
+        "packets_sent": sent.value,
+        "packets_received": received,
+        "packet_drop_pct": round(100 * (sent.value - received) / max(sent.value, 1), 2),
+        "flows": closed[0],
+        "flows_predicted": predicted[0],
+        "flows_dropped_ring": pool.dropped if pool is not None else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pps", type=int, default=1500, help="replay rate, packets/sec")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--workers", default="1,2", help="comma-separated worker counts for the ring modes")
+    parser.add_argument("--trees", type=int, default=600, help="size of the synthetic CPU-bound model")
+    parser.add_argument("--model", help="model artifact to use instead of the synthetic one")
+    parser.add_argument("--pcap", help="pcap to replay instead of generated flows")
+    parser.add_argument("--flows", type=int, default=3000, help="flows in the generated pcap")
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--rcvbuf", type=int, default=256 * 1024, help="capture socket buffer (NIC ring stand-in)")
+    parser.add_argument("--ring-capacity", type=int, default=65536)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pcap = args.pcap
+        if pcap is None:
+            pcap = os.path.join(tmp, "replay.pcap")
+            n = synthetic_pcap(pcap, args.flows)
+            print(f"[BENCH] Wrote {n:,} packets ({args.flows:,} flows) to {pcap}", file=sys.stderr)
+        frames = read_frames(pcap)
+        model_path = args.model
+        if model_path is None:
+            start = time.perf_counter()
+            model_path = cpu_bound_model(tmp, args.trees)
+            print(f"[BENCH] Fitted {args.trees}-tree model in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        modes = [("inline", 0)] + [(f"ring-{n}", int(n)) for n in args.workers.split(",") if n]
+        results = [run_mode(name, workers, frames, model_path, args) for name, workers in modes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<8} {'sent':>8} {'received':>9} {'drop %':>7} {'flows':>7} {'predicted':>10} {'ring drops':>11}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['packets_sent']:>8,} {r['packets_received']:>9,} {r['packet_drop_pct']:>7} "
+              f"{r['flows']:>7,} {r['flows_predicted']:>10,} {r['flows_dropped_ring']:>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Compare alert fingerprinting/dedupe: legacy MD5-of-JSON vs. webapi/dedupe.py.
+
+Usage: python bench/bench_dedupe.py [--lines 1000000] [--dup-rate 0.1] [--malformed 0.001] [--json]
+
+Writes a synthetic eve.json of alert lines in which ``--dup-rate`` of the lines
+repeat an earlier alert (as after a re-read) and ``--malformed`` have a broken
+``alert`` field, parses it once, then times fingerprinting plus duplicate
+detection per method. Parsing is not timed. Also reported: duplicates found
+(the expected count is known) and the memory left allocated by a second,
+tracemalloc'd pass: the seen-set plus the ``_fingerprint`` strings both
+methods attach to the alerts.
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "webapi"))
+
+from dedupe import AlertDeduper, FINGERPRINT_FIELDS, ALERT_FIELDS  # noqa: E402
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+def write_eve(path, lines, dup_rate, malformed, seed=0):
+    """Returns the number of lines that duplicate an earlier one."""
+    rng = random.Random(seed)
+    written = []
+    dups = 0
+    with open(path, "w") as f:
+        for seq in range(lines):
+            if written and rng.random() < dup_rate:
+                line = written[rng.randrange(max(0, len(written) - 5000), len(written))]
+                dups += 1
+            else:
+                obj = {
+                    "timestamp": f"2026-10-16T10:{seq // 60000 % 60:02d}:{seq // 1000 % 60:02d}.{seq % 1000:03d}000+0000",
+                    "flow_id": 1000000 + seq, "event_type": "alert",
+                    "src_ip": f"10.{seq % 7}.{seq % 250}.{seq % 199}", "src_port": 1024 + seq % 60000,
+                    "dest_ip": "10.81.50.100", "dest_port": 80, "proto": "TCP",
+                    "alert": {"action": "allowed", "gid": 1, "signature_id": 2000000 + seq % 300,
+                              "rev": 1, "signature": f"ET SCAN synthetic {seq % 300}", "severity": 1 + seq % 3},
+                }
+                if rng.random() < malformed:
+                    obj["alert"] = f"truncated alert {seq}"
+                line = json.dumps(obj) + "\n"
+                written.append(line)
+            f.write(line)
+    return dups
+
+
+def legacy_fingerprint(alert_obj):
+    # generate_alert_fingerprint() as it was in webapi/main.py
+    try:
+        alert = alert_obj.get('alert', {})
+        fingerprint_data = {
+            'timestamp': alert_obj.get('timestamp', ''),
+            'signature': alert.get('signature', ''),
+            'signature_id': alert.get('signature_id', ''),
+            'severity': alert.get('severity', ''),
+            'src_ip': alert_obj.get('src_ip', ''),
+            'dest_ip': alert_obj.get('dest_ip', ''),
+            'proto': alert_obj.get('proto', '')
+        }
+        fingerprint_str = json.dumps(fingerprint_data, sort_keys=True)
+        return hashlib.md5(fingerprint_str.encode()).hexdigest()
+    except Exception:
+        return f"random_{random.randint(0, 999999)}"
+
+
+def run_legacy(alerts):
+    seen = set()
+    dups = 0
+    for obj in alerts:
+        fp = obj['_fingerprint'] = legacy_fingerprint(obj)
+        if fp in seen:
+            dups += 1
+        else:
+            seen.add(fp)
+    return dups, seen
+
+
+def run_dedupe(alerts, batch=1000):
+    # The tailer hands over one chunk of alerts at a time
+    deduper = AlertDeduper(window_seconds=3600, max_entries=len(alerts))
+    for start in range(0, len(alerts), batch):
+        deduper.filter(alerts[start:start + batch])
+    return deduper.duplicates, deduper
+
+
+def run_xxhash(alerts):
+    # Hash only (same fields as dedupe.py), to compare against blake2b
+    seen = set()
+    dups = 0
+    for obj in alerts:
+        alert = obj.get("alert")
+        if not isinstance(alert, dict):
+            alert = {}
+        values = [obj.get(k) for k in FINGERPRINT_FIELDS] + [alert.get(k) for k in ALERT_FIELDS]
+        digest = xxhash.xxh3_128_digest("\x1f".join("" if v is None else str(v) for v in values))
+        if digest in seen:
+            dups += 1
+        else:
+            seen.add(digest)
+    return dups, seen
+
+
+def measure(name, func, alerts, expected):
+    for obj in alerts:
+        obj.pop("_fingerprint", None)
+    start = time.perf_counter()
+    dups, _ = func(alerts)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    kept = func(alerts)
+    mem_mb = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    del kept
+    return {
+        "method": name,
+        "alerts": len(alerts),
+        "seconds": round(elapsed, 2),
+        "alerts_per_sec": int(len(alerts) / elapsed),
+        "duplicates_found": dups,
+        "duplicates_missed": expected - dups,
+        "mem_mb": round(mem_mb, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--dup-rate", type=float, default=0.1, help="fraction of lines repeating an earlier alert")
+    parser.add_argument("--malformed", type=float, default=0.001, help="fraction of alerts with a broken alert field")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "eve.json")
+        start = time.perf_counter()
+        expected = write_eve(path, args.lines, args.dup_rate, args.malformed)
+        print(f"[BENCH] Wrote {args.lines:,} alerts ({os.path.getsize(path) / 2**20:.0f} MB, {expected:,} repeats) "
+              f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        with open(path) as f:
+            alerts = [json.loads(line) for line in f]
+
+    methods = [("legacy-md5", run_legacy), ("blake2b", run_dedupe)]
+    if xxhash is not None:
+        methods.append(("xxh3-only", run_xxhash))
+    results = [measure(name, func, alerts, expected) for name, func in methods]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'method':<11} {'alerts':>10} {'seconds':>8} {'alerts/s':>10} {'dups found':>11} {'missed':>7} {'mem MB':>7}")
+    for r in results:
+        print(f"{r['method']:<11} {r['alerts']:>10,} {r['seconds']:>8} {r['alerts_per_sec']:>10,} "
+              f"{r['duplicates_found']:>11,} {r['duplicates_missed']:>7,} {r['mem_mb']:>7}")
+
+
+if __name__ == "__main__":
+    main()
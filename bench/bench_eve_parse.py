@@ -0,0 +1,165 @@
+"""Compare eve.json ingestion: per-line text json.loads vs. chunked prefiltered parsing.
+
+Usage: python bench/bench_eve_parse.py [--size-gb 2] [--alert-rate 0.03] [--eve path] [--json]
+
+Writes a synthetic eve.json (flow/dns/http/stats events with ``--alert-rate``
+alerts, Suricata's compact separators) unless --eve is given, then reads the
+whole file once per method and reports lines/sec and MB/s:
+
+  legacy          text-mode line iteration + json.loads on every line
+                  (the old store_new_alerts loop)
+  chunked-json    1 MB binary chunks, ALERT_MARKER prefilter, json.loads
+  chunked-orjson  same with orjson (skipped when it is not installed)
+
+The file is read once before timing so every method runs from page cache.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "webapi"))
+
+from eve_tailer import parse_alerts  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK = 1 << 20
+
+
+def event(seq, rng, alert_rate):
+    base = {
+        "timestamp": f"2026-10-16T10:{seq // 60000 % 60:02d}:{seq // 1000 % 60:02d}.{seq % 1000:03d}000+0000",
+        "flow_id": 1000000000 + seq, "in_iface": "eth0",
+        "src_ip": f"10.{seq % 7}.{seq % 250}.{seq % 199}", "src_port": 1024 + seq % 60000,
+        "dest_ip": "10.81.50.100", "dest_port": 80, "proto": "TCP",
+    }
+    kind = "alert" if rng.random() < alert_rate else rng.choice(("flow", "flow", "flow", "dns", "http", "stats"))
+    base["event_type"] = kind
+    if kind == "alert":
+        base["alert"] = {"action": "allowed", "gid": 1, "signature_id": 2000000 + seq % 300, "rev": 1,
+                         "signature": f"ET SCAN synthetic {seq % 300}", "category": "Attempted Information Leak",
+                         "severity": 1 + seq % 3}
+    elif kind == "flow":
+        base["flow"] = {"pkts_toserver": seq % 50, "pkts_toclient": seq % 40, "bytes_toserver": seq % 9000,
+                        "bytes_toclient": seq % 70000, "start": base["timestamp"], "end": base["timestamp"],
+                        "age": seq % 30, "state": "closed", "reason": "timeout", "alerted": False}
+    elif kind == "dns":
+        base["dns"] = {"type": "query", "id": seq % 65536, "rrname": f"host{seq % 1000}.example.com", "rrtype": "A"}
+    elif kind == "http":
+        base["http"] = {"hostname": "example.com", "url": f"/index.php?id={seq}", "http_method": "GET",
+                        "http_user_agent": "Mozilla/5.0", "status": 200, "length": seq % 5000}
+    else:
+        base["stats"] = {"uptime": seq, "capture": {"kernel_packets": seq * 10, "kernel_drops": 0},
+                         "decoder": {"pkts": seq * 10, "bytes": seq * 6000, "ipv4": seq * 9}}
+    return json.dumps(base, separators=(",", ":")) + "\n"
+
+
+def write_eve(path, size_bytes, alert_rate, seed=0):
+    # A 20k-line block repeated: realistic mix without spending minutes on json.dumps
+    rng = random.Random(seed)
+    block = "".join(event(seq, rng, alert_rate) for seq in range(20000)).encode()
+    written = 0
+    with open(path, "wb") as f:
+        while written < size_bytes:
+            f.write(block)
+            written += len(block)
+
+
+def legacy(path):
+    lines = alerts = 0
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            lines += 1
+            try:
+                obj = json.loads(line.strip())
+            except ValueError:
+                continue
+            if isinstance(obj, dict) and obj.get("alert"):
+                alerts += 1
+    return lines, alerts
+
+
+def chunked(path, loads):
+    lines = alerts = 0
+    buf = b""
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(CHUNK)
+            if not data:
+                break
+            data = buf + data
+            end = data.rfind(b"\n") + 1
+            buf = data[end:]
+            n, found = parse_alerts(data[:end], loads)
+            lines += n
+            alerts += len(found)
+    return lines, alerts
+
+
+def warm(path):
+    with open(path, "rb") as f:
+        while f.read(CHUNK * 16):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-gb", type=float, default=2.0)
+    parser.add_argument("--alert-rate", type=float, default=0.03, help="fraction of events that are alerts")
+    parser.add_argument("--eve", help="existing eve.json to read instead of a synthetic one")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    tmpdir = None
+    path = args.eve
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "eve.json")
+        start = time.perf_counter()
+        write_eve(path, int(args.size_gb * 2**30), args.alert_rate)
+        print(f"[BENCH] Wrote {os.path.getsize(path) / 2**30:.2f} GB eve.json in {time.perf_counter() - start:.1f}s",
+              file=sys.stderr)
+    size_mb = os.path.getsize(path) / 2**20
+
+    methods = [("legacy", legacy), ("chunked-json", lambda p: chunked(p, json.loads))]
+    if orjson is not None:
+        methods.append(("chunked-orjson", lambda p: chunked(p, orjson.loads)))
+    results = []
+    try:
+        for name, func in methods:
+            warm(path)
+            start = time.perf_counter()
+            lines, alerts = func(path)
+            elapsed = time.perf_counter() - start
+            results.append({
+                "method": name,
+                "lines": lines,
+                "alerts": alerts,
+                "seconds": round(elapsed, 2),
+                "lines_per_sec": int(lines / elapsed),
+                "mb_per_sec": round(size_mb / elapsed, 1),
+            })
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'method':<15} {'lines':>12} {'alerts':>10} {'seconds':>8} {'lines/s':>11} {'MB/s':>7}")
+    for r in results:
+        print(f"{r['method']:<15} {r['lines']:>12,} {r['alerts']:>10,} {r['seconds']:>8} "
+              f"{r['lines_per_sec']:>11,} {r['mb_per_sec']:>7}")
+
+
+if __name__ == "__main__":
+    main()
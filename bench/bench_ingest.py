@@ -0,0 +1,130 @@
+"""Compare flow-CSV ingest paths: legacy read_csv + astype vs. flow_ingest.
+
+Usage: python bench/bench_ingest.py [--rows 1000000] [--csv path] [--json]
+
+Writes a synthetic cicflowmeter-style CSV (all output columns, src_ip, a few
+missing features) unless --csv is given, then runs every method in a fresh
+subprocess and reports parse time and peak RSS growth over the post-import
+baseline (ru_maxrss, so pyarrow/pandas native buffers are counted).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from model_registry import CIC_FEATURE_NAMES  # noqa: E402
+
+FEATURES = {name: "float32" for name in CIC_FEATURE_NAMES.values()}
+for name in ("fin_flag_cnt", "psh_flag_cnt", "ack_flag_cnt", "init_fwd_win_byts"):
+    FEATURES[name] = "int32"
+# cicflowmeter columns the model does not use; they are parsed by the legacy path
+EXTRA_COLUMNS = ["dst_ip", "src_port", "dst_port", "protocol", "timestamp"] + [f"extra_{i}" for i in range(40)]
+# Dropped from the synthetic file so the missing-column path is exercised
+MISSING = ["idle_std", "active_min"]
+
+METHODS = ("legacy", "pandas", "pyarrow")
+
+
+def write_csv(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    chunk = 100_000
+    columns = ["src_ip"] + EXTRA_COLUMNS + [c for c in FEATURES if c not in MISSING]
+    with open(path, "w") as f:
+        for start in range(0, rows, chunk):
+            n = min(chunk, rows - start)
+            data = {"src_ip": [f"10.0.{i % 256}.{i % 251}" for i in range(start, start + n)]}
+            for c in columns[1:]:
+                if c in ("dst_ip", "timestamp"):
+                    data[c] = "192.168.1.1" if c == "dst_ip" else "2024-01-01 00:00:00"
+                elif FEATURES.get(c) == "int32":
+                    data[c] = rng.integers(0, 65535, n)
+                else:
+                    data[c] = np.round(rng.random(n) * 1e5, 3)
+            pd.DataFrame(data, columns=columns).to_csv(f, header=start == 0, index=False)
+
+
+def legacy(path):
+    # The pre-flow_ingest path from process_and_predict/prepare_features
+    df = pd.read_csv(path)
+    source_ips = df.get("src_ip", pd.Series(["10.81.50.100"] * len(df)))
+    for column in FEATURES:
+        if column not in df.columns:
+            df[column] = 0
+    input_data = df[list(FEATURES)].astype(FEATURES)
+    X = np.asarray(input_data, dtype=np.float32)
+    return X, source_ips
+
+
+def run_one(method, path):
+    from flow_ingest import read_flow_matrix
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if method == "legacy":
+        X, ips = legacy(path)
+    else:
+        X, ips = read_flow_matrix(path, FEATURES, engine=method)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "method": method,
+        "rows": int(X.shape[0]),
+        "parse_s": round(elapsed, 3),
+        "peak_rss_mb": round((peak - baseline) / 1024, 1),  # ru_maxrss is KiB on Linux
+        "matrix_mb": round(X.nbytes / 2**20, 1),
+        "checksum": float(X.sum(dtype=np.float64)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--csv", help="existing flow CSV to read instead of a synthetic one")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    parser.add_argument("--method", choices=METHODS, help=argparse.SUPPRESS)  # child process
+    args = parser.parse_args()
+
+    if args.method:
+        print(json.dumps(run_one(args.method, args.csv)))
+        return
+
+    tmpdir = None
+    path = args.csv
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "flows.csv")
+        start = time.perf_counter()
+        write_csv(path, args.rows)
+        print(f"[BENCH] Wrote {args.rows:,} flows ({os.path.getsize(path) / 2**20:.0f} MB) "
+              f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    results = []
+    for method in METHODS:
+        out = subprocess.run([sys.executable, __file__, "--method", method, "--csv", path],
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            print(f"[BENCH] {method} failed: {out.stderr.strip().splitlines()[-1]}", file=sys.stderr)
+            continue
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'method':<10} {'rows':>10} {'parse s':>9} {'peak RSS MB':>12} {'matrix MB':>10}")
+    for r in results:
+        print(f"{r['method']:<10} {r['rows']:>10,} {r['parse_s']:>9} {r['peak_rss_mb']:>12} {r['matrix_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare inference throughput of the shipped models.
+
+Usage: python bench/bench_models.py [--batch 1024] [--batches 200] [--json]
+
+Feeds random float32 batches in FEATURE_COLUMNS layout through
+``ModelBackend.predict_batch`` and reports rows/sec plus p50/p99 batch latency.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from model_registry import CIC_FEATURE_NAMES, available_models, load_model  # noqa: E402
+
+FEATURES = list(CIC_FEATURE_NAMES.values())
+
+
+def bench(name, batch, batches, seed=0):
+    backend = load_model(name, FEATURES)
+    rng = np.random.default_rng(seed)
+    # Scale roughly like real flows: durations/IATs in microseconds, sizes in bytes
+    data = (rng.random((batches, batch, len(FEATURES)), dtype=np.float32) * 1e5).astype(np.float32)
+
+    latencies = []
+    start = time.perf_counter()
+    for X in data:
+        t = time.perf_counter()
+        backend.predict_batch(X)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "model": name,
+        "kind": backend.kind,
+        "batch": batch,
+        "rows_per_sec": round(batch * batches / elapsed),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 3),
+        "warmup_ms": round(backend.warmup_seconds * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=1024)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    results = [bench(name, args.batch, args.batches) for name in available_models()]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'model':<22} {'kind':<12} {'rows/sec':>12} {'p50 ms':>9} {'p99 ms':>9} {'warm-up ms':>11}")
+    for r in results:
+        print(f"{r['model']:<22} {r['kind']:<12} {r['rows_per_sec']:>12,} {r['p50_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['warmup_ms']:>11}")
+
+
+if __name__ == "__main__":
+    main()
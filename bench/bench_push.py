@@ -0,0 +1,201 @@
+"""Load test: 50 dashboards polling the web API vs. subscribed to /api/events.
+
+Usage: python bench/bench_push.py [--clients 50] [--seconds 30] [--rate 5] [--history 5000] [--json]
+
+Starts webapi/main.py under uvicorn with a temporary EVE_PATH/ALERTS_DIR, runs
+a fake Suricata that appends ``--rate`` alerts/sec (plus 20 flow events per
+alert) to eve.json, and measures, per mode:
+
+  poll  every client does what App.jsx did before push: /api/alerts?limit=200
+        every 5 s, /api/alerts/stats and /api/files every 10 s
+  push  every client holds one /api/events stream (plus the initial fetches)
+
+Reported: requests, bytes received by all clients, server CPU seconds
+(from /proc) and, for push, write-to-delivery latency of alerts.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+
+import httpx
+import numpy as np
+
+WEBAPI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "webapi")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def alert_line(seq, now):
+    return json.dumps({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(now)) + f".{seq % 1000000:06d}+0000",
+        "event_type": "alert", "src_ip": f"10.1.{seq % 250}.{seq % 200}", "dest_ip": "10.81.50.100",
+        "proto": "TCP", "written_at": now,
+        "alert": {"signature_id": 2000000 + seq % 50, "signature": f"BENCH {seq % 50}", "severity": 1 + seq % 3},
+    }) + "\n"
+
+
+def fake_eve_writer(path, rate, stop, seq=0):
+    """Append alerts (timestamp = write time) and filler flow events to eve.json."""
+    with open(path, "a") as f:
+        while not stop.is_set():
+            start = time.time()
+            for _ in range(rate):
+                seq += 1
+                for _ in range(20):
+                    f.write(json.dumps({"timestamp": "2026-01-01T00:00:00.000000+0000", "event_type": "flow",
+                                        "src_ip": "10.0.0.1", "flow": {"pkts_toserver": 3}}) + "\n")
+                f.write(alert_line(seq, time.time()))
+            f.flush()
+            stop.wait(max(0.0, 1.0 - (time.time() - start)))
+
+
+class Counters:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.latencies = []
+
+
+async def poll_client(client, counters, deadline):
+    next_alerts = next_slow = 0.0
+    while time.monotonic() < deadline:
+        now = time.monotonic()
+        paths = []
+        if now >= next_alerts:
+            paths.append("/api/alerts?limit=200")
+            next_alerts = now + 5
+        if now >= next_slow:
+            paths += ["/api/alerts/stats", "/api/files"]
+            next_slow = now + 10
+        for path in paths:
+            r = await client.get(path)
+            counters.requests += 1
+            counters.bytes += len(r.content)
+        await asyncio.sleep(min(next_alerts, next_slow) - time.monotonic())
+
+
+async def push_client(client, counters, deadline):
+    for path in ("/api/alerts?limit=200", "/api/alerts/stats", "/api/files"):
+        r = await client.get(path)
+        counters.requests += 1
+        counters.bytes += len(r.content)
+    counters.requests += 1
+    try:
+        async with client.stream("GET", "/api/events", timeout=None) as r:
+            buf = b""
+            async for chunk in r.aiter_bytes():
+                counters.bytes += len(chunk)
+                buf += chunk
+                while b"\n\n" in buf:
+                    frame, buf = buf.split(b"\n\n", 1)
+                    if b"event: alerts" in frame:
+                        received = time.time()
+                        data = json.loads(frame.split(b"data: ", 1)[1])
+                        counters.latencies += [received - a["written_at"] for a in data["alerts"]]
+                if time.monotonic() >= deadline:
+                    return
+    except httpx.ReadError:
+        pass
+
+
+async def run_clients(mode, base_url, clients, seconds):
+    counters = Counters()
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=clients * 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        worker = poll_client if mode == "poll" else push_client
+        tasks = [asyncio.create_task(worker(client, counters, deadline)) for _ in range(clients)]
+        await asyncio.sleep(seconds)
+        await asyncio.wait(tasks, timeout=10)
+        for t in tasks:
+            t.cancel()
+    return counters
+
+
+def run_mode(mode, args):
+    tmp = tempfile.TemporaryDirectory()
+    eve = os.path.join(tmp.name, "eve.json")
+    with open(eve, "w") as f:
+        # Existing history, so /api/alerts returns a full page like on a live sensor
+        start = time.time() - args.history
+        f.writelines(alert_line(seq, start + seq) for seq in range(args.history))
+    port = free_port()
+    env = dict(os.environ, EVE_PATH=eve, ALERTS_DIR=os.path.join(tmp.name, "alerts"),
+               TRAFFIC_CSV_DIR=os.path.join(tmp.name, "csv"))
+    os.makedirs(env["TRAFFIC_CSV_DIR"])
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                              cwd=WEBAPI_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/api/health", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        stop = threading.Event()
+        time.sleep(2)  # let the tailer ingest the history before measuring
+        writer = threading.Thread(target=fake_eve_writer, args=(eve, args.rate, stop, args.history), daemon=True)
+        writer.start()
+        cpu_before = cpu_seconds(server.pid)
+        counters = asyncio.run(run_clients(mode, base_url, args.clients, args.seconds))
+        cpu = cpu_seconds(server.pid) - cpu_before
+        stop.set()
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        tmp.cleanup()
+
+    result = {
+        "mode": mode,
+        "clients": args.clients,
+        "seconds": args.seconds,
+        "requests": counters.requests,
+        "mb_received": round(counters.bytes / 2**20, 2),
+        "server_cpu_s": round(cpu, 2),
+    }
+    if counters.latencies:
+        lat = np.array(counters.latencies) * 1000
+        result["delivery_p50_ms"] = round(float(np.percentile(lat, 50)), 1)
+        result["delivery_p99_ms"] = round(float(np.percentile(lat, 99)), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--rate", type=int, default=5, help="alerts per second written to eve.json")
+    parser.add_argument("--history", type=int, default=5000, help="alerts already in eve.json at start")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    results = [run_mode(mode, args) for mode in ("poll", "push")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<6} {'requests':>9} {'MB recv':>9} {'server CPU s':>13} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['requests']:>9} {r['mb_received']:>9} {r['server_cpu_s']:>13} "
+              f"{r.get('delivery_p50_ms', '-'):>8} {r.get('delivery_p99_ms', '-'):>8}")
+
+
+if __name__ == "__main__":
+    main()
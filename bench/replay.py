@@ -0,0 +1,208 @@
+"""Offline pcap replay through the detection pipeline: flows/sec, per-stage latency and peak RSS.
+
+Usage: python bench/replay.py [--pcap file ...] [--windows 4] [--flows 1000] [--scanners 3]
+                              [--target snids,pipeline] [--model name] [--json]
+
+Each ``--pcap`` (or each of ``--windows`` generated ones, see
+bench_capture_drops.synthetic_pcap) is one capture window. For every target
+module a fresh subprocess imports it with a temporary blacklist file and a
+fake Suricata command socket, then per window runs:
+
+  capture    create_sniffer(input_file=pcap) -> flow CSV (cicflowmeter)
+  parse      read_flow_matrix, inside process_and_predict
+  predict    model.predict_batch, inside process_and_predict
+  report     report_verdicts (alerts + blacklist queueing)
+  blacklist  blacklist.flush(): file append + dataset-add on the fake socket
+
+Reported per target: flows, flows/sec end to end and for analysis only
+(process_and_predict + flush), p50/p95/max per stage in ms, blacklisted IPs,
+commands seen by the fake Suricata, import time and peak RSS.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import importlib
+import subprocess
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC_DIR)
+# FakeSuricata lives with the tests
+sys.path.insert(1, os.path.join(BENCH_DIR, "..", "tests"))
+
+STAGES = ("capture", "parse", "predict", "report", "blacklist", "window")
+
+
+def capture(pcap, output_csv):
+    """Run cicflowmeter over ``pcap`` into ``output_csv`` the way snids.py runs it on an interface."""
+    from cicflowmeter.sniffer import create_sniffer
+
+    sniffer = create_sniffer(input_file=pcap, input_interface=None, output_mode="csv",
+                             output=output_csv, fields=None, verbose=False)
+    if isinstance(sniffer, tuple):
+        sniffer, session = sniffer
+        if shutil.which("tcpdump") is None:
+            # scapy filters offline pcaps through tcpdump; FlowSession skips non-TCP/UDP itself
+            sniffer.kwargs.pop("filter", None)
+        sniffer.start()
+        sniffer.join()
+        if hasattr(session, "_gc_stop"):
+            session._gc_stop.set()
+            session._gc_thread.join(timeout=2.0)
+        session.flush_flows()
+        return
+    # cicflowmeter 0.2 sessions predate scapy's current session API and are never
+    # called by the sniffer; feed the packets to one by hand
+    from scapy.all import PcapReader
+    from cicflowmeter.flow_session import FlowSession
+
+    session = FlowSession()
+    with PcapReader(pcap) as reader:
+        for pkt in reader:
+            session.on_packet_received(pkt)
+    session.garbage_collect(None)
+    session.output_writer.file.close()
+
+
+def run_target(args):
+    """Child process: import the target with the harness config and replay every window."""
+    start = time.perf_counter()
+    target = importlib.import_module(args.target)
+    import_seconds = time.perf_counter() - start
+
+    timings = {stage: [] for stage in STAGES}
+    flows = []
+
+    def timed(stage, func, on_result=None):
+        def wrapper(*a, **kw):
+            start = time.perf_counter()
+            result = func(*a, **kw)
+            timings[stage].append(time.perf_counter() - start)
+            if on_result is not None:
+                on_result(result)
+            return result
+        return wrapper
+
+    # process_and_predict looks these up as module globals at call time
+    target.read_flow_matrix = timed("parse", target.read_flow_matrix, lambda r: flows.append(len(r[0])))
+    target.report_verdicts = timed("report", target.report_verdicts)
+    target.model.predict_batch = timed("predict", target.model.predict_batch)
+    flush = timed("blacklist", target.blacklist.flush)
+
+    analysis = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, pcap in enumerate(args.pcap):
+            output_csv = os.path.join(tmp, f"window-{i}.csv")
+            start = time.perf_counter()
+            capture(pcap, output_csv)
+            captured = time.perf_counter()
+            timings["capture"].append(captured - start)
+            target.process_and_predict(csv_file=output_csv)
+            flush()
+            end = time.perf_counter()
+            timings["window"].append(end - start)
+            analysis += end - captured
+
+    total_flows = sum(flows)
+    elapsed = sum(timings["window"])
+    result = {
+        "target": args.target,
+        "model": getattr(target.model, "name", type(target.model).__name__),
+        "windows": len(args.pcap),
+        "flows": total_flows,
+        "flows_per_sec": round(total_flows / elapsed) if elapsed else None,
+        "analysis_flows_per_sec": round(total_flows / analysis) if analysis else None,
+        "blacklisted": len(target.blacklist.blacklisted),
+        "import_seconds": round(import_seconds, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages_ms": {},
+    }
+    for stage, values in timings.items():
+        ms = np.array(values) * 1000
+        result["stages_ms"][stage] = {
+            "p50": round(float(np.percentile(ms, 50)), 2) if ms.size else None,
+            "p95": round(float(np.percentile(ms, 95)), 2) if ms.size else None,
+            "max": round(float(ms.max()), 2) if ms.size else None,
+        }
+    with open(args.out, "w") as f:
+        json.dump(result, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pcap", action="append", help="pcap to replay as one window (repeatable)")
+    parser.add_argument("--windows", type=int, default=4, help="generated windows when no --pcap is given")
+    parser.add_argument("--flows", type=int, default=1000, help="benign flows per generated window")
+    parser.add_argument("--scanners", type=int, default=3, help="SYN-scanning sources per generated window")
+    parser.add_argument("--target", default="snids,pipeline", help="comma-separated modules from src/")
+    parser.add_argument("--model", help="SNIDS_MODEL for the targets (default: each target's own)")
+    parser.add_argument("--verbose", action="store_true", help="show the targets' own output")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_target(args)
+        return
+
+    from fake_suricatasc import FakeSuricata
+    from bench_capture_drops import synthetic_pcap
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pcaps = args.pcap
+        if not pcaps:
+            pcaps = []
+            start = time.perf_counter()
+            for i in range(args.windows):
+                pcaps.append(os.path.join(tmp, f"window-{i}.pcap"))
+                synthetic_pcap(pcaps[-1], args.flows, scanners=args.scanners, seed=i)
+            print(f"[BENCH] Wrote {args.windows} windows of {args.flows:,} flows + {args.scanners} scanners "
+                  f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        suricata = FakeSuricata(os.path.join(tmp, "suricata-command.socket")).start()
+        try:
+            for target in args.target.split(","):
+                out = os.path.join(tmp, f"{target}.json")
+                env = dict(os.environ, SURICATA_SOCKET=suricata.path,
+                           SNIDS_BLACKLIST_FILE=os.path.join(tmp, f"{target}-blacklist.txt"),
+                           SNIDS_MODEL_WATCH="0", SNIDS_INFERENCE_WORKERS="0", SNIDS_LOG_BENIGN="0")
+                if args.model:
+                    env["SNIDS_MODEL"] = args.model
+                cmd = [sys.executable, os.path.abspath(__file__), "--child", "--target", target, "--out", out]
+                cmd += [arg for pcap in pcaps for arg in ("--pcap", pcap)]
+                commands = len(suricata.commands)
+                subprocess.run(cmd, env=env, cwd=SRC_DIR, check=True,
+                               stdout=None if args.verbose else subprocess.DEVNULL)
+                with open(out) as f:
+                    result = json.load(f)
+                result["suricata_commands"] = len(suricata.commands) - commands
+                results.append(result)
+        finally:
+            suricata.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['target']} ({r['model']}): {r['flows']:,} flows in {r['windows']} windows, "
+              f"{r['flows_per_sec']:,} flows/s end to end, {r['analysis_flows_per_sec']:,} flows/s analysis, "
+              f"{r['blacklisted']} blacklisted ({r['suricata_commands']} socket commands), "
+              f"import {r['import_seconds']}s, peak RSS {r['peak_rss_mb']} MB")
+        print(f"  {'stage':<10} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for stage in STAGES:
+            s = r["stages_ms"][stage]
+            print(f"  {stage:<10} {s['p50'] if s['p50'] is not None else '-':>9} "
+                  f"{s['p95'] if s['p95'] is not None else '-':>9} {s['max'] if s['max'] is not None else '-':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,12 +37,6 @@ echo "---------------------------------------------"
 sudo systemctl restart suricata
 sudo systemctl stop suricata
 
-echo "---------------------------------------------"
-echo "Copying snids.py pipeline.py to Desktop..."
-echo "---------------------------------------------"
-cp src/snids.py ~/Desktop/
-cp src/pipeline.py
-
 echo "---------------------------------------------"
 echo "Creating model directory and copying model files..."
 echo "---------------------------------------------"
@@ -54,4 +48,6 @@ echo "✅ Setup complete!"
 echo "➡️  Suricata is configured for use with Machine Learning."
 echo "📌 Please ensure Python and required dependencies are installed."
 echo "🔁 Use 'sudo systemctl start/restart/stop suricata' to manage Suricata."
-echo "🚀 Run snids.py or pipeline.py from the Desktop to launch detection logic."
+# snids.py/pipeline.py import sibling modules and find model/, config/ and
+# traffic-csv/ relative to src/, so they are run in place rather than copied
+echo "🚀 Run src/snids.py or src/pipeline.py from this repository (or ./start_all.sh) to launch detection logic."
@@ -0,0 +1,208 @@
+import os
+import time
+import ipaddress
+import threading
+
+import pexpect
+
+from suricatasc_client import SuricataClient
+from ip_index import IPIndex
+from metrics import Counter, Gauge, Histogram
+
+QUEUE_DEPTH = Gauge("snids_blacklist_queue_depth", "IPs queued for the next blacklist flush")
+APPLY_SECONDS = Histogram("snids_blacklist_apply_seconds", "Time to apply a flushed batch to Suricata",
+                          labels=("mode",))
+IPS_ADDED = Counter("snids_blacklist_ips_total", "IPs written to the blacklist")
+
+class BlacklistManager:
+    """Queues IPs to blacklist and applies them to Suricata in coalesced batches.
+
+    ``add``/``add_many`` only enqueue. A flush thread waits ``interval`` seconds
+    after the first queued IP so bursts (e.g. a DDoS with many sources) are
+    written with a single append to ``blacklist_file`` and applied with one
+    round-trip to Suricata over a persistent ``SuricataClient``: ``dataset-add``
+    per IP in "dataset" mode, or a single ``reload-rules`` in "reload" mode. If
+    the command socket is unavailable it falls back to ``sudo suricatasc -c``
+    with the same commands.
+
+    IPs enter ``blacklisted`` only once they are written and applied. A batch
+    whose append fails is requeued; one that was written but could not be
+    applied is retried (without appending again) on the next flush.
+
+    Existing entries are loaded from ``blacklist_file`` into an ``IPIndex`` at
+    startup, so a restart does not re-append and re-apply known IPs; if the file
+    has duplicate or invalid lines it is compacted atomically.
+    """
+
+    def __init__(self, blacklist_file, client=None, mode="dataset",
+                 interval=1.0, dataset="blacklist"):
+        self.blacklist_file = blacklist_file
+        self.client = client or SuricataClient()
+        self.mode = mode
+        self.interval = interval
+        self.dataset = dataset
+
+        self._pending = []    # queued, not yet written
+        self._unapplied = []  # written to the file, not yet applied to Suricata
+        self._queued = set()  # both of the above, so add_many does not queue them twice
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+
+        self.blacklisted = IPIndex.load(blacklist_file)
+        if self.blacklisted.duplicates or self.blacklisted.invalid:
+            self.compact()
+        print(f"[BLACKLIST] Loaded {len(self.blacklisted)} entries from {blacklist_file}")
+
+        self.flushes = 0
+        self.reloads = 0
+        self.ips_written = 0
+        QUEUE_DEPTH.set_function(lambda: self.queue_depth)
+
+    @property
+    def queue_depth(self):
+        return len(self._queued)
+
+    def __contains__(self, ip):
+        return ip in self.blacklisted
+
+    def add(self, ip):
+        return self.add_many([ip])
+
+    def add_many(self, ips):
+        """Queue IPs not already blacklisted or pending. Returns the newly queued IPs."""
+        with self._lock:
+            new_ips = []
+            for ip in dict.fromkeys(ips):
+                ip = str(ip).strip()
+                if ip in self._queued or ip in self.blacklisted:
+                    continue
+                try:
+                    ipaddress.ip_network(ip, strict=False)
+                except ValueError:
+                    print(f"[WARN] Ignoring invalid IP for blacklist: {ip!r}")
+                    continue
+                new_ips.append(ip)
+            self._pending.extend(new_ips)
+            self._queued.update(new_ips)
+        if new_ips:
+            self._wakeup.set()
+        return new_ips
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="blacklist-flush", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self.flush()
+
+    def _run(self):
+        while self._running:
+            self._wakeup.wait()
+            if not self._running:
+                return
+            # Coalesce everything that arrives during the interval into one flush
+            time.sleep(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write and apply all pending IPs now. Returns the number of IPs written."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        written = 0
+        if batch:
+            try:
+                prefix = "\n" if self._missing_final_newline() else ""
+                with open(self.blacklist_file, "a") as f:
+                    f.write(prefix + "".join(f"{ip}\n" for ip in batch))
+                written = len(batch)
+                self.ips_written += written
+                IPS_ADDED.inc(written)
+                shown = ", ".join(batch[:10]) + (", ..." if len(batch) > 10 else "")
+                print(f"[BLACKLIST] {written} IP(s) added to {self.blacklist_file}: {shown}")
+            except Exception as e:
+                print(f"[ERROR] Failed to write {len(batch)} IP(s) to {self.blacklist_file}: {e}; "
+                      f"retrying on the next flush")
+                with self._lock:
+                    self._pending[:0] = batch
+                batch = []
+
+        with self._lock:
+            batch, self._unapplied = self._unapplied + batch, []
+        if not batch:
+            if self._pending:
+                self._wakeup.set()
+            return written
+
+        with APPLY_SECONDS.labels(self.mode).time():
+            applied = self._apply(batch)
+        with self._lock:
+            if applied:
+                for ip in batch:
+                    self.blacklisted.add(ip)
+                    self._queued.discard(ip)
+            else:
+                self._unapplied[:0] = batch
+        if not applied or self._pending:
+            self._wakeup.set()
+        self.flushes += 1
+        return written
+
+    def _missing_final_newline(self):
+        try:
+            with open(self.blacklist_file, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except OSError:
+            return False  # missing or empty file
+
+    def compact(self):
+        """Rewrite the blacklist file atomically with one line per unique entry."""
+        with self._lock:
+            dropped = self.blacklisted.duplicates + self.blacklisted.invalid
+            try:
+                self.blacklisted.compact(self.blacklist_file)
+                print(f"[BLACKLIST] Compacted {self.blacklist_file} ({dropped} duplicate/invalid lines removed)")
+            except Exception as e:
+                print(f"[ERROR] Failed to compact {self.blacklist_file}: {e}")
+
+    def _apply(self, batch):
+        """Apply a written batch to Suricata. Returns False if it could not be reached at all."""
+        try:
+            if self.mode == "dataset":
+                replies = self.client.dataset_add_many(batch, setname=self.dataset)
+            else:
+                replies = [self.client.reload_rules()]
+                self.reloads += 1
+            failed = [r for r in replies if r.get("return") != "OK"]
+            if failed:
+                print(f"[WARN] Suricata rejected {len(failed)} command(s): {failed[0].get('message')}")
+            print(f"[BLACKLIST] Suricata latency: {self.client.latency_report()}")
+            return True
+        except Exception as e:
+            print(f"[WARN] Command socket {self.client.socket_path} unavailable ({e}); falling back to suricatasc")
+        # reload-rules alone would not put the IPs into the dataset, so replay the same commands
+        if self.mode == "dataset":
+            commands = [f"dataset-add {self.dataset} ip {ip}" for ip in batch]
+        else:
+            commands = ["reload-rules"]
+        for command in commands:
+            try:
+                output, status = pexpect.run(f"sudo suricatasc -c '{command}'", withexitstatus=True)
+            except Exception as e:
+                output, status = str(e), None
+            if status != 0:
+                print(f"[ERROR] suricatasc -c '{command}' failed ({status}): {output!r}; "
+                      f"retrying {len(batch)} IP(s) on the next flush")
+                return False
+        if self.mode != "dataset":
+            self.reloads += 1
+        return True
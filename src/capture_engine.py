@@ -0,0 +1,204 @@
+import os
+import time
+import threading
+from datetime import datetime
+
+from cicflowmeter.sniffer import create_sniffer
+
+from segment_format import open_segment
+from metrics import Counter, Gauge, Histogram
+from load_shedding import SegmentQueue, clear_stale_pending
+
+CAPTURE_WINDOW_SECONDS = Histogram("snids_capture_window_seconds", "Wall time covered by each capture segment")
+SEGMENTS_QUEUED = Gauge("snids_segments_queued", "Closed segments waiting for analysis")
+SEGMENTS_DROPPED = Counter("snids_segments_dropped_total", "Segments dropped unanalyzed because the queue was full")
+SEGMENT_FLOWS_DROPPED = Counter("snids_segment_flows_dropped_total", "Flows in segments dropped unanalyzed")
+
+
+class SegmentWriter:
+    """cicflowmeter output writer that splits one long capture into segments.
+
+    ``rotate()`` closes the current segment and returns its path; flows that
+    close afterwards go to the next segment, so nothing is lost between them.
+    ``fmt`` is "csv", "arrow" or "parquet" (see segment_format.py).
+    """
+
+    def __init__(self, csv_dir, flow_sink=None, fmt="csv"):
+        self.csv_dir = csv_dir
+        self.flow_sink = flow_sink
+        self.fmt = fmt
+        self._lock = threading.Lock()
+        self._name = self._segment_name()
+        self._segment = None
+
+    def _segment_name(self):
+        timestamp = datetime.now().strftime("%H-%M-%S-%d-%m-%Y")
+        return os.path.join(self.csv_dir, timestamp)
+
+    def write(self, data):
+        with self._lock:
+            if self._segment is None:
+                self._segment = open_segment(self._name, self.fmt)
+            self._segment.write(data)
+        if self.flow_sink is not None:
+            self.flow_sink.write(data)
+
+    def rotate(self):
+        """Close the current segment and start a new one. Returns (path, rows)."""
+        with self._lock:
+            segment, self._segment = self._segment, None
+            self._name = self._segment_name()
+        if segment is None:
+            return None, 0
+        # Closing (columnar encoding, rename) happens outside the lock
+        return segment.close(), segment.rows
+
+    def close(self):
+        return self.rotate()
+
+
+class CaptureEngine:
+    """Double-buffered capture: one long-lived sniffer, analysis on a worker thread.
+
+    The sniffer is never stopped between windows. Every ``segment_seconds`` the
+    flow output is rotated into a new segment and the finished one is queued
+    for ``analyze(path, max_flows)``, which runs while capture continues. If
+    the sniffer dies it is restarted and the time without a sniffer is added
+    to ``uncaptured_seconds``.
+
+    At most ``max_queued`` segments wait for analysis (see SegmentQueue).
+    With ``shed_flows``, a segment analyzed while others are waiting gets a
+    ``max_flows`` budget sized from the measured analysis rate so that the
+    backlog drains; otherwise ``max_flows`` is None.
+    """
+
+    def __init__(self, interface, csv_dir, analyze, segment_seconds=30, flow_sink=None, segment_format="csv",
+                 max_queued=4, shed_flows=True):
+        self.interface = interface
+        self.csv_dir = csv_dir
+        self.analyze = analyze
+        self.segment_seconds = segment_seconds
+        self.shed_flows = shed_flows
+        self.writer = SegmentWriter(csv_dir, flow_sink=flow_sink, fmt=segment_format)
+
+        self.segments = SegmentQueue(max_queued)
+        SEGMENTS_QUEUED.set_function(self.segments.qsize)
+        self.uncaptured_seconds = 0.0
+        self.segments_analyzed = 0
+        self.flows_per_second = None  # analysis rate, moving average over segments
+        self._sniffer = None
+        self._session = None
+        self._running = False
+
+    def _start_sniffer(self):
+        # The session still wants an output target; flows are redirected to the segment writer
+        sniffer, session = create_sniffer(
+            input_file=None,
+            input_interface=self.interface,
+            output_mode="csv",
+            output=os.devnull,
+            fields=None,
+            verbose=False,
+        )
+        session.output_writer = self.writer
+        sniffer.start()
+        self._sniffer, self._session = sniffer, session
+
+    def _ensure_sniffer(self):
+        if not self._running or (self._sniffer is not None and self._sniffer.running):
+            return
+        # Startup is not a gap; only time lost after a sniffer died counts
+        restarting = self._sniffer is not None
+        down_since = time.monotonic()
+        if restarting:
+            print("[WARN] Sniffer stopped unexpectedly; restarting")
+        while self._running:
+            try:
+                self._start_sniffer()
+                break
+            except Exception as e:
+                print(f"[ERROR] Failed to start sniffer on {self.interface}: {e}")
+                time.sleep(1)
+        if restarting:
+            self.uncaptured_seconds += time.monotonic() - down_since
+
+    def run(self):
+        """Blocking capture loop; analysis of closed segments runs on a worker."""
+        self._running = True
+        stale = clear_stale_pending(self.csv_dir)
+        if stale:
+            print(f"[CAPTURE] Cleared {stale} pending markers left by a previous run")
+        worker = threading.Thread(target=self._analysis_worker, name="segment-analysis", daemon=True)
+        worker.start()
+        self._ensure_sniffer()
+        print(f"[CAPTURE] Continuous capture on {self.interface}, rotating every {self.segment_seconds}s")
+
+        next_rotate = time.monotonic() + self.segment_seconds
+        window_start = time.monotonic()
+        while self._running:
+            time.sleep(min(1.0, max(0.0, next_rotate - time.monotonic())))
+            self._ensure_sniffer()
+            if time.monotonic() < next_rotate:
+                continue
+            next_rotate += self.segment_seconds
+
+            path, rows = self.writer.rotate()
+            now = time.monotonic()
+            CAPTURE_WINDOW_SECONDS.observe(now - window_start)
+            window_start = now
+            if path:
+                self._queue(path, rows)
+                print(f"[CAPTURE] Segment {path} closed with {rows} flows "
+                      f"(queued={self.segments.qsize()}, uncaptured={self.uncaptured_seconds:.1f}s)")
+            else:
+                print(f"[CAPTURE] No flows in the last {self.segment_seconds}s "
+                      f"(uncaptured={self.uncaptured_seconds:.1f}s)")
+
+    def stop(self):
+        self._running = False
+        if self._sniffer is not None:
+            try:
+                self._sniffer.stop()
+            except Exception:
+                pass
+        path, rows = self.writer.close()
+        if path:
+            self._queue(path, rows)
+        self.segments.close()
+
+    def _queue(self, path, rows):
+        dropped = self.segments.put(path, rows)
+        if dropped is not None:
+            SEGMENTS_DROPPED.inc()
+            SEGMENT_FLOWS_DROPPED.inc(dropped[1])
+            print(f"[WARN] Analysis queue full: dropped segment {dropped[0]} ({dropped[1]} flows unanalyzed, "
+                  f"{self.segments.dropped_segments} segments / {self.segments.dropped_flows} flows so far)")
+
+    def flow_budget(self, backlog):
+        """Flows to analyze from the next segment with ``backlog`` more waiting, None for all of them."""
+        if not self.shed_flows or not backlog or not self.flows_per_second:
+            return None
+        # Spend at most segment_seconds / (backlog + 1) on it, so the queue shrinks
+        return max(1, int(self.flows_per_second * self.segment_seconds / (backlog + 1)))
+
+    def _analysis_worker(self):
+        while True:
+            item = self.segments.get()
+            if item is None:
+                return
+            path, rows = item
+            max_flows = self.flow_budget(self.segments.qsize())
+            start = time.monotonic()
+            try:
+                self.analyze(path, max_flows)
+            except Exception as e:
+                print(f"[ERROR] Segment analysis failed for {path}: {e}")
+            finally:
+                self.segments.done(path)
+            elapsed = time.monotonic() - start
+            analyzed = rows if max_flows is None else min(rows, max_flows)
+            if analyzed and elapsed > 0:
+                rate = analyzed / elapsed
+                previous = self.flows_per_second
+                self.flows_per_second = rate if previous is None else 0.7 * previous + 0.3 * rate
+            self.segments_analyzed += 1
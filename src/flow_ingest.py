@@ -0,0 +1,105 @@
+import csv
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # pyarrow is optional, pandas' C parser is the fallback
+    pa = None
+
+import pandas as pd
+
+from segment_format import read_table, schema_names, segment_format
+
+
+def read_header(path):
+    """Column names from the first line of a flow CSV ([] for an empty file)."""
+    with open(path, newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def _finish(X):
+    # cicflowmeter writes inf for rate features of zero-length flows; treat like missing
+    np.nan_to_num(X, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    return X
+
+
+def _source_ips(values, n, default_ip):
+    if values is None:
+        return np.full(n, default_ip, dtype=object)
+    ips = np.array(values, dtype=object)
+    ips[pd.isna(ips)] = default_ip
+    return ips
+
+
+def read_flow_matrix(path, feature_columns, ip_column="src_ip", default_ip="0.0.0.0", engine=None):
+    """Read a flow segment straight into a C-contiguous float32 matrix.
+
+    Only ``feature_columns`` (in that order) and ``ip_column`` are parsed, with
+    float32 declared up front; each column is copied once into the preallocated
+    matrix and missing columns simply stay 0. Returns ``(X, source_ips)``.
+    ``engine`` forces "pyarrow" or "pandas"; by default pyarrow is used when
+    installed. Arrow/Parquet segments are read column-projected via pyarrow.
+    """
+    columns = list(feature_columns)
+    fmt = segment_format(path)
+    header = read_header(path) if fmt == "csv" else schema_names(path)
+    if not header:
+        return np.zeros((0, len(columns)), dtype=np.float32), np.empty(0, dtype=object)
+    present = [c for c in columns if c in header]
+    missing = [c for c in columns if c not in header]
+    if missing:
+        print(f"[WARNING] Missing columns: {', '.join(missing)}. Filling with default value 0.")
+    wanted = present + ([ip_column] if ip_column in header else [])
+
+    if engine is None:
+        engine = "pyarrow" if pa is not None else "pandas"
+    if fmt != "csv":
+        table = read_table(path, columns=wanted)
+        n = table.num_rows
+        get = lambda c: table.column(c).to_numpy(zero_copy_only=False)  # noqa: E731
+    elif engine == "pyarrow":
+        if pa is None:
+            raise ImportError("pyarrow is not available; use engine='pandas'")
+        table = pa_csv.read_csv(
+            path,
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=wanted,
+                column_types={**{c: pa.float32() for c in present}, ip_column: pa.string()},
+            ),
+        )
+        n = table.num_rows
+        get = lambda c: table.column(c).to_numpy(zero_copy_only=False)  # noqa: E731
+    else:
+        frame = pd.read_csv(path, usecols=wanted, dtype={**{c: np.float32 for c in present}, ip_column: object},
+                            engine="c")
+        n = len(frame)
+        get = lambda c: frame[c].to_numpy()  # noqa: E731
+
+    X = np.zeros((n, len(columns)), dtype=np.float32)
+    for i, c in enumerate(columns):
+        if c in present:
+            X[:, i] = get(c)
+    ips = _source_ips(get(ip_column) if ip_column in header else None, n, default_ip)
+    return _finish(X), ips
+
+
+def frame_to_matrix(df, feature_columns, ip_column="src_ip", default_ip="0.0.0.0"):
+    """Same as ``read_flow_matrix`` for a DataFrame that is already in memory (not modified)."""
+    columns = list(feature_columns)
+    X = np.zeros((len(df), len(columns)), dtype=np.float32)
+    for i, c in enumerate(columns):
+        if c in df.columns:
+            X[:, i] = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float32, na_value=0.0)
+    values = df[ip_column].to_numpy() if ip_column in df.columns else None
+    return _finish(X), _source_ips(values, len(df), default_ip)
+
+
+def records_to_matrix(rows, feature_columns, ip_column="src_ip", default_ip="0.0.0.0"):
+    """Build the matrix from cicflowmeter flow dicts (streaming mode), no DataFrame."""
+    columns = list(feature_columns)
+    X = np.array([[row.get(c) or 0 for c in columns] for row in rows], dtype=np.float32)
+    X = X.reshape(len(rows), len(columns))
+    ips = _source_ips([row.get(ip_column) for row in rows], len(rows), default_ip)
+    return _finish(X), ips
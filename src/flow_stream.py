@@ -0,0 +1,168 @@
+import os
+import time
+import queue
+import threading
+from datetime import datetime
+
+from segment_format import open_segment
+
+
+class FlowBatcher:
+    """cicflowmeter output writer that hands completed flows to a handler in micro-batches.
+
+    FlowSession calls ``write(data)`` once per closed flow. Flows are buffered in
+    memory and flushed to ``handler(rows)`` as soon as ``batch_size`` flows are
+    pending or the oldest pending flow has waited ``max_delay`` seconds, so the
+    time from flow close to verdict is bounded by ``max_delay`` plus inference time.
+    """
+
+    def __init__(self, handler, batch_size=256, max_delay=0.5, sink=None, stats_interval=30.0):
+        self.handler = handler
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.sink = sink
+        self.stats_interval = stats_interval
+
+        self._cond = threading.Condition()
+        self._pending = []
+        self._oldest = None
+        self._running = False
+        self._thread = None
+
+        # Latency stats (flow close -> handler returned), reset every stats_interval
+        self._batches = 0
+        self._flows = 0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+        self._last_report = time.monotonic()
+
+    def write(self, data):
+        """Called by cicflowmeter's FlowSession for every completed flow."""
+        now = time.monotonic()
+        with self._cond:
+            if not self._pending:
+                self._oldest = now
+            self._pending.append(data)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        if self.sink is not None:
+            self.sink.write(data)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="flow-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        if self.sink is not None:
+            self.sink.close()
+
+    def _take_batch(self):
+        with self._cond:
+            while self._running:
+                if len(self._pending) >= self.batch_size:
+                    break
+                if self._pending:
+                    remaining = self._oldest + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._cond.wait()
+            batch, oldest = self._pending, self._oldest
+            self._pending, self._oldest = [], None
+            return batch, oldest
+
+    def _run(self):
+        while True:
+            batch, oldest = self._take_batch()
+            if batch:
+                try:
+                    self.handler(batch)
+                except Exception as e:
+                    print(f"[ERROR] Stream batch of {len(batch)} flows failed: {e}")
+                self._record(len(batch), time.monotonic() - oldest)
+            if not self._running:
+                return
+
+    def _record(self, n_flows, latency):
+        self._batches += 1
+        self._flows += n_flows
+        self._latency_sum += latency
+        self._latency_max = max(self._latency_max, latency)
+
+        now = time.monotonic()
+        if now - self._last_report >= self.stats_interval:
+            avg = self._latency_sum / self._batches
+            print(f"[STREAM] {self._flows} flows in {self._batches} batches, "
+                  f"close->verdict avg {avg * 1000:.1f} ms, max {self._latency_max * 1000:.1f} ms")
+            self._batches = self._flows = 0
+            self._latency_sum = self._latency_max = 0.0
+            self._last_report = now
+
+
+class AsyncCSVSink:
+    """Writes streamed flows to timestamped segment files from a background thread.
+
+    A new file is started every ``rotate_seconds`` so the web UI keeps seeing one
+    file per capture window, but file I/O never blocks the capture or the model.
+    ``fmt`` selects CSV (default) or a columnar format, see segment_format.py.
+    """
+
+    def __init__(self, csv_dir, rotate_seconds=30.0, max_queue=100000, fmt="csv"):
+        self.csv_dir = csv_dir
+        self.rotate_seconds = rotate_seconds
+        self.fmt = fmt
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._dropped = 0
+        self._thread = threading.Thread(target=self._run, name="csv-sink", daemon=True)
+        self._thread.start()
+
+    def write(self, data):
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self._dropped += 1
+
+    def close(self, timeout=5.0):
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+        if self._dropped:
+            print(f"[WARN] CSV sink dropped {self._dropped} flows (queue full)")
+
+    def _open(self):
+        timestamp = datetime.now().strftime("%H-%M-%S-%d-%m-%Y")
+        return open_segment(os.path.join(self.csv_dir, timestamp), self.fmt), time.monotonic()
+
+    def _run(self):
+        segment, opened_at = None, 0.0
+        try:
+            while True:
+                try:
+                    data = self._queue.get(timeout=1.0)
+                except queue.Empty:
+                    data = False  # idle tick: only used to rotate/flush
+                if data is None:
+                    return
+
+                if segment is not None and time.monotonic() - opened_at >= self.rotate_seconds:
+                    segment.close()
+                    segment = None
+                if data is False:
+                    if segment is not None and self.fmt == "csv":
+                        segment.flush()
+                    continue
+
+                if segment is None:
+                    segment, opened_at = self._open()
+                segment.write(data)
+        except Exception as e:
+            print(f"[ERROR] CSV sink failed: {e}")
+        finally:
+            if segment is not None:
+                segment.close()
@@ -0,0 +1,202 @@
+"""Inference worker: predicts flows read from a FlowRing and reports verdicts to the capture process.
+
+Started by ``InferencePool`` (snids.py with SNIDS_INFERENCE_WORKERS > 0):
+
+  python src/inference_worker.py --ring NAME --model PATH --features a,b,... --results-fd FD
+
+One JSON line per batch is written to ``--results-fd``:
+``{"flows": n, "hits": [[src_ip, attack, count], ...]}``.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+from shm_ring import FlowRing
+from model_registry import CIC_IDS2017_LABELS, ModelHolder, ModelWatcher, load_model
+
+
+def count_verdicts(predictions, source_ips, malicious_labels, default_ip):
+    """``(hits, benign_ips)``: ``(src_ip, attack, flows)`` per malicious source, and benign IPs."""
+    predictions = np.asarray(predictions)
+    src_ips = np.array(source_ips, dtype=object)[:len(predictions)]
+    if len(src_ips) < len(predictions):
+        src_ips = np.concatenate([src_ips, np.full(len(predictions) - len(src_ips), default_ip, dtype=object)])
+    src_ips[(src_ips == "0.0.0.0") | (src_ips == "")] = default_ip
+
+    malicious = np.isin(predictions, list(malicious_labels))
+    hits = []
+    if malicious.any():
+        frame = pd.DataFrame({
+            "src_ip": src_ips[malicious],
+            "attack": pd.Series(predictions[malicious]).map(malicious_labels).values,
+        })
+        counts = frame.groupby(["src_ip", "attack"], sort=False).size()
+        hits = [(src_ip, attack, int(n)) for (src_ip, attack), n in counts.items()]
+    return hits, src_ips[~malicious]
+
+
+class InferencePool:
+    """Runs ``workers`` inference processes, each fed by its own ``FlowRing``.
+
+    ``submit`` copies a feature matrix into the rings with the most free
+    space and returns immediately, so the capture thread never waits for the
+    model. Each worker loads the model itself (and hot-swaps it like the
+    in-process path); per-batch verdict summaries come back over a pipe and
+    are handed to ``on_verdicts(flows, hits)`` from a reader thread. A worker
+    that dies is restarted on the same ring, so queued flows are not lost.
+    """
+
+    def __init__(self, workers, feature_columns, model_path, on_verdicts, capacity=65536, batch_size=256,
+                 default_ip="0.0.0.0", watch_interval=0.0, log_benign=False, stats_interval=30.0):
+        self.workers = workers
+        self.feature_columns = list(feature_columns)
+        self.model_path = model_path
+        self.on_verdicts = on_verdicts
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.default_ip = default_ip
+        self.watch_interval = watch_interval
+        self.log_benign = log_benign
+        self.stats_interval = stats_interval
+
+        self.rings = []
+        self._procs = []
+        self._lock = threading.Lock()
+        self._running = False
+        self.submitted = 0
+        self.restarts = 0
+        self._reported_drops = 0
+        self._last_report = time.monotonic()
+
+    @property
+    def dropped(self):
+        return sum(ring.dropped for ring in self.rings)
+
+    def start(self):
+        self._running = True
+        for i in range(self.workers):
+            self.rings.append(FlowRing.create(self.capacity, len(self.feature_columns)))
+            self._procs.append(None)
+            self._spawn(i)
+        print(f"[INFER] {self.workers} inference workers, ring capacity {self.capacity} flows each")
+        return self
+
+    def _spawn(self, i):
+        read_fd, write_fd = os.pipe()
+        cmd = [sys.executable, os.path.abspath(__file__), "--ring", self.rings[i].name,
+               "--model", self.model_path, "--features", ",".join(self.feature_columns),
+               "--batch", str(self.batch_size), "--default-ip", self.default_ip,
+               "--watch", str(self.watch_interval), "--results-fd", str(write_fd)]
+        if self.log_benign:
+            cmd.append("--log-benign")
+        proc = subprocess.Popen(cmd, pass_fds=(write_fd,))
+        os.close(write_fd)
+        self._procs[i] = proc
+        threading.Thread(target=self._read, args=(i, proc, read_fd), name=f"infer-results-{i}", daemon=True).start()
+
+    def _read(self, i, proc, read_fd):
+        with os.fdopen(read_fd, "r") as results:
+            for line in results:
+                try:
+                    msg = json.loads(line)
+                    self.on_verdicts(msg["flows"], [tuple(h) for h in msg["hits"]])
+                except Exception as e:
+                    print(f"[ERROR] Inference worker {i} result: {e}")
+        code = proc.wait()
+        if self._running:
+            print(f"[ERROR] Inference worker {i} exited with code {code}; restarting")
+            self.restarts += 1
+            time.sleep(1)
+            self._spawn(i)
+
+    def submit(self, X, src_ips):
+        """Queue flows for inference; returns how many were accepted (the rest are dropped)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        src_ips = np.asarray(src_ips, dtype=object)
+        written = 0
+        with self._lock:
+            for ring in sorted(self.rings, key=lambda r: r.free(), reverse=True):
+                if written >= len(X):
+                    break
+                written += ring.push(X[written:], src_ips[written:])
+            self.submitted += written
+            self._report()
+        return written
+
+    def _report(self):
+        now = time.monotonic()
+        if now - self._last_report < self.stats_interval:
+            return
+        dropped = self.dropped
+        queued = sum(len(ring) for ring in self.rings)
+        print(f"[INFER] {self.submitted} flows submitted, {queued} queued, "
+              f"{dropped - self._reported_drops} dropped (ring full) in the last {now - self._last_report:.0f}s")
+        self._reported_drops = dropped
+        self._last_report = now
+
+    def stop(self, timeout=10.0):
+        """Let workers drain their rings, then release the shared memory."""
+        self._running = False
+        for ring in self.rings:
+            ring.close()
+        for proc in self._procs:
+            if proc is None:
+                continue
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        for ring in self.rings:
+            ring.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ring", required=True, help="shared memory name of the FlowRing")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--features", required=True, help="comma-separated FEATURE_COLUMNS")
+    parser.add_argument("--results-fd", type=int, required=True)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--default-ip", default="0.0.0.0")
+    parser.add_argument("--watch", type=float, default=0.0, help="model hot-swap poll interval, 0 disables")
+    parser.add_argument("--log-benign", action="store_true")
+    args = parser.parse_args()
+
+    features = args.features.split(",")
+    ring = FlowRing.attach(args.ring)
+    model = ModelHolder(load_model(args.model, features))
+    if args.watch > 0:
+        ModelWatcher(model, model.path, features, interval=args.watch).start()
+    malicious_labels = {k: v for k, v in (model.labels or CIC_IDS2017_LABELS).items() if v != "BENIGN"}
+    parent = os.getppid()
+
+    with os.fdopen(args.results_fd, "w", buffering=1) as results:
+        while True:
+            X, src_ips = ring.wait(args.batch, timeout=1.0)
+            if not len(X):
+                # Drained after close(), or the capture process is gone
+                if ring.closed or os.getppid() != parent:
+                    break
+                continue
+            try:
+                predictions = model.predict_batch(X)
+                hits, benign = count_verdicts(predictions, src_ips, malicious_labels, args.default_ip)
+            except Exception as e:
+                print(f"[ERROR] Inference worker batch of {len(X)} flows failed: {e}")
+                continue
+            if args.log_benign:
+                for src_ip in benign:
+                    print(f"[INFO] ✅ Benign traffic from IP: {src_ip}")
+            results.write(json.dumps({"flows": len(X), "hits": hits}) + "\n")
+    ring.release()
+
+
+if __name__ == "__main__":
+    main()
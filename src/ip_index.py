@@ -0,0 +1,264 @@
+import os
+import socket
+import tempfile
+import ipaddress
+from array import array
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+# Pending inserts are merged into the sorted arrays once there are this many
+MERGE_THRESHOLD = 65536
+
+
+def parse_ip(text):
+    """Return (version, int) for an IPv4/IPv6 address string, or None if invalid."""
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+    except OSError:
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, text), "big")
+    except OSError:
+        return None
+
+
+def format_ip(version, value):
+    if version == 4:
+        return socket.inet_ntop(socket.AF_INET, value.to_bytes(4, "big"))
+    return socket.inet_ntop(socket.AF_INET6, value.to_bytes(16, "big"))
+
+
+class _Family:
+    """Sorted integer set plus merged CIDR ranges for one address family."""
+
+    def __init__(self, version):
+        self.version = version
+        # IPv4 fits in a 4-byte array; IPv6 needs Python ints
+        self.values = array("I") if version == 4 else []
+        self.pending = set()
+        self.starts = []
+        self.ends = []
+
+    def _in_values(self, value):
+        values = self.values
+        i = bisect_left(values, value)
+        return i < len(values) and values[i] == value
+
+    def _in_ranges(self, value):
+        i = bisect_right(self.starts, value) - 1
+        return i >= 0 and value <= self.ends[i]
+
+    def contains(self, value):
+        # Check pending before the array: a concurrent merge publishes the new
+        # array first and clears pending second, so a reader never misses
+        return value in self.pending or self._in_values(value) or (bool(self.starts) and self._in_ranges(value))
+
+    def add(self, value):
+        if self.contains(value):
+            return False
+        self.pending.add(value)
+        if len(self.pending) >= MERGE_THRESHOLD:
+            self.merge()
+        return True
+
+    def extend_sorted(self, values):
+        merged = sorted(set(self.values).union(values))
+        self.values = array("I", merged) if self.version == 4 else merged
+
+    def merge(self):
+        if self.pending:
+            self.extend_sorted(self.pending)
+            self.pending = set()
+
+    def add_range(self, start, end):
+        i = bisect_right(self.starts, start) - 1
+        if i >= 0 and end <= self.ends[i]:
+            return False  # already covered by an existing range
+        ranges = sorted(zip(self.starts + [start], self.ends + [end]))
+        starts, ends = [], []
+        for s, e in ranges:
+            if starts and s <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], e)
+            else:
+                starts.append(s)
+                ends.append(e)
+        self.starts, self.ends = starts, ends
+        return True
+
+    def __len__(self):
+        return len(self.values) + len(self.pending) + len(self.starts)
+
+
+class IPIndex:
+    """Compact blacklist index with O(log n) membership.
+
+    Single addresses are kept as integers in sorted arrays (4 bytes per IPv4
+    entry), CIDR blocks as merged, sorted ``[start, end]`` ranges. New entries
+    go to a small pending set that is merged in bulk, so adding many IPs does
+    not re-sort on every insert.
+    """
+
+    def __init__(self):
+        self._families = {4: _Family(4), 6: _Family(6)}
+        self.duplicates = 0
+        self.invalid = 0
+
+    def _parse(self, text):
+        text = text.strip()
+        if "/" in text:
+            try:
+                net = ipaddress.ip_network(text, strict=False)
+            except ValueError:
+                return None
+            if net.num_addresses == 1:
+                return net.version, int(net.network_address), None
+            return net.version, int(net.network_address), int(net.broadcast_address)
+        parsed = parse_ip(text)
+        if parsed is None:
+            return None
+        return parsed[0], parsed[1], None
+
+    def add(self, entry):
+        """Add an IP or CIDR string. Returns True if it was not already covered."""
+        parsed = self._parse(str(entry))
+        if parsed is None:
+            raise ValueError(f"Invalid IP or network: {entry!r}")
+        version, start, end = parsed
+        family = self._families[version]
+        if end is None:
+            return family.add(start)
+        return family.add_range(start, end)
+
+    def __contains__(self, ip):
+        parsed = parse_ip(str(ip).strip())
+        if parsed is None:
+            return False
+        version, value = parsed
+        return self._families[version].contains(value)
+
+    def __len__(self):
+        return sum(len(f) for f in self._families.values())
+
+    def merge(self):
+        for family in self._families.values():
+            family.merge()
+
+    def contains_many(self, ips):
+        """Membership of every IP string in ``ips`` as a bool array, in one pass.
+
+        Each distinct address is parsed once; IPv4 addresses are then looked
+        up together with ``np.searchsorted`` against the sorted array and the
+        merged ranges. Pending inserts are checked as a set rather than merged,
+        so calling this per batch never triggers a re-sort.
+        """
+        ips = np.asarray(ips, dtype=object)
+        if not len(ips):
+            return np.zeros(0, dtype=bool)
+        # Missing values get code -1, which indexes the trailing False slot.
+        inverse, uniques = pd.factorize(ips)
+        found = np.zeros(len(uniques) + 1, dtype=bool)
+        v4_rows, v4_values = [], []
+        family4, family6 = self._families[4], self._families[6]
+        pending4 = family4.pending
+        for i, text in enumerate(uniques):
+            parsed = parse_ip(str(text).strip())
+            if parsed is None:
+                continue
+            version, value = parsed
+            if version == 6:
+                found[i] = family6.contains(value)
+            elif value in pending4:
+                found[i] = True
+            else:
+                v4_rows.append(i)
+                v4_values.append(value)
+        if v4_rows:
+            values = np.array(v4_values, dtype=np.uint32)
+            hit = np.zeros(len(values), dtype=bool)
+            known = np.frombuffer(family4.values, dtype=np.uint32) if len(family4.values) else None
+            if known is not None:
+                pos = np.minimum(np.searchsorted(known, values), len(known) - 1)
+                hit |= known[pos] == values
+            if family4.starts:
+                starts = np.array(family4.starts, dtype=np.uint64)
+                ends = np.array(family4.ends, dtype=np.uint64)
+                i = np.searchsorted(starts, values, side="right") - 1
+                hit |= (i >= 0) & (values <= ends[np.maximum(i, 0)])
+            found[v4_rows] = hit
+        return found[inverse]
+
+    def ipv4_array(self):
+        """Sorted IPv4 addresses (pending inserts merged) as an ``array('I')``."""
+        family = self._families[4]
+        family.merge()
+        return family.values
+
+    def entries(self):
+        """Yield every entry as a canonical string: addresses first, then networks."""
+        self.merge()
+        for version, family in self._families.items():
+            for value in family.values:
+                yield format_ip(version, value)
+        for version, family in self._families.items():
+            for start, end in zip(family.starts, family.ends):
+                first = ipaddress.ip_address(start) if version == 4 else ipaddress.IPv6Address(start)
+                last = ipaddress.ip_address(end) if version == 4 else ipaddress.IPv6Address(end)
+                for net in ipaddress.summarize_address_range(first, last):
+                    yield str(net)
+
+    @classmethod
+    def load(cls, path):
+        """Build an index from a blacklist file, counting duplicate and invalid lines."""
+        index = cls()
+        singles = {4: [], 6: []}
+        lines = 0
+        try:
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    lines += 1
+                    if "/" in line:
+                        try:
+                            index.add(line)
+                        except ValueError:
+                            index.invalid += 1
+                        continue
+                    parsed = parse_ip(line)
+                    if parsed is None:
+                        index.invalid += 1
+                        continue
+                    singles[parsed[0]].append(parsed[1])
+        except FileNotFoundError:
+            return index
+
+        for version, values in singles.items():
+            family = index._families[version]
+            if family.starts:
+                values = [v for v in values if not family._in_ranges(v)]
+            family.extend_sorted(values)
+        index.duplicates = lines - index.invalid - len(index)
+        return index
+
+    def compact(self, path):
+        """Atomically rewrite ``path`` with one line per unique entry."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix=".blacklist-", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                for entry in self.entries():
+                    f.write(f"{entry}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(path):
+                os.chmod(tmp, os.stat(path).st_mode & 0o777)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self.duplicates = 0
+        self.invalid = 0
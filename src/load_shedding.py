@@ -0,0 +1,182 @@
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Sidecar next to a segment that is queued for analysis; webapi's FileCatalog does not expire it
+PENDING_SUFFIX = ".pending"
+# "priority": new sources first, then a per-source sample of the rest
+# "sample": per-source sample of every flow
+# "drop-oldest": analyze whole segments, drop the oldest queued one when full
+OVERLOAD_POLICIES = ("priority", "sample", "drop-oldest")
+
+
+def mark_pending(path):
+    try:
+        with open(path + PENDING_SUFFIX, "w"):
+            pass
+    except OSError as e:
+        print(f"[WARN] Could not mark {path} as pending: {e}")
+
+
+def clear_pending(path):
+    try:
+        os.unlink(path + PENDING_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+
+def clear_stale_pending(directory):
+    """Remove markers left by a previous run; returns how many there were."""
+    cleared = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if entry.name.endswith(PENDING_SUFFIX):
+            try:
+                os.unlink(entry.path)
+                cleared += 1
+            except FileNotFoundError:
+                pass
+    return cleared
+
+
+class SegmentQueue:
+    """Bounded FIFO of closed capture segments waiting for analysis.
+
+    ``put`` marks the segment pending (see PENDING_SUFFIX) and never blocks
+    the capture loop: when ``max_segments`` are already waiting, the oldest
+    one is dropped unanalyzed, its marker removed and its flows counted in
+    ``dropped_flows``. ``done(path)`` clears the marker once analysis is over.
+    """
+
+    def __init__(self, max_segments=4):
+        self.max_segments = max(1, max_segments)
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped_segments = 0
+        self.dropped_flows = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def qsize(self):
+        return len(self._items)
+
+    def put(self, path, rows=0):
+        """Queue ``(path, rows)``; returns the ``(path, rows)`` dropped to make room, or None."""
+        mark_pending(path)
+        dropped = None
+        with self._cond:
+            if len(self._items) >= self.max_segments:
+                dropped = self._items.popleft()
+                self.dropped_segments += 1
+                self.dropped_flows += dropped[1]
+            self._items.append((path, rows))
+            self._cond.notify()
+        if dropped is not None:
+            clear_pending(dropped[0])
+        return dropped
+
+    def get(self):
+        """Block for the next ``(path, rows)``; None once closed and drained."""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            return self._items.popleft() if self._items else None
+
+    def done(self, path):
+        clear_pending(path)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def stratified_sample(codes, budget, rng):
+    """Mask keeping ``budget`` rows spread evenly over the strata in ``codes`` (ints 0..k-1).
+
+    Every stratum keeps ``min(count, quota)`` rows picked at random, with
+    ``quota`` as large as the budget allows (water-filling), so small strata
+    are kept whole and the largest ones give up the most rows.
+    """
+    n = len(codes)
+    if budget >= n:
+        return np.ones(n, dtype=bool)
+    if budget <= 0 or not n:
+        return np.zeros(n, dtype=bool)
+    counts = np.bincount(codes)
+    counts_sorted = np.sort(counts)
+    strata = len(counts_sorted)
+    # Rows kept if the quota were each stratum size in turn
+    below = np.concatenate(([0], np.cumsum(counts_sorted)[:-1]))
+    kept_at = below + counts_sorted * (strata - np.arange(strata))
+    k = int(np.searchsorted(kept_at, budget, side="right"))
+    quota = int((budget - below[k]) // (strata - k)) if k < strata else int(counts_sorted[-1])
+    per_stratum = np.minimum(counts, quota)
+    # The remainder goes one row each to random strata that still have rows left
+    remainder = budget - int(per_stratum.sum())
+    if remainder > 0:
+        open_strata = np.flatnonzero(counts > quota)
+        per_stratum[rng.choice(open_strata, size=remainder, replace=False)] += 1
+
+    # Random rank of each row within its stratum
+    order = np.lexsort((rng.random(n), codes))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n) - starts[codes[order]]
+    return rank < per_stratum[codes]
+
+
+class FlowShedder:
+    """Chooses which flows of an oversized window reach the model.
+
+    Strata are source IPs, so a flood from one host cannot crowd the others
+    out of the sample. With the "priority" policy, flows from sources not
+    seen in recent windows (``remember``) are kept first and only the
+    benign-looking rest, sources that were analyzed and not blacklisted, is
+    sampled. Seen sources are held in two generations of at most
+    ``max_sources / 2`` each.
+    """
+
+    def __init__(self, policy="priority", max_sources=100000, seed=None):
+        self.policy = policy
+        self.max_sources = max_sources
+        self._current = set()
+        self._previous = set()
+        self._rng = np.random.default_rng(seed)
+
+    def remember(self, source_ips):
+        if self.policy != "priority" or not len(source_ips):
+            return
+        self._current.update(pd.unique(np.asarray(source_ips, dtype=object)))
+        if len(self._current) > self.max_sources // 2:
+            self._previous, self._current = self._current, set()
+
+    def is_known(self, ip):
+        return ip in self._current or ip in self._previous
+
+    def select(self, source_ips, budget):
+        """Boolean mask of at most ``budget`` flows to analyze."""
+        codes, uniques = pd.factorize(np.asarray(source_ips, dtype=object))
+        # Flows without a source IP (code -1) form one more stratum, never "known"
+        codes = np.where(codes < 0, len(uniques), codes)
+        if self.policy != "priority":
+            return stratified_sample(codes, budget, self._rng)
+        known = np.fromiter((self.is_known(ip) for ip in uniques), dtype=bool, count=len(uniques))
+        known = np.append(known, False)[codes]
+        new = np.flatnonzero(~known)
+        keep = np.zeros(len(codes), dtype=bool)
+        if len(new) >= budget:
+            keep[new] = stratified_sample(pd.factorize(codes[new])[0], budget, self._rng)
+            return keep
+        keep[new] = True
+        rest = np.flatnonzero(known)
+        keep[rest] = stratified_sample(pd.factorize(codes[rest])[0], budget - len(new), self._rng)
+        return keep
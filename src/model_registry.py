@@ -0,0 +1,330 @@
+import os
+import time
+import warnings
+import threading
+
+import numpy as np
+import joblib
+
+from metrics import Counter, Histogram
+
+MODEL_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "model"))
+MODEL_EXTENSIONS = (".pkl", ".joblib", ".json", ".ubj")
+
+PREDICT_SECONDS = Histogram("snids_predict_batch_seconds", "model.predict_batch latency per batch",
+                            buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+PREDICT_ROWS = Counter("snids_predict_rows_total", "Rows passed to the model")
+
+# CIC-IDS2017 column names used in train/train_model.ipynb -> cicflowmeter field names
+CIC_FEATURE_NAMES = {
+    "Flow Duration": "flow_duration",
+    "Bwd Packet Length Max": "bwd_pkt_len_max",
+    "Bwd Packet Length Mean": "bwd_pkt_len_mean",
+    "Bwd Packet Length Std": "bwd_pkt_len_std",
+    "Flow IAT Mean": "flow_iat_mean",
+    "Flow IAT Std": "flow_iat_std",
+    "Flow IAT Max": "flow_iat_max",
+    "Flow IAT Min": "flow_iat_min",
+    "Fwd IAT Total": "fwd_iat_tot",
+    "Fwd IAT Mean": "fwd_iat_mean",
+    "Fwd IAT Std": "fwd_iat_std",
+    "Fwd IAT Max": "fwd_iat_max",
+    "Bwd IAT Total": "bwd_iat_tot",
+    "Bwd IAT Mean": "bwd_iat_mean",
+    "Bwd IAT Std": "bwd_iat_std",
+    "Bwd IAT Max": "bwd_iat_max",
+    "Bwd Packets/s": "bwd_pkts_s",
+    "Max Packet Length": "pkt_len_max",
+    "Packet Length Mean": "pkt_len_mean",
+    "Packet Length Std": "pkt_len_std",
+    "Packet Length Variance": "pkt_len_var",
+    "FIN Flag Count": "fin_flag_cnt",
+    "PSH Flag Count": "psh_flag_cnt",
+    "ACK Flag Count": "ack_flag_cnt",
+    "Average Packet Size": "pkt_size_avg",
+    "Avg Bwd Segment Size": "bwd_seg_size_avg",
+    "Init_Win_bytes_forward": "init_fwd_win_byts",
+    "Active Mean": "active_mean",
+    "Active Min": "active_min",
+    "Idle Mean": "idle_mean",
+    "Idle Std": "idle_std",
+    "Idle Max": "idle_max",
+    "Idle Min": "idle_min",
+}
+
+# LabelEncoder order of 'Attack Type' after dropping classes with < 1950 samples
+CIC_IDS2017_LABELS = {
+    0: "BENIGN",
+    1: "Bot",
+    2: "Brute Force",
+    3: "DDoS",
+    4: "DoS",
+    5: "Port Scan",
+    6: "Web Attack",
+}
+
+
+def available_models(model_dir=MODEL_DIR):
+    """Model artifacts in ``model_dir`` as {name: path}."""
+    if not os.path.isdir(model_dir):
+        return {}
+    return {
+        os.path.splitext(f)[0]: os.path.join(model_dir, f)
+        for f in sorted(os.listdir(model_dir))
+        if f.endswith(MODEL_EXTENSIONS)
+    }
+
+
+def resolve_model_path(spec, model_dir=MODEL_DIR):
+    """Accept a path or a bare name from ``model_dir`` (e.g. "xgboost_split")."""
+    if os.path.exists(spec):
+        return spec
+    models = available_models(model_dir)
+    if spec in models:
+        return models[spec]
+    raise FileNotFoundError(f"Model {spec!r} not found (available: {', '.join(models) or 'none'})")
+
+
+class ModelBackend:
+    """A loaded model with a uniform ``predict_batch(np.ndarray) -> np.ndarray`` API.
+
+    ``feature_names`` are the model's inputs as cicflowmeter field names, in the
+    order the model expects. Rows passed to ``predict_batch`` must follow the
+    column order given to ``validate`` (normally ``FEATURE_COLUMNS``); they are
+    permuted to the model order only when the two differ.
+    """
+
+    def __init__(self, name, path, model, kind, feature_names, labels):
+        self.name = name
+        self.path = path
+        self.model = model
+        self.kind = kind
+        self.feature_names = feature_names
+        self.labels = labels
+        self.column_index = None
+        self.warmup_seconds = None
+
+    def validate(self, feature_columns):
+        columns = list(feature_columns)
+        if self.feature_names is None:
+            n_features = getattr(self.model, "n_features_in_", None) or self._num_features()
+            if n_features is not None and n_features != len(columns):
+                raise ValueError(f"{self.name} expects {n_features} features, FEATURE_COLUMNS has {len(columns)}")
+            self.feature_names = columns
+            return
+
+        missing = [f for f in self.feature_names if f not in columns]
+        extra = [f for f in columns if f not in self.feature_names]
+        if missing or extra:
+            raise ValueError(f"{self.name} feature mismatch: missing from FEATURE_COLUMNS {missing}, "
+                             f"unused by model {extra}")
+        order = np.array([columns.index(f) for f in self.feature_names])
+        self.column_index = None if np.array_equal(order, np.arange(len(order))) else order
+
+    def _num_features(self):
+        if self.kind == "booster":
+            return self.model.num_features()
+        return None
+
+    def predict_batch(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if self.column_index is not None:
+            X = X[:, self.column_index]
+        if self.kind in ("booster", "xgb_sklearn"):
+            booster = self.model if self.kind == "booster" else self.model.get_booster()
+            out = booster.inplace_predict(X, validate_features=False)
+            return out.argmax(axis=1) if out.ndim == 2 else out.astype(np.int64)
+        with warnings.catch_warnings():
+            # Fitted on a DataFrame; plain arrays are fine but sklearn warns every call
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            return self.model.predict(X)
+
+    def predict(self, X):
+        return self.predict_batch(X)
+
+    def warm_up(self, rows=256):
+        n_features = len(self.feature_names)
+        start = time.perf_counter()
+        self.predict_batch(np.zeros((rows, n_features), dtype=np.float32))
+        self.warmup_seconds = time.perf_counter() - start
+        return self.warmup_seconds
+
+
+def _load_artifact(path):
+    if path.endswith((".json", ".ubj")):
+        import xgboost
+        booster = xgboost.Booster()
+        booster.load_model(path)
+        return booster, "booster", booster.feature_names
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # sklearn/xgboost version-mismatch notices
+        model = joblib.load(path)
+    if type(model).__module__.startswith("xgboost"):
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        kind = "xgb_sklearn" if hasattr(model, "get_booster") else "booster"
+        return model, kind, booster.feature_names
+    names = getattr(model, "feature_names_in_", None)
+    return model, "sklearn", (list(names) if names is not None else None)
+
+
+def load_model(spec, feature_columns, warmup_rows=256, model_dir=MODEL_DIR):
+    """Load, validate against ``feature_columns`` and warm up a model artifact."""
+    path = resolve_model_path(spec, model_dir)
+    name = os.path.splitext(os.path.basename(path))[0]
+    model, kind, raw_names = _load_artifact(path)
+
+    feature_names = None
+    if raw_names is not None:
+        feature_names = [CIC_FEATURE_NAMES.get(n, n) for n in raw_names]
+
+    classes = getattr(model, "classes_", None)
+    if classes is not None and len(classes) == len(CIC_IDS2017_LABELS):
+        labels = dict(CIC_IDS2017_LABELS)
+    else:
+        labels = None
+
+    backend = ModelBackend(name, path, model, kind, feature_names, labels)
+    backend.validate(feature_columns)
+    if warmup_rows:
+        backend.warm_up(warmup_rows)
+    print(f"[MODEL] Loaded {name} ({kind}, {len(backend.feature_names)} features) from {path}"
+          + (f", warm-up {backend.warmup_seconds * 1000:.1f} ms" if backend.warmup_seconds else ""))
+    return backend
+
+
+class ModelHolder:
+    """Indirection used by the detector so the model can be swapped at runtime.
+
+    ``predict_batch`` reads ``self.current`` once per batch, so a swap (a single
+    attribute assignment) never affects a batch in flight and no flows are
+    dropped. Batch latency is tracked to report the blip caused by a swap.
+    """
+
+    def __init__(self, backend):
+        self.current = backend
+        self.swaps = 0
+        self.baseline_ms = None  # EWMA of per-row batch latency before the last swap
+        self._ewma_ms = None
+        self._watch_batches = 0
+        self._post_swap = []
+
+    def __getattr__(self, name):
+        # Expose name/labels/feature_names/... of the active backend
+        if name == "current":
+            raise AttributeError(name)
+        return getattr(self.current, name)
+
+    def predict_batch(self, X):
+        backend = self.current
+        start = time.perf_counter()
+        out = backend.predict_batch(X)
+        elapsed = time.perf_counter() - start
+        PREDICT_SECONDS.observe(elapsed)
+        PREDICT_ROWS.inc(len(out))
+        self._observe(elapsed * 1000, len(out))
+        return out
+
+    def predict(self, X):
+        return self.predict_batch(X)
+
+    def _observe(self, ms, rows):
+        per_kilo_row = ms / max(rows, 1) * 1000
+        if self._watch_batches:
+            self._post_swap.append(per_kilo_row)
+            self._watch_batches -= 1
+            if not self._watch_batches:
+                worst = max(self._post_swap)
+                base = f"{self.baseline_ms:.2f}" if self.baseline_ms is not None else "n/a"
+                print(f"[MODEL] Post-swap latency: worst {worst:.2f} ms/1k rows over "
+                      f"{len(self._post_swap)} batches (baseline {base} ms/1k rows)")
+        self._ewma_ms = per_kilo_row if self._ewma_ms is None else 0.9 * self._ewma_ms + 0.1 * per_kilo_row
+
+    def swap(self, backend, watch_batches=5):
+        old = self.current
+        self.baseline_ms = self._ewma_ms
+        self._post_swap = []
+        self._watch_batches = watch_batches
+        self._ewma_ms = None
+        self.current = backend
+        self.swaps += 1
+        return old
+
+
+class ModelWatcher:
+    """Reloads the active model artifact in the background when it changes on disk.
+
+    Polls ``path`` (inode/mtime/size, so an atomic rename is seen even when
+    size and mtime match); once a change has been stable for one poll the
+    new artifact is loaded, validated against ``feature_columns``, run on a
+    canary batch and only then swapped into ``holder``. Only the active
+    artifact is watched, not the whole model directory: deploy a new model by
+    copying it next to the old one and renaming it over the active path.
+    """
+
+    def __init__(self, holder, path, feature_columns, interval=5.0, canary_rows=1024):
+        self.holder = holder
+        self.path = path
+        self.feature_columns = feature_columns
+        self.interval = interval
+        self.canary_rows = canary_rows
+        self._seen = self._signature()
+        self._candidate = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            sig = self._signature()
+            if sig is None or sig == self._seen:
+                self._candidate = None
+                continue
+            if sig != self._candidate:
+                # Wait one more poll so a file still being copied is not loaded
+                self._candidate = sig
+                continue
+            self._seen, self._candidate = sig, None
+            self.reload()
+
+    def canary(self, backend):
+        """Run a canary batch; raise if the output is unusable."""
+        rng = np.random.default_rng(0)
+        X = (rng.random((self.canary_rows, len(self.feature_columns)), dtype=np.float32) * 1e5)
+        X[: self.canary_rows // 4] = 0
+        out = np.asarray(backend.predict_batch(X))
+        if out.shape != (self.canary_rows,):
+            raise ValueError(f"canary output shape {out.shape}, expected ({self.canary_rows},)")
+        if backend.labels is not None:
+            unknown = set(np.unique(out).tolist()) - set(backend.labels)
+            if unknown:
+                raise ValueError(f"canary produced unknown classes {sorted(unknown)}")
+
+    def reload(self):
+        start = time.perf_counter()
+        try:
+            backend = load_model(self.path, self.feature_columns)
+            self.canary(backend)
+        except Exception as e:
+            print(f"[MODEL] Rejected new artifact {self.path}: {e}; keeping {self.holder.name}")
+            return False
+        prepared = time.perf_counter()
+        self.holder.swap(backend)
+        swapped = time.perf_counter()
+        print(f"[MODEL] Swapped to {backend.name}: load+canary {(prepared - start) * 1000:.1f} ms, "
+              f"swap {(swapped - prepared) * 1e6:.1f} µs")
+        return True
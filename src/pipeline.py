@@ -1,32 +1,70 @@
 import os
 import time
 import threading
-import pandas as pd
 from datetime import datetime
 from subprocess import Popen
 import xgboost
 import signal
 import joblib
-import pexpect  # giữ lại nếu bạn dùng suricatasc theo dạng shell
 import numpy as np
 from cicflowmeter.sniffer import create_sniffer
+from flow_stream import FlowBatcher, AsyncCSVSink
+from flow_ingest import read_flow_matrix, records_to_matrix
+from segment_format import resolve_format
+from model_registry import MODEL_DIR, ModelHolder, ModelWatcher, load_model
+from blacklist import BlacklistManager
+from verdict_cache import VerdictCache
+from load_shedding import OVERLOAD_POLICIES, FlowShedder
+from suricatasc_client import SuricataClient, socket_path_from_config
+from capture_engine import CaptureEngine, CAPTURE_WINDOW_SECONDS
+from inference_worker import count_verdicts
 
 # Configuration
 INTERFACE = os.environ.get("SURICATA_IFACE", "wlp0s20f3")
-MODEL_PATH = "/etc/suricata/model/random_forest_model_balanced.pkl"  # Cập nhật đường dẫn tới mô hình
+MODEL_PATH = os.environ.get("SNIDS_MODEL", os.path.join(MODEL_DIR, "decision_tree_split.pkl"))  # Cập nhật đường dẫn tới mô hình
+# Poll interval (s) for a replaced model artifact; 0 disables hot swap
+MODEL_WATCH_INTERVAL = float(os.environ.get("SNIDS_MODEL_WATCH", "5"))
 CSV_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "traffic-csv"))
-BLACKLIST_FILE = "/etc/suricata/rules/blacklist.txt"
+BLACKLIST_FILE = os.environ.get("SNIDS_BLACKLIST_FILE", "/etc/suricata/rules/blacklist.txt")
+SURICATA_SOCKET = os.environ.get("SURICATA_SOCKET") or socket_path_from_config(os.environ.get("SURICATA_CONFIG"))
+SURICATA_PIPELINE_DEPTH = int(os.environ.get("SURICATA_PIPELINE_DEPTH", "1"))
+# "dataset" pushes IPs with dataset-add, "reload" does one reload-rules per flush
+BLACKLIST_MODE = os.environ.get("SNIDS_BLACKLIST_MODE", "dataset")
+BLACKLIST_INTERVAL = float(os.environ.get("SNIDS_BLACKLIST_INTERVAL", "1.0"))
 FLOW_TIMEOUT = 3.0
 
-# Load model
-class DummyModel:
-    def predict(self, X):
-        return np.full(len(X), -1)
+# "continuous" keeps one sniffer running and rotates segments; "timed" is the old stop/start loop
+CAPTURE_MODE = os.environ.get("SNIDS_CAPTURE_MODE", "continuous")
+SEGMENT_SECONDS = int(os.environ.get("SNIDS_SEGMENT_SECONDS", "120"))
+
+# Streaming mode: completed flows go straight to the model in micro-batches
+STREAM_MODE = os.environ.get("SNIDS_STREAM", "0") == "1"
+STREAM_BATCH_SIZE = int(os.environ.get("SNIDS_STREAM_BATCH", "256"))
+STREAM_MAX_DELAY = float(os.environ.get("SNIDS_STREAM_DELAY", "0.5"))
+STREAM_CSV = os.environ.get("SNIDS_STREAM_CSV", "1") == "1"
+# Segment files in traffic-csv: "csv", or "arrow"/"parquet" (needs pyarrow, falls back to csv)
+SEGMENT_FORMAT = resolve_format(os.environ.get("SNIDS_SEGMENT_FORMAT", "csv"))
 
-model = DummyModel()
+# Flows from already-blacklisted sources skip the model entirely
+SKIP_BLACKLISTED = os.environ.get("SNIDS_SKIP_BLACKLISTED", "1") == "1"
+# LRU of verdicts keyed on the quantized feature row (0 disables); mantissa bits kept when quantizing
+VERDICT_CACHE_SIZE = int(os.environ.get("SNIDS_VERDICT_CACHE", "65536"))
+VERDICT_CACHE_BITS = int(os.environ.get("SNIDS_VERDICT_CACHE_BITS", "10"))
+
+# Continuous mode: closed segments waiting for analysis, and what gives when analysis falls behind
+# (see load_shedding.py): "priority", "sample" or "drop-oldest"
+MAX_QUEUED_SEGMENTS = int(os.environ.get("SNIDS_MAX_QUEUED_SEGMENTS", "4"))
+OVERLOAD_POLICY = os.environ.get("SNIDS_OVERLOAD_POLICY", "priority")
+if OVERLOAD_POLICY not in OVERLOAD_POLICIES:
+    print(f"[WARNING] Unknown SNIDS_OVERLOAD_POLICY {OVERLOAD_POLICY!r}; using priority")
+    OVERLOAD_POLICY = "priority"
+
+# Per-flow "benign" lines are very noisy on a busy link; opt in for debugging
+LOG_BENIGN = os.environ.get("SNIDS_LOG_BENIGN", "0") == "1"
+DEFAULT_SRC_IP = "10.81.50.100"
 
 # Labels
-MALICIOUS_LABELS = {
+ATTACK_LABELS = {
     0: 'BENIGN',
     1: 'Bot',
     2: 'Brute Force',
@@ -57,6 +95,7 @@ FEATURE_COLUMNS = {
     'fwd_iat_max': 'float32',
     'fwd_iat_mean': 'float32',
     'fwd_iat_std': 'float32',
+    'bwd_iat_tot': 'float32',
     'bwd_iat_max': 'float32',
     'bwd_iat_mean': 'float32',
     'bwd_iat_std': 'float32',
@@ -74,75 +113,114 @@ FEATURE_COLUMNS = {
     'bwd_seg_size_avg': 'float32'
 }
 
-# IP blacklist set (in-memory)
-blacklisted_ips = set()
-blacklist_lock = threading.Lock()
+# Load model
+class DummyModel:
+    labels = None
 
-# Blacklist IP via Suricata and write to file
-def add_ip_to_blacklist(ip):
-    with blacklist_lock:
-        if ip in blacklisted_ips:
-            print(f"[BLACKLIST] {ip} already blacklisted.")
-            return
+    def predict(self, X):
+        return np.full(len(X), -1)
 
-        try:
-            # Ghi IP vào file blacklist
-            with open(BLACKLIST_FILE, "a") as f:
-                f.write(f"{ip}\n")
+    def predict_batch(self, X):
+        return self.predict(X)
 
-            # Thêm IP vào danh sách đen trong bộ nhớ
-            blacklisted_ips.add(ip)
-            print(f"[BLACKLIST] IP {ip} has been added to {BLACKLIST_FILE}.")
+# process_and_predict goes through the holder so ModelWatcher can swap models live
+try:
+    model = ModelHolder(load_model(MODEL_PATH, FEATURE_COLUMNS))
+except Exception as e:
+    print(f"[ERROR] Failed to load model {MODEL_PATH}: {e}. Falling back to DummyModel (no ML verdicts).")
+    model = DummyModel()
 
-            # Reload Suricata rules
-            cmds = [
-                "sudo suricatasc -c 'reload-rules'"
-            ]
-            for cmd in cmds:
-                pexpect.run(cmd)
+# Nhãn tấn công (bỏ BENIGN)
+MALICIOUS_LABELS = {k: v for k, v in (model.labels or ATTACK_LABELS).items() if v != 'BENIGN'}
 
-        except Exception as e:
-            print(f"[ERROR] Failed to blacklist {ip}: {e}")
+# IP blacklist: queued in memory, written and applied to Suricata in batches
+suricata = SuricataClient(SURICATA_SOCKET, pipeline_depth=SURICATA_PIPELINE_DEPTH)
+blacklist = BlacklistManager(BLACKLIST_FILE, client=suricata,
+                             mode=BLACKLIST_MODE, interval=BLACKLIST_INTERVAL)
+blacklisted_ips = blacklist.blacklisted
+verdict_cache = VerdictCache(VERDICT_CACHE_SIZE, VERDICT_CACHE_BITS) if VERDICT_CACHE_SIZE > 0 else None
+flow_shedder = FlowShedder(OVERLOAD_POLICY)
+
+# Blacklist IPs via Suricata and write to file (coalesced by the manager)
+def add_ips_to_blacklist(ips):
+    blacklist.add_many(ips)
+
+def add_ip_to_blacklist(ip):
+    if ip in blacklisted_ips:
+        print(f"[BLACKLIST] {ip} already blacklisted.")
+        return
+    add_ips_to_blacklist([ip])
+
+# Gom kết quả dự đoán theo IP nguồn và blacklist một lần cho cả cửa sổ
+def report_verdicts(predictions, source_ips):
+    hits, benign_ips = count_verdicts(predictions, source_ips, MALICIOUS_LABELS, DEFAULT_SRC_IP)
+    if LOG_BENIGN:
+        for src_ip in benign_ips:
+            print(f"[INFO] ✅ Benign traffic from IP: {src_ip}")
+    for src_ip, attack_type, n in hits:
+        print(f"[ALERT] 🚨 Detected {attack_type} from IP: {src_ip} ({n} flows)")
+    if hits:
+        add_ips_to_blacklist(list(dict.fromkeys(src_ip for src_ip, _, _ in hits)))
+    n_flows = len(predictions)
+    n_malicious = sum(n for _, _, n in hits)
+    print(f"[PROCESS] {n_flows} flows, {n_malicious} malicious, {n_flows - n_malicious} benign")
+
+# Flows that never reached the model in this window: blacklisted sources and cached verdicts
+def report_savings(skipped):
+    rows, hits, model_rows = verdict_cache.take_stats() if verdict_cache is not None else (0, 0, 0)
+    total = rows + skipped
+    if not total:
+        return
+    hit_rate = f"{hits / rows * 100:.1f}%" if rows else "n/a"
+    print(f"[CACHE] {total} flows: {skipped} from blacklisted sources skipped, "
+          f"{hits}/{rows} verdict cache hits ({hit_rate}), model ran on {model_rows} rows "
+          f"({(total - model_rows) / total * 100:.1f}% saved)")
 
 # Hàm xử lý và dự đoán
-def process_and_predict(csv_file=None, input_data=None, source_ips=None):
+# max_flows: analysis budget when the capture engine is behind (None = every flow)
+def process_and_predict(csv_file=None, input_data=None, source_ips=None, max_flows=None):
     try:
         # Nếu có file CSV, xử lý file CSV
         if csv_file:
-            # Đọc file CSV
-            df = pd.read_csv(csv_file)
-
-            # Lấy địa chỉ IP nguồn (nếu không tồn tại, sử dụng giá trị mặc định là "10.81.50.100")
-            source_ips = df.get("src_ip", pd.Series(["10.81.50.100"] * len(df)))
-
-            # Kiểm tra và thêm các cột bị thiếu với giá trị mặc định
-            for column in FEATURE_COLUMNS.keys():
-                if column not in df.columns:
-                    print(f"[WARNING] Missing column: {column}. Filling with default value 0.")
-                    df[column] = 0  # Thêm cột bị thiếu với giá trị mặc định
-
-            # Lọc và sắp xếp các cột theo thứ tự mà mô hình yêu cầu
-            input_data = df[list(FEATURE_COLUMNS.keys())].astype(FEATURE_COLUMNS)
+            # Chỉ đọc các cột cần thiết, thẳng vào ma trận float32
+            input_data, source_ips = read_flow_matrix(csv_file, FEATURE_COLUMNS, default_ip=DEFAULT_SRC_IP)
 
         # Nếu không có dữ liệu đầu vào, báo lỗi
         if input_data is None or source_ips is None:
             print("[ERROR] No input data or source IPs provided.")
             return
 
-        # Dự đoán bằng mô hình
-        predictions = model.predict(input_data)
-
-        # Xử lý kết quả dự đoán
-        for idx, prediction in enumerate(predictions):
-            src_ip = source_ips.iloc[idx] if idx < len(source_ips) else "10.81.50.100"
-            if src_ip == "0.0.0.0":
-                src_ip = "10.81.50.100"
-            if prediction in MALICIOUS_LABELS:
-                attack_type = MALICIOUS_LABELS[prediction]
-                print(f"[ALERT] 🚨 Detected {attack_type} from IP: {src_ip}")
-                add_ip_to_blacklist(src_ip)
-            else:
-                print(f"[INFO] ✅ Benign traffic from IP: {src_ip}")
+        # Bỏ qua các flow từ IP đã bị blacklist: một lần tra cứu cho cả lô
+        input_data = np.asarray(input_data, dtype=np.float32)
+        source_ips = np.asarray(source_ips, dtype=object)
+        skipped = 0
+        if SKIP_BLACKLISTED and len(blacklisted_ips) and len(source_ips) == len(input_data):
+            known = blacklisted_ips.contains_many(source_ips)
+            skipped = int(known.sum())
+            if skipped:
+                input_data, source_ips = input_data[~known], source_ips[~known]
+        if not len(input_data):
+            report_savings(skipped)
+            return
+
+        # Quá tải: chỉ phân tích một phần flow (nguồn mới trước, phần còn lại lấy mẫu theo IP)
+        if max_flows is not None and len(input_data) > max_flows and len(source_ips) == len(input_data):
+            keep = flow_shedder.select(source_ips, max_flows)
+            shed = len(keep) - int(keep.sum())
+            input_data, source_ips = input_data[keep], source_ips[keep]
+            print(f"[SHED] Analysis behind capture: analyzing {len(input_data)} flows, "
+                  f"{shed} shed ({OVERLOAD_POLICY})")
+        flow_shedder.remember(source_ips)
+
+        # Dự đoán bằng mô hình (chỉ các dòng chưa có trong cache)
+        if verdict_cache is not None:
+            predictions = verdict_cache.predict(model.predict_batch, input_data, getattr(model, "swaps", 0))
+        else:
+            predictions = model.predict_batch(input_data)
+
+        # Xử lý kết quả dự đoán (vectorized)
+        report_verdicts(predictions, source_ips)
+        report_savings(skipped)
 
     except Exception as e:
         print(f"[ERROR] Processing or prediction failed: {e}")
@@ -171,30 +249,88 @@ def run_cicflowmeter_timed(interface, output_csv, duration=60):
     except Exception as e:
         print(f"[ERROR] CICFlowMeter failed: {e}")
 
+# Phân tích một file CSV đã ghi xong
+def analyze_capture(output_csv, max_flows=None):
+    # Only process if file exists and is non-empty
+    if os.path.exists(output_csv) and os.path.getsize(output_csv) > 0:
+        print(f"[PROCESS] Analyzing {output_csv}...")
+        process_and_predict(csv_file=output_csv, max_flows=max_flows)
+    else:
+        print(f"[WARN] Skipping processing; capture output missing/empty: {output_csv}")
+
 # Traffic capture loop
 def capture_and_process_traffic():
+    # Seconds with no sniffer running (flush + predict + restart between windows)
+    uncaptured_seconds = 0.0
+    stopped_at = None
     while True:
         try:
             start_time = datetime.now()
             timestamp = start_time.strftime("%H-%M-%S-%d-%m-%Y")
             output_csv = os.path.join(CSV_DIR, f"{timestamp}.csv")
 
-            print(f"[CAPTURE] Capturing on {INTERFACE}, saving to {output_csv}...")
-            run_cicflowmeter_timed(INTERFACE, output_csv, duration=120)
+            if stopped_at is not None:
+                uncaptured_seconds += time.monotonic() - stopped_at
+            print(f"[CAPTURE] Capturing on {INTERFACE}, saving to {output_csv}... "
+                  f"(uncaptured so far: {uncaptured_seconds:.1f}s)")
+            with CAPTURE_WINDOW_SECONDS.time():
+                run_cicflowmeter_timed(INTERFACE, output_csv, duration=SEGMENT_SECONDS)
+            stopped_at = time.monotonic()
 
-            # Only process if file exists and is non-empty
-            if os.path.exists(output_csv) and os.path.getsize(output_csv) > 0:
-                print(f"[PROCESS] Analyzing {output_csv}...")
-                process_and_predict(csv_file=output_csv)
-            else:
-                print(f"[WARN] Skipping processing; capture output missing/empty: {output_csv}")
+            analyze_capture(output_csv)
         except Exception as e:
             print(f"[ERROR] Traffic capture or processing failed: {e}")
 
+# Continuous capture: sniffer never stops, segments are analyzed on a worker
+def capture_continuous():
+    engine = CaptureEngine(INTERFACE, CSV_DIR, analyze_capture, segment_seconds=SEGMENT_SECONDS,
+                           segment_format=SEGMENT_FORMAT, max_queued=MAX_QUEUED_SEGMENTS,
+                           shed_flows=OVERLOAD_POLICY != "drop-oldest")
+    engine.run()
+
+# Streaming: predict on micro-batches of completed flows, no CSV round-trip
+def process_flow_batch(rows):
+    input_data, source_ips = records_to_matrix(rows, FEATURE_COLUMNS, default_ip=DEFAULT_SRC_IP)
+    process_and_predict(input_data=input_data, source_ips=source_ips)
+
+def capture_and_stream_traffic():
+    sink = AsyncCSVSink(CSV_DIR, rotate_seconds=120, fmt=SEGMENT_FORMAT) if STREAM_CSV else None
+    batcher = FlowBatcher(process_flow_batch, batch_size=STREAM_BATCH_SIZE,
+                          max_delay=STREAM_MAX_DELAY, sink=sink)
+    batcher.start()
+    while True:
+        try:
+            # The session still wants an output target; flows are redirected to the batcher
+            sniffer, session = create_sniffer(
+                input_file=None,
+                input_interface=INTERFACE,
+                output_mode="csv",
+                output=os.devnull,
+                fields=None,
+                verbose=False,
+            )
+            session.output_writer = batcher
+            print(f"[CAPTURE] Streaming flows from {INTERFACE} "
+                  f"(batch={STREAM_BATCH_SIZE}, max_delay={STREAM_MAX_DELAY}s, csv={'on' if sink else 'off'})")
+            sniffer.start()
+            sniffer.join()
+        except Exception as e:
+            print(f"[ERROR] Streaming capture failed: {e}")
+        time.sleep(1)
+
 # Main
 if __name__ == "__main__":
     os.makedirs(CSV_DIR, exist_ok=True)
-    thread = threading.Thread(target=capture_and_process_traffic, daemon=True)
+    blacklist.start()
+    if isinstance(model, ModelHolder) and MODEL_WATCH_INTERVAL > 0:
+        ModelWatcher(model, model.path, FEATURE_COLUMNS, interval=MODEL_WATCH_INTERVAL).start()
+    if STREAM_MODE:
+        target = capture_and_stream_traffic
+    elif CAPTURE_MODE == "timed":
+        target = capture_and_process_traffic
+    else:
+        target = capture_continuous
+    thread = threading.Thread(target=target, daemon=True)
     thread.start()
     while True:
         time.sleep(1)
\ No newline at end of file
@@ -0,0 +1,177 @@
+import os
+import csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    import pyarrow.parquet as pq
+except ImportError:  # optional: without pyarrow every segment is CSV
+    pa = None
+
+SEGMENT_EXTENSIONS = {"csv": ".csv", "arrow": ".arrow", "parquet": ".parquet"}
+# Columnar segments are written under this suffix and renamed when complete
+PARTIAL_SUFFIX = ".part"
+
+
+def resolve_format(fmt):
+    """Validate a segment format name, falling back to CSV if pyarrow is missing."""
+    fmt = (fmt or "csv").lower()
+    if fmt not in SEGMENT_EXTENSIONS:
+        print(f"[WARNING] Unknown segment format {fmt!r}; using csv")
+        return "csv"
+    if fmt != "csv" and pa is None:
+        print(f"[WARNING] pyarrow not available; writing csv segments instead of {fmt}")
+        return "csv"
+    return fmt
+
+
+def segment_format(path):
+    """Format of an existing segment file from its extension (csv if unknown)."""
+    ext = os.path.splitext(str(path))[1].lower()
+    for fmt, suffix in SEGMENT_EXTENSIONS.items():
+        if ext == suffix:
+            return fmt
+    return "csv"
+
+
+class CSVSegment:
+    """One CSV segment, header taken from the first flow."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+
+    def write(self, data):
+        if not self.rows:
+            self._writer.writerow(data.keys())
+        self._writer.writerow(data.values())
+        self.rows += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        return self.path
+
+
+class ArrowSegment:
+    """Columnar segment (Arrow IPC file or zstd Parquet) built from flow dicts.
+
+    Flows are buffered column-wise and written as a record batch / row group
+    every ``batch_rows`` flows. The schema comes from the first flow: strings
+    stay strings, every number is float64 (cicflowmeter emits 0 and 0.5 for the
+    same feature). Later flows are coerced to that schema: a value that does
+    not fit (e.g. text in a numeric column) is stored as null and counted in
+    ``coerced``, since an exception here would kill cicflowmeter's writer thread.
+    The file is written as ``<path>.part`` and renamed on close, so readers
+    only ever see complete, memory-mappable segments.
+    """
+
+    def __init__(self, path, fmt="arrow", batch_rows=4096):
+        self.path = path
+        self.fmt = fmt
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self.coerced = 0
+        self._columns = None
+        self._schema = None
+        self._writer = None
+        self._sink = None
+
+    def write(self, data):
+        if self._columns is None:
+            self._schema = pa.schema([
+                (name, pa.string() if isinstance(value, str) else pa.float64())
+                for name, value in data.items()
+            ])
+            self._columns = {name: [] for name in self._schema.names}
+        for name, values in self._columns.items():
+            values.append(data.get(name))
+        self.rows += 1
+        if len(next(iter(self._columns.values()))) >= self.batch_rows:
+            self.flush()
+
+    def _open(self):
+        partial = self.path + PARTIAL_SUFFIX
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(partial, self._schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(partial, "wb")
+            self._writer = pa.ipc.new_file(self._sink, self._schema)
+
+    def flush(self):
+        if not self._columns or not next(iter(self._columns.values())):
+            return
+        if self._writer is None:
+            self._open()
+        coerced = self.coerced
+        arrays = [
+            pa.array([self._text(v) for v in values], type=field.type)
+            if field.type == pa.string()
+            else pa.array([self._number(v) for v in values], type=field.type)
+            for field, values in zip(self._schema, self._columns.values())
+        ]
+        if self.coerced > coerced and not coerced:
+            print(f"[WARN] {self.path}: values that do not match the segment schema are stored as null")
+        batch = pa.record_batch(arrays, schema=self._schema)
+        if self.fmt == "parquet":
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+        for values in self._columns.values():
+            values.clear()
+
+    def _number(self, value):
+        if value is None or value == "":
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            self.coerced += 1
+            return None
+
+    @staticmethod
+    def _text(value):
+        if value is None or value != value:  # NaN
+            return None
+        return value if isinstance(value, str) else str(value)
+
+    def close(self):
+        self.flush()
+        if self._writer is None:
+            return self.path
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        os.replace(self.path + PARTIAL_SUFFIX, self.path)
+        return self.path
+
+
+def open_segment(base_path, fmt="csv"):
+    """Open a segment writer for ``base_path`` + the extension of ``fmt``."""
+    path = base_path + SEGMENT_EXTENSIONS[fmt]
+    if fmt == "csv":
+        return CSVSegment(path)
+    return ArrowSegment(path, fmt)
+
+
+def read_table(path, columns=None):
+    """Read (a projection of) a columnar segment as a ``pyarrow.Table``.
+
+    Arrow IPC files are memory-mapped, so only the requested columns are paged in.
+    """
+    if segment_format(path) == "parquet":
+        return pq.read_table(path, columns=columns)
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def schema_names(path):
+    if segment_format(path) == "parquet":
+        return pq.read_schema(path).names
+    with pa.memory_map(str(path), "r") as source:
+        return pa.ipc.open_file(source).schema.names
@@ -0,0 +1,146 @@
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+MAGIC = 0x54524E52494E4731  # "TRNRING1"
+HEADER_BYTES = 128
+IP_BYTES = 46  # longest textual IPv6 address
+
+# uint64 slots of the header; head and tail sit on separate cache lines
+_MAGIC, _CAPACITY, _FEATURES, _CLOSED, _DROPPED = 0, 1, 2, 3, 4
+_HEAD, _TAIL = 8, 9
+
+
+def record_dtype(n_features):
+    """One flow: the float32 feature vector (FEATURE_COLUMNS order) and its source IP."""
+    return np.dtype([("features", np.float32, (n_features,)), ("src_ip", f"S{IP_BYTES}")])
+
+
+class FlowRing:
+    """Single-producer/single-consumer ring of fixed-width flow records in shared memory.
+
+    The capture process ``push``es feature matrices, an inference process
+    attached by ``name`` ``pop``s them; records are copied into and out of the
+    segment as a numpy structured array, nothing is pickled. ``head`` (records
+    written) is only stored by the producer and ``tail`` (records read) only by
+    the consumer, each after the records it covers, so no lock is needed on
+    x86's ordered stores. ``push`` never blocks: records that do not fit are
+    dropped and counted, the capture side must keep up with the wire.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self.owner = owner
+        self._final_dropped = 0
+        self._ctl = np.ndarray((HEADER_BYTES // 8,), dtype=np.uint64, buffer=shm.buf)
+        if int(self._ctl[_MAGIC]) != MAGIC:
+            raise ValueError(f"shared memory {shm.name} is not a flow ring")
+        self.capacity = int(self._ctl[_CAPACITY])
+        self.n_features = int(self._ctl[_FEATURES])
+        self._records = np.ndarray((self.capacity,), dtype=record_dtype(self.n_features),
+                                   buffer=shm.buf, offset=HEADER_BYTES)
+
+    @classmethod
+    def create(cls, capacity, n_features, name=None):
+        size = HEADER_BYTES + capacity * record_dtype(n_features).itemsize
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        ctl = np.ndarray((HEADER_BYTES // 8,), dtype=np.uint64, buffer=shm.buf)
+        ctl[:] = 0
+        ctl[_CAPACITY] = capacity
+        ctl[_FEATURES] = n_features
+        ctl[_MAGIC] = MAGIC
+        del ctl
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            # Python < 3.13 tracks attached segments too and would unlink the ring when this process exits
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def closed(self):
+        return bool(self._ctl[_CLOSED])
+
+    @property
+    def dropped(self):
+        if self._ctl is None:
+            return self._final_dropped
+        return int(self._ctl[_DROPPED])
+
+    def __len__(self):
+        return int(self._ctl[_HEAD]) - int(self._ctl[_TAIL])
+
+    def free(self):
+        return self.capacity - len(self)
+
+    def _spans(self, start, n):
+        # Ring positions for records start..start+n, split where the buffer wraps
+        first = start % self.capacity
+        split = min(n, self.capacity - first)
+        return (first, first + split, 0, split), (0, n - split, split, n)
+
+    def push(self, X, src_ips):
+        """Copy up to ``free()`` rows of ``X`` (and their source IPs) in; returns rows written."""
+        head = int(self._ctl[_HEAD])
+        n = min(len(X), self.capacity - (head - int(self._ctl[_TAIL])))
+        if n < len(X):
+            self._ctl[_DROPPED] += len(X) - n
+        if n <= 0:
+            return 0
+        ips = np.asarray(src_ips[:n]).astype(f"S{IP_BYTES}")
+        for lo, hi, a, b in self._spans(head, n):
+            if hi > lo:
+                self._records["features"][lo:hi] = X[a:b]
+                self._records["src_ip"][lo:hi] = ips[a:b]
+        self._ctl[_HEAD] = head + n
+        return n
+
+    def pop(self, max_records):
+        """Copy out up to ``max_records`` records: ``(X, src_ips)``, empty if none are pending."""
+        tail = int(self._ctl[_TAIL])
+        n = min(max_records, int(self._ctl[_HEAD]) - tail)
+        X = np.empty((max(n, 0), self.n_features), dtype=np.float32)
+        ips = np.empty(max(n, 0), dtype=f"S{IP_BYTES}")
+        for lo, hi, a, b in self._spans(tail, max(n, 0)):
+            if hi > lo:
+                X[a:b] = self._records["features"][lo:hi]
+                ips[a:b] = self._records["src_ip"][lo:hi]
+        if n > 0:
+            self._ctl[_TAIL] = tail + n
+        return X, ips.astype(str).astype(object)
+
+    def wait(self, max_records, timeout=None, poll=0.001):
+        """``pop`` that polls until records arrive, the ring is closed or ``timeout`` passes."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not len(self):
+            if self.closed or (deadline is not None and time.monotonic() >= deadline):
+                break
+            time.sleep(poll)
+        return self.pop(max_records)
+
+    def close(self):
+        """Tell the consumer no more records will come (it drains what is left first)."""
+        self._ctl[_CLOSED] = 1
+
+    def release(self):
+        """Unmap the segment; the creating side also unlinks it."""
+        if self._ctl is None:
+            return
+        self._final_dropped = self.dropped
+        self._ctl = self._records = None
+        try:
+            self._shm.close()
+            if self.owner:
+                self._shm.unlink()
+        except (BufferError, FileNotFoundError):
+            pass
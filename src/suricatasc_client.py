@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import socket
+import threading
+
+DEFAULT_SOCKET = "/var/run/suricata-command.socket"
+DEFAULT_CONFIGS = [
+    "/etc/suricata/suricata.yaml",
+    os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "config", "suricata.yaml")),
+]
+
+
+def socket_path_from_config(config_path=None):
+    """Return the unix-command socket path configured in suricata.yaml.
+
+    Only the ``unix-command:`` block is scanned, so PyYAML is not needed.
+    Falls back to Suricata's default path if no config or no filename is found.
+    """
+    candidates = [config_path] if config_path else DEFAULT_CONFIGS
+    for path in candidates:
+        try:
+            with open(path) as f:
+                in_block = False
+                for line in f:
+                    stripped = line.split("#", 1)[0].rstrip()
+                    if not stripped:
+                        continue
+                    if not line[0].isspace():
+                        in_block = stripped.startswith("unix-command:")
+                        continue
+                    if in_block and stripped.strip().startswith("filename:"):
+                        value = stripped.split(":", 1)[1].strip().strip("'\"")
+                        if value:
+                            return value
+        except OSError:
+            continue
+    return DEFAULT_SOCKET
+
+
+class SuricataClient:
+    """Long-lived client for Suricata's unix command socket.
+
+    Keeps one connection open (version handshake done once), reconnects and
+    retries once if the connection drops, and records per-command latency.
+    ``pipeline()`` sends up to ``pipeline_depth`` commands before reading their
+    replies; the default of 1 is safe with every Suricata version, larger values
+    cut round-trips for bulk ``dataset-add``.
+    """
+
+    def __init__(self, socket_path=None, timeout=5.0, pipeline_depth=1):
+        self.socket_path = socket_path or socket_path_from_config()
+        self.timeout = timeout
+        self.pipeline_depth = max(1, pipeline_depth)
+        self._sock = None
+        self._buf = ""
+        self._decoder = json.JSONDecoder()
+        self._lock = threading.Lock()
+
+        self.connects = 0
+        self.latency = {}  # command -> {"count", "total", "max", "last"}
+
+    # Connection handling
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+            self._sock, self._buf = sock, ""
+            self._send({"version": "0.2"})
+            if self._recv().get("return") != "OK":
+                raise ConnectionError("Suricata refused the command protocol version")
+        except Exception:
+            self._close()
+            raise
+        self.connects += 1
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock, self._buf = None, ""
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _send(self, msg):
+        self._sock.sendall(json.dumps(msg).encode() + b"\n")
+
+    def _recv(self):
+        while True:
+            self._buf = self._buf.lstrip()
+            if self._buf:
+                try:
+                    reply, end = self._decoder.raw_decode(self._buf)
+                    self._buf = self._buf[end:]
+                    return reply
+                except ValueError:
+                    pass
+            data = self._sock.recv(65536)
+            if not data:
+                raise ConnectionError("Suricata closed the command socket")
+            self._buf += data.decode()
+
+    # Commands
+    def command(self, name, arguments=None):
+        return self.pipeline([(name, arguments)])[0]
+
+    def pipeline(self, commands):
+        """Run ``[(name, arguments), ...]`` in order; returns the replies in order."""
+        with self._lock:
+            try:
+                return self._run(commands)
+            except (OSError, ConnectionError) as e:
+                print(f"[SURICATASC] Command on {self.socket_path} failed ({e}); reconnecting")
+                self._close()
+                return self._run(commands)
+
+    def _run(self, commands):
+        if self._sock is None:
+            self._connect()
+        replies = []
+        for i in range(0, len(commands), self.pipeline_depth):
+            chunk = commands[i:i + self.pipeline_depth]
+            sent_at = time.perf_counter()
+            for name, arguments in chunk:
+                msg = {"command": name}
+                if arguments:
+                    msg["arguments"] = arguments
+                self._send(msg)
+            for name, _ in chunk:
+                replies.append(self._recv())
+                self._record(name, time.perf_counter() - sent_at)
+        return replies
+
+    def _record(self, name, seconds):
+        stats = self.latency.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        stats["last"] = seconds
+
+    def latency_report(self):
+        """Per-command latency summary in milliseconds."""
+        return {
+            name: {
+                "count": s["count"],
+                "avg_ms": round(s["total"] / s["count"] * 1000, 3),
+                "max_ms": round(s["max"] * 1000, 3),
+                "last_ms": round(s["last"] * 1000, 3),
+            }
+            for name, s in self.latency.items()
+        }
+
+    def reload_rules(self):
+        return self.command("reload-rules")
+
+    def dataset_add(self, value, setname="blacklist", settype="ip"):
+        return self.command("dataset-add", {"setname": setname, "settype": settype, "datavalue": value})
+
+    def dataset_add_many(self, values, setname="blacklist", settype="ip"):
+        return self.pipeline([
+            ("dataset-add", {"setname": setname, "settype": settype, "datavalue": value})
+            for value in values
+        ])
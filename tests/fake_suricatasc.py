@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import time
+import socket
+import threading
+
+
+class FakeSuricata:
+    """Minimal stand-in for Suricata's unix command socket.
+
+    Speaks the same JSON protocol as ``suricatasc`` (version handshake, then one
+    JSON object per command) and records every command it receives, so the
+    blacklist code can be exercised without a running Suricata. ``delay`` adds
+    artificial latency per command (e.g. to mimic a slow ``reload-rules``).
+    """
+
+    def __init__(self, path, delay=0.0, reload_delay=0.0):
+        self.path = path
+        self.delay = delay
+        self.reload_delay = reload_delay
+        self.commands = []
+        self.connections = 0
+        self._conns = set()
+        self._lock = threading.Lock()
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(16)
+        self._thread = threading.Thread(target=self._accept_loop, name="fake-suricata", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except Exception:
+                pass
+            self._sock = None
+        # Drop live clients too, so reconnect logic can be exercised
+        with self._lock:
+            conns, self._conns = list(self._conns), set()
+        for conn in conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+                conn.close()
+            except OSError:
+                pass
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def count(self, name):
+        with self._lock:
+            return sum(1 for c in self.commands if c.get("command") == name)
+
+    def _accept_loop(self):
+        while self._sock is not None:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+                self._conns.add(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        decoder = json.JSONDecoder()
+        buf = ""
+        with conn:
+            while True:
+                try:
+                    data = conn.recv(65536)
+                except OSError:
+                    return
+                if not data:
+                    return
+                buf += data.decode()
+                while True:
+                    buf = buf.lstrip()
+                    if not buf:
+                        break
+                    try:
+                        msg, end = decoder.raw_decode(buf)
+                    except ValueError:
+                        break  # incomplete object, wait for more bytes
+                    buf = buf[end:]
+                    try:
+                        conn.sendall((json.dumps(self._handle(msg)) + "\n").encode())
+                    except OSError:
+                        return
+
+    def _handle(self, msg):
+        if "version" in msg:
+            return {"return": "OK"}
+        with self._lock:
+            self.commands.append(msg)
+        command = msg.get("command")
+        if command == "reload-rules" and self.reload_delay:
+            time.sleep(self.reload_delay)
+        elif self.delay:
+            time.sleep(self.delay)
+        if command in ("reload-rules", "ruleset-reload-nonblocking"):
+            return {"return": "OK", "message": "done"}
+        if command == "dataset-add":
+            return {"return": "OK", "message": "data added"}
+        if command == "uptime":
+            return {"return": "OK", "message": 1}
+        return {"return": "NOK", "message": f"Unknown command '{command}'"}
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "/tmp/fake-suricata-command.socket"
+    server = FakeSuricata(path).start()
+    print(f"[FAKE] Listening on {path}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"[FAKE] {len(server.commands)} commands on {server.connections} connections")
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "webapi"))
+
+import alert_stats  # noqa: E402
+from alert_stats import AlertStats  # noqa: E402
+
+START = 1_000_000 * 60
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(START)
+    monkeypatch.setattr(alert_stats, "time", clock)
+    return clock
+
+
+def summary(ts, src_ip="10.0.0.1"):
+    return (ts, 2, 1000, "test", src_ip)
+
+
+def counts(stats, minutes):
+    return [point["count"] for point in stats.timeseries(minutes=minutes)]
+
+
+def test_minute_ring_expires_old_buckets(clock):
+    stats = AlertStats(window_minutes=5)
+    stats.add([summary(START), summary(START - 60), summary(START - 60)])
+    assert counts(stats, 5) == [0, 0, 0, 2, 1]
+    assert stats.snapshot()["recent_24h"] == 3
+
+    clock.now += 3 * 60
+    assert counts(stats, 5) == [2, 1, 0, 0, 0]
+
+    clock.now += 60
+    assert counts(stats, 5) == [1, 0, 0, 0, 0]
+    assert stats.snapshot()["recent_24h"] == 1
+    # Totals are not windowed
+    assert stats.snapshot()["total"] == 3
+
+    clock.now += 60 * 60
+    assert counts(stats, 5) == [0, 0, 0, 0, 0]
+    assert stats.snapshot()["recent_24h"] == 0
+
+
+def test_alerts_outside_window_and_skewed_clock(clock):
+    stats = AlertStats(window_minutes=5)
+    stats.add([summary(START - 10 * 60), summary(START + 30 * 60)])
+    # Too old for the ring, future events count as now
+    assert counts(stats, 5) == [0, 0, 0, 0, 1]
+    assert stats.snapshot()["total"] == 2
+
+
+def test_remove_ignores_recycled_slot(clock):
+    stats = AlertStats(window_minutes=5)
+    stats.add([summary(START), summary(START)])
+    clock.now += 5 * 60
+    stats.add([summary(clock.now)])
+    # The evicted alert's minute left the window; its slot now holds a newer minute
+    stats.remove([summary(START)])
+    assert counts(stats, 5) == [0, 0, 0, 0, 1]
+    snapshot = stats.snapshot()
+    assert snapshot["total"] == 2
+    assert snapshot["top_src_ips"] == [{"src_ip": "10.0.0.1", "count": 2}]
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "webapi"))
+
+from alert_store import AlertStore, alert_time, parse_iso_time  # noqa: E402
+from dedupe import alert_fingerprint  # noqa: E402
+
+EVE_TIMESTAMP = "2026-10-16T08:15:42.123456+0000"
+EPOCH = datetime(2026, 10, 16, 8, 15, 42, 123456, tzinfo=timezone.utc).timestamp()
+
+
+def test_alert_time_parses_suricata_offset():
+    stored_at = "2020-01-01T00:00:00"
+    assert alert_time({"timestamp": EVE_TIMESTAMP, "stored_at": stored_at}) == EPOCH
+
+
+def test_parse_iso_time_offset_forms():
+    assert parse_iso_time("2026-10-16T08:15:42.123456+00:00") == EPOCH
+    assert parse_iso_time("2026-10-16T10:15:42.123456+0200") == EPOCH
+    assert parse_iso_time("2026-10-16T08:15:42.123456Z") == EPOCH
+
+
+def test_alert_time_falls_back_to_stored_at():
+    obj = {"timestamp": "garbage", "stored_at": "2026-10-16T08:15:42.123456+0000"}
+    assert alert_time(obj) == EPOCH
+
+
+def make_alert(signature_id, timestamp=EVE_TIMESTAMP):
+    return {
+        "timestamp": timestamp,
+        "src_ip": "10.0.0.1",
+        "dest_ip": "10.0.0.2",
+        "proto": "TCP",
+        "alert": {"signature": "test", "signature_id": signature_id, "severity": 2},
+    }
+
+
+def md5_fingerprint(alert):
+    return hashlib.md5(json.dumps(alert, sort_keys=True).encode()).hexdigest()
+
+
+def test_migrate_json_recomputes_fingerprints(tmp_path):
+    legacy = tmp_path / "alerts_history.json"
+    history = [dict(make_alert(sid), _fingerprint=md5_fingerprint(make_alert(sid))) for sid in (1, 2)]
+    history.append({"no": "fingerprint"})
+    legacy.write_text(json.dumps(history))
+
+    store = AlertStore(tmp_path / "alerts.db", legacy_json=legacy)
+
+    assert store.count() == 3
+    assert not legacy.exists()
+    stored = store.recent(10)
+    assert [a["_fingerprint"] for a in stored] == [alert_fingerprint(a) for a in stored]
+    # The tailer fingerprints the same eve.json records with alert_fingerprint
+    again = [dict(make_alert(sid), _fingerprint=alert_fingerprint(make_alert(sid))) for sid in (1, 2)]
+    assert store.add_many(again) == []
+
+
+def test_upgrade_rekeys_md5_rows(tmp_path):
+    db = tmp_path / "alerts.db"
+    AlertStore(db)
+    conn = sqlite3.connect(db)
+    # An MD5-era database: old fingerprints, and a duplicate the old key let through
+    rows = [make_alert(1), make_alert(2), dict(make_alert(1), stored_at="2026-10-16T09:00:00")]
+    for alert in rows:
+        alert["_fingerprint"] = md5_fingerprint(alert)
+        conn.execute("INSERT INTO alerts (fingerprint, ts, body) VALUES (?, ?, ?)",
+                     (alert["_fingerprint"], EPOCH, json.dumps(alert)))
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    store = AlertStore(db)
+
+    assert store.count() == 2
+    stored = store.recent(10)
+    assert [a["alert"]["signature_id"] for a in stored] == [1, 2]
+    assert [a["_fingerprint"] for a in stored] == [alert_fingerprint(a) for a in stored]
+    again = [dict(make_alert(1), _fingerprint=alert_fingerprint(make_alert(1)))]
+    assert store.add_many(again) == []
+
+
+def test_time_bounded_query_pages_by_time(tmp_path):
+    store = AlertStore(tmp_path / "alerts.db")
+    # Inserted out of time order, with two alerts sharing a timestamp
+    seconds = [5, 1, 3, 3, 4, 2, 0]
+    alerts = [make_alert(sid, f"2026-10-16T08:15:{s:02d}+0000") for sid, s in enumerate(seconds)]
+    for alert in alerts:
+        alert["_fingerprint"] = alert_fingerprint(alert)
+    store.add_many(alerts)
+    since = parse_iso_time("2026-10-16T08:15:01+0000")
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.query(limit=2, cursor=cursor, since=since)
+        seen = page + seen
+        if cursor is None:
+            break
+
+    assert [a["alert"]["signature_id"] for a in seen] == [1, 5, 2, 3, 4, 0]
+
+
+def test_time_bounded_query_cursor_evicted(tmp_path):
+    store = AlertStore(tmp_path / "alerts.db")
+    alert = make_alert(1)
+    alert["_fingerprint"] = alert_fingerprint(alert)
+    row_id = store.add_many([alert])[0]["_id"]
+    store.clear()
+    assert store.query(cursor=row_id, since=0.0) == ([], None)
@@ -0,0 +1,132 @@
+import os
+import sys
+import builtins
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import blacklist  # noqa: E402
+from blacklist import BlacklistManager  # noqa: E402
+from suricatasc_client import SuricataClient  # noqa: E402
+from fake_suricatasc import FakeSuricata  # noqa: E402
+
+
+@pytest.fixture
+def server(tmp_path):
+    fake = FakeSuricata(str(tmp_path / "command.socket")).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def appends(monkeypatch):
+    """Paths opened for append by blacklist.py, one entry per open."""
+    opened = []
+
+    def counting_open(file, mode="r", *args, **kwargs):
+        if "a" in mode:
+            opened.append(str(file))
+        return builtins.open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(blacklist, "open", counting_open, raising=False)
+    return opened
+
+
+def lines(path):
+    with open(path) as f:
+        return f.read().split()
+
+
+def test_coalesced_flush_appends_once_and_adds_each_ip(tmp_path, server, appends):
+    path = str(tmp_path / "blacklist.txt")
+    manager = BlacklistManager(path, client=SuricataClient(server.path), mode="dataset")
+    assert manager.add_many(["10.0.0.1", "10.0.0.2"]) == ["10.0.0.1", "10.0.0.2"]
+    assert manager.add_many(["10.0.0.2", "10.0.0.3"]) == ["10.0.0.3"]
+    assert manager.queue_depth == 3
+    assert "10.0.0.1" not in manager  # queued, not applied yet
+
+    assert manager.flush() == 3
+    assert appends == [path]
+    assert lines(path) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert server.count("dataset-add") == 3
+    assert server.count("reload-rules") == 0
+    assert manager.queue_depth == 0
+    assert all(ip in manager for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3"))
+    assert manager.add_many(["10.0.0.1"]) == []
+    assert manager.flush() == 0
+    assert appends == [path]
+
+
+def test_reload_mode_sends_one_reload_per_flush(tmp_path, server, appends):
+    path = str(tmp_path / "blacklist.txt")
+    manager = BlacklistManager(path, client=SuricataClient(server.path), mode="reload")
+    manager.add_many([f"192.168.0.{i}" for i in range(50)])
+    assert manager.flush() == 50
+    assert appends == [path]
+    assert server.count("reload-rules") == 1
+    assert server.count("dataset-add") == 0
+    assert manager.reloads == 1
+
+
+def test_failed_append_requeues_batch(tmp_path, server):
+    path = str(tmp_path / "missing-dir" / "blacklist.txt")
+    manager = BlacklistManager(path, client=SuricataClient(server.path))
+    manager.add_many(["10.1.0.1", "10.1.0.2"])
+    assert manager.flush() == 0
+    assert server.count("dataset-add") == 0
+    assert "10.1.0.1" not in manager
+    # Still queued: not queued twice, and written once the file is writable
+    assert manager.add_many(["10.1.0.1"]) == []
+    assert manager.queue_depth == 2
+    os.makedirs(os.path.dirname(path))
+    assert manager.flush() == 2
+    assert lines(path) == ["10.1.0.1", "10.1.0.2"]
+    assert server.count("dataset-add") == 2
+    assert "10.1.0.1" in manager
+
+
+def test_unreachable_suricata_retries_without_appending_again(tmp_path, monkeypatch, appends):
+    path = str(tmp_path / "blacklist.txt")
+    socket_path = str(tmp_path / "command.socket")
+    fallback = []
+    monkeypatch.setattr(blacklist.pexpect, "run",
+                        lambda cmd, withexitstatus=False: fallback.append(cmd) or (b"no socket", 1))
+    manager = BlacklistManager(path, client=SuricataClient(socket_path, timeout=0.5))
+    manager.add_many(["10.2.0.1", "10.2.0.2"])
+
+    assert manager.flush() == 2
+    assert fallback == ["sudo suricatasc -c 'dataset-add blacklist ip 10.2.0.1'"]
+    assert "10.2.0.1" not in manager
+    assert manager.queue_depth == 2
+
+    server = FakeSuricata(socket_path).start()
+    try:
+        assert manager.flush() == 0
+        assert appends == [path]
+        assert lines(path) == ["10.2.0.1", "10.2.0.2"]
+        assert server.count("dataset-add") == 2
+        assert "10.2.0.1" in manager and "10.2.0.2" in manager
+        assert manager.queue_depth == 0
+    finally:
+        server.stop()
+
+
+def test_suricatasc_fallback_adds_each_ip_to_the_dataset(tmp_path, monkeypatch):
+    fallback = []
+    monkeypatch.setattr(blacklist.pexpect, "run",
+                        lambda cmd, withexitstatus=False: fallback.append(cmd) or (b"", 0))
+    manager = BlacklistManager(str(tmp_path / "blacklist.txt"),
+                               client=SuricataClient(str(tmp_path / "missing.socket"), timeout=0.5))
+    manager.add_many(["10.3.0.1", "10.3.0.2"])
+    assert manager.flush() == 2
+    assert fallback == [
+        "sudo suricatasc -c 'dataset-add blacklist ip 10.3.0.1'",
+        "sudo suricatasc -c 'dataset-add blacklist ip 10.3.0.2'",
+    ]
+    assert "10.3.0.1" in manager
+
+
+def test_invalid_ips_are_ignored(tmp_path, server):
+    manager = BlacklistManager(str(tmp_path / "blacklist.txt"), client=SuricataClient(server.path))
+    assert manager.add_many(["not-an-ip", "10.4.0.0/24", " 10.5.0.1 "]) == ["10.4.0.0/24", "10.5.0.1"]
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "webapi"))
+
+from eve_tailer import EveTailer, parse_alerts  # noqa: E402
+
+
+def alert_line(sid):
+    record = {"event_type": "alert", "src_ip": "10.0.0.1", "alert": {"signature_id": sid}}
+    return json.dumps(record).encode() + b"\n"
+
+
+def flow_line():
+    return b'{"event_type": "flow", "src_ip": "10.0.0.1"}\n'
+
+
+def test_parse_alerts_skips_other_and_malformed_records():
+    chunk = b"".join([
+        flow_line(),
+        alert_line(1),
+        b'{"event_type":"alert","alert":{"signature_id": 2\n',  # cut off
+        b'{"event_type":"dns","rrname":"alert"}\n',  # marker but no alert object
+        b"not json\n",
+        b'{"event_type":"alert","alert":{"signature_id":3}}',  # compact, no newline
+    ])
+    lines, alerts = parse_alerts(chunk)
+    assert lines == 6
+    assert [a["alert"]["signature_id"] for a in alerts] == [1, 3]
+
+
+def test_parse_alerts_empty_chunk():
+    assert parse_alerts(b"") == (0, [])
+
+
+def make_tailer(tmp_path, received):
+    path = tmp_path / "eve.json"
+    path.write_bytes(b"")
+    tailer = EveTailer(path, on_alerts=lambda alerts: received.extend(a["alert"]["signature_id"] for a in alerts),
+                       state_file=str(tmp_path / "eve.state"))
+    assert tailer._open(resume=True)
+    return tailer, path
+
+
+def drain(tailer):
+    # One pass of the background loop, without the thread
+    while tailer._read_available():
+        pass
+    tailer._check_rotation()
+
+
+def test_partial_line_waits_for_newline(tmp_path):
+    received = []
+    tailer, path = make_tailer(tmp_path, received)
+    line = alert_line(1)
+    with open(path, "ab") as f:
+        f.write(flow_line() + line[:10])
+    drain(tailer)
+    assert received == []
+    assert tailer.lines_total == 1
+
+    with open(path, "ab") as f:
+        f.write(line[10:])
+    drain(tailer)
+    assert received == [1]
+    assert tailer._position == path.stat().st_size
+    tailer.stop()
+
+
+def test_rotation_drains_old_file_then_follows_new(tmp_path):
+    received = []
+    tailer, path = make_tailer(tmp_path, received)
+    path.write_bytes(alert_line(1))
+    drain(tailer)
+
+    with open(path, "ab") as f:
+        f.write(alert_line(2))
+    os.rename(path, tmp_path / "eve.json.1")
+    path.write_bytes(alert_line(3))
+    drain(tailer)  # reads the rest of the old file, then reopens
+    drain(tailer)
+
+    assert received == [1, 2, 3]
+    assert tailer.rotations == 1
+    tailer.stop()
+
+
+def test_truncation_restarts_from_start(tmp_path):
+    received = []
+    tailer, path = make_tailer(tmp_path, received)
+    path.write_bytes(alert_line(1) + alert_line(2))
+    drain(tailer)
+
+    path.write_bytes(alert_line(3))
+    drain(tailer)
+    drain(tailer)
+
+    assert received == [1, 2, 3]
+    assert tailer.truncations == 1
+    tailer.stop()
+
+
+def test_restart_resumes_from_saved_position(tmp_path):
+    received = []
+    tailer, path = make_tailer(tmp_path, received)
+    path.write_bytes(alert_line(1))
+    drain(tailer)
+    tailer.stop()
+
+    with open(path, "ab") as f:
+        f.write(alert_line(2))
+    tailer = EveTailer(path, on_alerts=lambda alerts: received.extend(a["alert"]["signature_id"] for a in alerts),
+                       state_file=str(tmp_path / "eve.state"))
+    assert tailer._open(resume=True)
+    drain(tailer)
+    assert received == [1, 2]
+    tailer.stop()
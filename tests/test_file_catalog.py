@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "webapi"))
+
+from file_catalog import FileCatalog  # noqa: E402
+
+
+def make_catalog(tmp_path, events):
+    capture, saved = tmp_path / "capture", tmp_path / "saved"
+    capture.mkdir()
+    saved.mkdir()
+    catalog = FileCatalog(capture, saved, ["*.csv"], read_rows=None, on_change=events.append)
+    return catalog, capture
+
+
+def test_scan_reports_new_and_removed_segments(tmp_path):
+    events = []
+    catalog, capture = make_catalog(tmp_path, events)
+    segment = capture / "flows_1.csv"
+    segment.write_text("a,b\n1,2\n")
+
+    catalog.scan()
+    assert [f["name"] for f in events[-1]["files"]] == ["flows_1.csv"]
+
+    catalog.scan()
+    assert len(events) == 1
+
+    segment.unlink()
+    catalog.scan()
+    assert events[-1]["count"] == 0
+
+
+def test_scan_reports_growing_segment(tmp_path):
+    events = []
+    catalog, capture = make_catalog(tmp_path, events)
+    segment = capture / "flows_1.csv"
+    segment.write_text("a,b\n1,2\n")
+    catalog.scan()
+
+    with open(segment, "a") as f:
+        f.write("3,4\n")
+    catalog.scan()
+
+    assert len(events) == 2
+    assert events[-1]["files"][0]["size"] == segment.stat().st_size
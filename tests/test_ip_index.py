@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ip_index import IPIndex  # noqa: E402
+
+
+def test_contains_many_with_missing_and_repeated_sources():
+    index = IPIndex()
+    index.add("10.0.0.5")
+    index.add("192.168.1.0/24")
+    index.add("2001:db8::1")
+    ips = ["10.0.0.5", None, "192.168.1.77", "10.0.0.6", float("nan"),
+           "not-an-ip", "2001:db8::1", "10.0.0.5"]
+    found = index.contains_many(ips)
+    assert found.dtype == bool
+    assert found.tolist() == [True, False, True, False, False, False, True, True]
+
+
+def test_contains_many_sees_pending_and_merged_entries():
+    index = IPIndex()
+    index.add("172.16.0.1")
+    index.merge()
+    index.add("172.16.0.2")
+    found = index.contains_many(np.array(["172.16.0.1", "172.16.0.2", "172.16.0.3"]))
+    assert found.tolist() == [True, True, False]
+
+
+def test_contains_many_empty():
+    assert IPIndex().contains_many([]).shape == (0,)
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from load_shedding import FlowShedder, stratified_sample  # noqa: E402
+
+
+def per_stratum(codes, keep):
+    return np.bincount(codes[keep], minlength=codes.max() + 1).tolist()
+
+
+def test_small_strata_kept_whole():
+    # Stratum sizes 2, 3 and 95; a budget of 20 gives quota 15 to the flood
+    codes = np.repeat([0, 1, 2], [2, 3, 95])
+    keep = stratified_sample(codes, 20, np.random.default_rng(0))
+    assert keep.sum() == 20
+    assert per_stratum(codes, keep) == [2, 3, 15]
+
+
+def test_remainder_spread_over_open_strata():
+    codes = np.repeat([0, 1, 2], [10, 10, 10])
+    keep = stratified_sample(codes, 8, np.random.default_rng(0))
+    assert keep.sum() == 8
+    assert sorted(per_stratum(codes, keep)) == [2, 3, 3]
+
+
+@pytest.mark.parametrize("budget", [0, -1, 30, 31])
+def test_budget_edges(budget):
+    codes = np.repeat([0, 1], [20, 10])
+    keep = stratified_sample(codes, budget, np.random.default_rng(0))
+    assert keep.sum() == max(0, min(budget, 30))
+
+
+def test_sample_is_random_within_stratum():
+    codes = np.zeros(1000, dtype=np.int64)
+    first = stratified_sample(codes, 10, np.random.default_rng(1))
+    second = stratified_sample(codes, 10, np.random.default_rng(2))
+    assert first.sum() == second.sum() == 10
+    assert not np.array_equal(first, second)
+
+
+def test_priority_keeps_new_sources_first():
+    shedder = FlowShedder("priority", seed=0)
+    shedder.remember(["10.0.0.1"])
+    ips = ["10.0.0.1"] * 50 + ["10.0.0.2", "10.0.0.3", None]
+    keep = shedder.select(ips, 10)
+    assert keep.sum() == 10
+    assert keep[50:].all()
+
+
+def test_sample_policy_with_missing_sources():
+    shedder = FlowShedder("sample", seed=0)
+    ips = np.array(["10.0.0.1"] * 40 + [None] * 40, dtype=object)
+    keep = shedder.select(ips, 10)
+    assert keep[:40].sum() == keep[40:].sum() == 5
@@ -0,0 +1,74 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "webapi"))
+
+import row_index  # noqa: E402
+from row_index import RowIndex, index_path  # noqa: E402
+
+HEADER = "src_ip,dst_port\n"
+
+
+def rows_text(start, stop):
+    return "".join(f"10.0.0.{i},{i}\n" for i in range(start, stop))
+
+
+def test_rows_and_tail(tmp_path):
+    path = tmp_path / "flows.csv"
+    path.write_text(HEADER + rows_text(0, 5))
+    index = RowIndex(path)
+    assert index.rows(offset=1, limit=2) == (5, 1, [{"src_ip": "10.0.0.1", "dst_port": "1"},
+                                                    {"src_ip": "10.0.0.2", "dst_port": "2"}])
+    total, start, rows = index.rows(limit=2, tail=True, columns=["dst_port"])
+    assert (total, start, rows) == (5, 3, [{"dst_port": "3"}, {"dst_port": "4"}])
+
+
+def test_appended_rows_scan_only_new_bytes(tmp_path, monkeypatch):
+    path = tmp_path / "flows.csv"
+    path.write_text(HEADER + rows_text(0, 3))
+    index = RowIndex(path)
+    assert index.refresh() == 3
+
+    scans = []
+    scan = RowIndex._scan
+    monkeypatch.setattr(RowIndex, "_scan", staticmethod(lambda f, start, size: scans.append(start) or scan(f, start, size)))
+    size = path.stat().st_size
+    with open(path, "a") as f:
+        f.write(rows_text(3, 5) + "10.0.0.5,")  # last row still being written
+    assert index.refresh() == 5
+    assert scans == [size]
+    assert index.rows(limit=1, tail=True)[2] == [{"src_ip": "10.0.0.4", "dst_port": "4"}]
+
+    with open(path, "a") as f:
+        f.write("5\n")
+    assert index.refresh() == 6
+    # Header offset plus one end offset per row, appended to the sidecar
+    assert os.path.getsize(index_path(path)) == 16 + 8 * 7
+
+
+def test_sidecar_reused_by_new_index(tmp_path, monkeypatch):
+    path = tmp_path / "flows.csv"
+    path.write_text(HEADER + rows_text(0, 4))
+    RowIndex(path).refresh()
+
+    scans = []
+    scan = RowIndex._scan
+    monkeypatch.setattr(RowIndex, "_scan", staticmethod(lambda f, start, size: scans.append(start) or scan(f, start, size)))
+    index = RowIndex(path)
+    assert index.refresh() == 4
+    assert scans == [path.stat().st_size]
+
+
+def test_sidecar_of_replaced_file_is_rebuilt(tmp_path):
+    path = tmp_path / "flows.csv"
+    path.write_text(HEADER + rows_text(0, 4))
+    RowIndex(path).refresh()
+
+    replacement = tmp_path / "new.csv"
+    replacement.write_text(HEADER + rows_text(10, 12))
+    os.replace(replacement, path)
+    index = RowIndex(path)
+    assert index.refresh() == 2
+    assert index.rows()[2][0]["src_ip"] == "10.0.0.10"
+    with open(index_path(path), "rb") as f:
+        assert f.read(16) == row_index.MAGIC + path.stat().st_ino.to_bytes(8, "little")
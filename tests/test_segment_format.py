@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+pa = pytest.importorskip("pyarrow")
+
+from segment_format import open_segment, read_table  # noqa: E402
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_later_flows_are_coerced_to_the_first_flows_schema(tmp_path, fmt):
+    segment = open_segment(str(tmp_path / "segment"), fmt)
+    segment.write({"src_ip": "10.0.0.1", "flow_duration": 0, "psh_flag_cnt": 1})
+    segment.write({"src_ip": 3232235777, "flow_duration": 0.5, "psh_flag_cnt": "n/a"})
+    segment.write({"src_ip": None, "flow_duration": "", "psh_flag_cnt": "2"})
+    path = segment.close()
+
+    table = read_table(path)
+    assert table.column("src_ip").to_pylist() == ["10.0.0.1", "3232235777", None]
+    assert table.column("flow_duration").to_pylist() == [0.0, 0.5, None]
+    assert table.column("psh_flag_cnt").to_pylist() == [1.0, None, 2.0]
+    assert segment.coerced == 1
+    assert not os.path.exists(path + ".part")
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from shm_ring import FlowRing  # noqa: E402
+
+
+@pytest.fixture
+def ring():
+    ring = FlowRing.create(capacity=4, n_features=2)
+    yield ring
+    ring.release()
+
+
+def batch(start, n):
+    X = np.arange(start * 2, (start + n) * 2, dtype=np.float32).reshape(n, 2)
+    return X, [f"10.0.0.{i}" for i in range(start, start + n)]
+
+
+def test_wraparound_keeps_order(ring):
+    # Batches of 3 in a ring of 4 start at every offset and split at the end
+    for start in range(0, 12, 3):
+        X, ips = batch(start, 3)
+        assert ring.push(X, ips) == 3
+        out, out_ips = ring.pop(10)
+        np.testing.assert_array_equal(out, X)
+        assert out_ips.tolist() == ips
+    assert ring.dropped == 0
+    assert len(ring) == 0
+
+
+def test_full_ring_drops_and_counts(ring):
+    X, ips = batch(0, 3)
+    ring.push(X, ips)
+    X2, ips2 = batch(3, 3)
+    assert ring.push(X2, ips2) == 1
+    assert ring.dropped == 2
+    assert ring.free() == 0
+    assert ring.push(*batch(6, 1)) == 0
+    assert ring.dropped == 3
+
+    out, out_ips = ring.pop(2)
+    assert out_ips.tolist() == ["10.0.0.0", "10.0.0.1"]
+    out, out_ips = ring.pop(10)
+    np.testing.assert_array_equal(out, np.vstack([X[2:], X2[:1]]))
+    assert out_ips.tolist() == ["10.0.0.2", "10.0.0.3"]
+
+
+def test_wait_returns_after_close(ring):
+    ring.push(*batch(0, 1))
+    ring.close()
+    X, _ = ring.wait(10, timeout=1.0)
+    assert len(X) == 1
+    X, _ = ring.wait(10, timeout=1.0)
+    assert len(X) == 0 and ring.closed
+
+
+def test_release_keeps_drop_count(ring):
+    ring.push(*batch(0, 6))
+    ring.release()
+    assert ring.dropped == 2
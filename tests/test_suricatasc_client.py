@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from suricatasc_client import SuricataClient  # noqa: E402
+from fake_suricatasc import FakeSuricata  # noqa: E402
+
+
+@pytest.fixture
+def server(tmp_path):
+    fake = FakeSuricata(str(tmp_path / "command.socket")).start()
+    yield fake
+    fake.stop()
+
+
+def test_pipelined_replies_come_back_in_order(server):
+    client = SuricataClient(server.path, pipeline_depth=8)
+    values = [f"10.0.0.{i}" for i in range(20)]
+    replies = client.dataset_add_many(values)
+    assert [r["return"] for r in replies] == ["OK"] * 20
+    assert [c["arguments"]["datavalue"] for c in server.commands] == values
+    assert server.connections == 1
+    report = client.latency_report()
+    assert report["dataset-add"]["count"] == 20
+    assert report["dataset-add"]["max_ms"] >= report["dataset-add"]["avg_ms"] > 0
+    client.close()
+
+
+def test_reconnects_and_retries_after_dropped_connection(server):
+    client = SuricataClient(server.path)
+    assert client.reload_rules()["return"] == "OK"
+    server.stop()
+    server.start()
+    assert client.reload_rules()["return"] == "OK"
+    assert client.connects == 2
+    assert server.count("reload-rules") == 2
+    client.close()
+
+
+def test_error_reply_is_returned_not_raised(server):
+    client = SuricataClient(server.path)
+    reply = client.command("no-such-command")
+    assert reply["return"] == "NOK"
+    assert "no-such-command" in reply["message"]
+    # The connection stays usable after an error reply
+    assert client.command("uptime")["return"] == "OK"
+    assert client.connects == 1
+    client.close()
+
+
+def test_unreachable_socket_raises(tmp_path):
+    client = SuricataClient(str(tmp_path / "missing.socket"), timeout=0.5)
+    with pytest.raises(OSError):
+        client.reload_rules()
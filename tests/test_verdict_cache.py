@@ -0,0 +1,66 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from verdict_cache import VerdictCache  # noqa: E402
+
+
+class CountingModel:
+    """Labels a row 1 when its first feature is positive; records every batch it sees."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, X):
+        self.batches.append(np.array(X))
+        return (X[:, 0] > 0).astype(np.int64)
+
+
+def rows(*values):
+    return np.array([[v, 1.0] for v in values], dtype=np.float32)
+
+
+def test_hits_and_misses():
+    cache, model = VerdictCache(), CountingModel()
+
+    first = cache.predict(model, rows(1.0, -1.0, 1.0))
+    assert first.tolist() == [1, 0, 1]
+    # Duplicate rows in a batch reach the model once
+    assert len(model.batches[0]) == 2
+
+    second = cache.predict(model, rows(-1.0, 2.0, 1.0))
+    assert second.tolist() == [0, 1, 1]
+    assert model.batches[1].tolist() == rows(2.0).tolist()
+    assert cache.take_stats() == (6, 2, 3)
+
+    # Values within the quantization step share a key
+    assert cache.predict(model, rows(1.0001)).tolist() == [1]
+    assert len(model.batches) == 2
+
+
+def test_generation_change_clears_cache():
+    cache, model = VerdictCache(), CountingModel()
+    cache.predict(model, rows(1.0, 2.0), generation=0)
+    cache.predict(model, rows(1.0, 2.0), generation=0)
+    assert len(model.batches) == 1
+
+    cache.predict(model, rows(1.0), generation=1)
+    assert len(model.batches) == 2
+    assert len(cache) == 1
+
+
+def test_lru_eviction():
+    cache, model = VerdictCache(max_entries=2), CountingModel()
+    cache.predict(model, rows(1.0, 2.0))
+    # Touch 1.0 so 2.0 is the least recently used entry
+    cache.predict(model, rows(1.0))
+    cache.predict(model, rows(3.0))
+    assert len(cache) == 2
+
+    cache.predict(model, rows(1.0, 3.0))
+    assert len(model.batches) == 2
+    cache.predict(model, rows(2.0))
+    assert model.batches[-1].tolist() == rows(2.0).tolist()
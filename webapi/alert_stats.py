@@ -0,0 +1,121 @@
+import time
+import threading
+from collections import Counter
+
+
+class AlertStats:
+    """Running alert aggregates, updated as alerts are stored or evicted.
+
+    Keeps per-severity, per-signature and per-source-IP counters plus a ring of
+    per-minute buckets covering ``window_minutes``, so the stats and timeseries
+    endpoints never scan history. The source-IP counter is pruned to the
+    ``top_cap`` largest entries when it grows past twice that size, which keeps
+    memory bounded during scans from many addresses (small counts may then be
+    undercounted, the top entries are exact).
+    """
+
+    def __init__(self, window_minutes=1440, top_cap=10000):
+        self.window_minutes = window_minutes
+        self.top_cap = top_cap
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.total = 0
+            self.by_severity = Counter()
+            self.by_signature = Counter()
+            self.signature_names = {}
+            self.by_src_ip = Counter()
+            self._counts = [0] * self.window_minutes
+            self._minutes = [-1] * self.window_minutes  # minute number held by each slot
+            self._window_total = 0
+            self._head = int(time.time() // 60)
+
+    def _advance(self, now_minute):
+        # Expire slots that fell out of the window; at most window_minutes steps
+        if now_minute <= self._head:
+            return
+        for minute in range(max(self._head + 1, now_minute - self.window_minutes + 1), now_minute + 1):
+            slot = minute % self.window_minutes
+            self._window_total -= self._counts[slot]
+            self._counts[slot] = 0
+            self._minutes[slot] = minute
+        self._head = now_minute
+
+    def _bucket(self, ts, delta):
+        minute = int(ts // 60)
+        if minute > self._head:
+            minute = self._head  # clock skew: count future events as "now"
+        if minute <= self._head - self.window_minutes:
+            return
+        slot = minute % self.window_minutes
+        if self._minutes[slot] != minute:
+            if delta < 0:
+                return
+            self._window_total -= self._counts[slot]
+            self._counts[slot] = 0
+            self._minutes[slot] = minute
+        self._counts[slot] += delta
+        self._window_total += delta
+
+    def _apply(self, summaries, delta):
+        with self._lock:
+            self._advance(int(time.time() // 60))
+            for ts, severity, signature_id, signature, src_ip in summaries:
+                self.total += delta
+                self.by_severity[str(severity if severity is not None else "unknown")] += delta
+                if signature_id is not None:
+                    self.by_signature[signature_id] += delta
+                    if signature and delta > 0:
+                        self.signature_names[signature_id] = signature
+                if src_ip:
+                    self.by_src_ip[src_ip] += delta
+                self._bucket(ts, delta)
+            if delta < 0:
+                for counter in (self.by_severity, self.by_signature, self.by_src_ip):
+                    for key in [k for k, v in counter.items() if v <= 0]:
+                        del counter[key]
+            elif len(self.by_src_ip) > 2 * self.top_cap:
+                self.by_src_ip = Counter(dict(self.by_src_ip.most_common(self.top_cap)))
+
+    def add(self, summaries):
+        """Count stored alerts given as (ts, severity, signature_id, signature, src_ip)."""
+        self._apply(summaries, 1)
+
+    def remove(self, summaries):
+        """Un-count alerts evicted by retention."""
+        self._apply(summaries, -1)
+
+    def snapshot(self, top=10):
+        with self._lock:
+            self._advance(int(time.time() // 60))
+            return {
+                "total": self.total,
+                "by_severity": dict(self.by_severity),
+                "recent_24h": self._window_total,
+                "top_signatures": [
+                    {"signature_id": sid, "signature": self.signature_names.get(sid), "count": n}
+                    for sid, n in self.by_signature.most_common(top)
+                ],
+                "top_src_ips": [{"src_ip": ip, "count": n} for ip, n in self.by_src_ip.most_common(top)],
+            }
+
+    def timeseries(self, minutes=60, bucket_minutes=1):
+        """Counts for the last ``minutes`` minutes, oldest first, in ``bucket_minutes`` buckets."""
+        minutes = max(1, min(minutes, self.window_minutes))
+        bucket_minutes = max(1, bucket_minutes)
+        with self._lock:
+            self._advance(int(time.time() // 60))
+            head = self._head
+            first = head - minutes + 1
+            first -= first % bucket_minutes
+            series = []
+            for start in range(first, head + 1, bucket_minutes):
+                count = 0
+                for minute in range(start, min(start + bucket_minutes, head + 1)):
+                    slot = minute % self.window_minutes
+                    if self._minutes[slot] == minute:
+                        count += self._counts[slot]
+                series.append({"time": start * 60, "count": count})
+            return series
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+from dedupe import alert_fingerprint
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL,
+    ts REAL NOT NULL,
+    severity INTEGER,
+    signature_id INTEGER,
+    src_ip TEXT,
+    dest_ip TEXT,
+    body TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS alerts_fingerprint ON alerts (fingerprint);
+CREATE INDEX IF NOT EXISTS alerts_ts ON alerts (ts);
+CREATE INDEX IF NOT EXISTS alerts_severity ON alerts (severity, id);
+CREATE INDEX IF NOT EXISTS alerts_src_ip ON alerts (src_ip, id);
+CREATE INDEX IF NOT EXISTS alerts_dest_ip ON alerts (dest_ip, id);
+CREATE INDEX IF NOT EXISTS alerts_signature ON alerts (signature_id, id);
+"""
+
+# PRAGMA user_version once stored fingerprints are alert_fingerprint (blake2b), not MD5
+FINGERPRINT_VERSION = 1
+
+# query() filter name -> SQL condition on an indexed column
+FILTERS = {
+    "src_ip": "src_ip = ?",
+    "dest_ip": "dest_ip = ?",
+    "signature_id": "signature_id = ?",
+    "severity": "severity = ?",
+    "since": "ts >= ?",
+    "until": "ts < ?",
+}
+
+
+def parse_iso_time(value: str) -> float:
+    """Epoch seconds of an ISO-8601 string, including Suricata's ``+0000`` offsets.
+
+    ``datetime.fromisoformat`` before Python 3.11 only accepts ``+00:00``.
+    """
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    elif len(value) > 5 and value[-5] in "+-" and value[-4:].isdigit():
+        value = value[:-2] + ":" + value[-2:]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def alert_time(obj) -> float:
+    """Epoch seconds of an eve.json alert (event timestamp, else stored_at, else now)."""
+    for key in ("timestamp", "stored_at"):
+        value = obj.get(key)
+        if value:
+            try:
+                return parse_iso_time(value)
+            except (TypeError, ValueError):
+                continue
+    return time.time()
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+SUMMARY_COLUMNS = "ts, severity, signature_id, json_extract(body, '$.alert.signature'), src_ip"
+
+
+def alert_summary(obj):
+    """(ts, severity, signature_id, signature, src_ip) as kept in the indexed columns."""
+    alert = obj.get("alert")
+    if not isinstance(alert, dict):
+        alert = {}
+    return (
+        alert_time(obj),
+        _int_or_none(alert.get("severity")),
+        _int_or_none(alert.get("signature_id")),
+        alert.get("signature"),
+        obj.get("src_ip"),
+    )
+
+
+class AlertStore:
+    """Append-only alert history in SQLite (WAL mode).
+
+    Each alert is one row keyed by a unique fingerprint, so a write costs
+    O(new alerts) and duplicates are rejected by the index. Retention drops the
+    oldest rows beyond ``max_alerts`` and rows older than ``max_age_days``.
+    Reads use a per-thread connection and are not blocked by the writer.
+    ``on_evict(summaries)`` is called with the ``alert_summary`` tuples of rows
+    removed by retention, so running aggregates can be kept in sync.
+
+    Returned alerts carry their row id as ``_id``, which is also the
+    pagination cursor. ``generation`` changes whenever rows are removed and
+    ``last_id`` whenever rows are added, so together they version the store.
+    """
+
+    def __init__(self, db_path, max_alerts=None, max_age_days=None, legacy_json=None, on_evict=None):
+        self.db_path = str(db_path)
+        self.max_alerts = max_alerts
+        self.max_age_days = max_age_days
+        self.on_evict = on_evict
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._writes_since_retention = 0
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self._upgrade_fingerprints(conn)
+        self._count = conn.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+        self.last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()[0]
+        self.generation = 0
+        if legacy_json is not None:
+            self.migrate_json(legacy_json)
+
+    @staticmethod
+    def _upgrade_fingerprints(conn, batch=10000):
+        """Re-key rows written with the old MD5 fingerprints, once per database.
+
+        Rows whose new fingerprint collides with an earlier row are duplicates
+        the MD5 key let through and are deleted.
+        """
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= FINGERPRINT_VERSION:
+            return
+        with conn:
+            conn.execute("DROP INDEX IF EXISTS alerts_fingerprint")
+            seen = set()
+            last = 0
+            while True:
+                rows = conn.execute(
+                    "SELECT id, body FROM alerts WHERE id > ? ORDER BY id LIMIT ?", (last, batch)
+                ).fetchall()
+                if not rows:
+                    break
+                last = rows[-1][0]
+                updates, duplicates = [], []
+                for row_id, body in rows:
+                    obj = json.loads(body)
+                    fingerprint = alert_fingerprint(obj)
+                    if fingerprint in seen:
+                        duplicates.append((row_id,))
+                        continue
+                    seen.add(fingerprint)
+                    obj["_fingerprint"] = fingerprint
+                    updates.append((fingerprint, json.dumps(obj), row_id))
+                conn.executemany("UPDATE alerts SET fingerprint = ?, body = ? WHERE id = ?", updates)
+                conn.executemany("DELETE FROM alerts WHERE id = ?", duplicates)
+            conn.execute("CREATE UNIQUE INDEX alerts_fingerprint ON alerts (fingerprint)")
+            conn.execute(f"PRAGMA user_version = {FINGERPRINT_VERSION}")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_many(self, alerts) -> list:
+        """Insert alerts (each with ``_fingerprint``); returns the ones that were new."""
+        added = []
+        with self._write_lock:
+            conn = self._conn()
+            # Retention runs before inserting, so evicted rows were already returned to the caller earlier
+            if self._writes_since_retention >= 1000:
+                self._apply_retention(conn)
+            with conn:
+                for obj in alerts:
+                    ts, severity, signature_id, _, src_ip = alert_summary(obj)
+                    cur = conn.execute(
+                        "INSERT OR IGNORE INTO alerts (fingerprint, ts, severity, signature_id, src_ip, dest_ip, body) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (obj["_fingerprint"], ts, severity, signature_id, src_ip, obj.get("dest_ip"), json.dumps(obj)),
+                    )
+                    if cur.rowcount:
+                        obj["_id"] = cur.lastrowid
+                        added.append(obj)
+            if added:
+                self.last_id = added[-1]["_id"]
+            self._count += len(added)
+            self._writes_since_retention += len(added)
+        return added
+
+    def _apply_retention(self, conn):
+        self._writes_since_retention = 0
+        conditions = []
+        if self.max_alerts:
+            row = conn.execute("SELECT id FROM alerts ORDER BY id DESC LIMIT 1 OFFSET ?",
+                               (self.max_alerts,)).fetchone()
+            if row is not None:
+                conditions.append(("id <= ?", row[0]))
+        if self.max_age_days:
+            conditions.append(("ts < ?", time.time() - self.max_age_days * 86400))
+        if not conditions:
+            return
+        where = " OR ".join(c for c, _ in conditions)
+        params = [p for _, p in conditions]
+        with conn:
+            evicted = None
+            if self.on_evict is not None:
+                evicted = conn.execute(f"SELECT {SUMMARY_COLUMNS} FROM alerts WHERE {where}", params).fetchall()
+            cur = conn.execute(f"DELETE FROM alerts WHERE {where}", params)
+            self._count -= cur.rowcount
+            if cur.rowcount:
+                self.generation += 1
+        if evicted:
+            self.on_evict(evicted)
+
+    def enforce_retention(self):
+        with self._write_lock:
+            self._apply_retention(self._conn())
+
+    @staticmethod
+    def _decode(rows):
+        alerts = []
+        for row_id, body in rows:
+            obj = json.loads(body)
+            obj["_id"] = row_id
+            alerts.append(obj)
+        return alerts
+
+    def recent(self, limit: int) -> list:
+        """The newest ``limit`` alerts, oldest first (same order as the old JSON history)."""
+        rows = self._conn().execute(
+            "SELECT id, body FROM alerts ORDER BY id DESC LIMIT ?", (max(0, limit),)
+        ).fetchall()
+        return self._decode(reversed(rows))
+
+    def query(self, limit=200, cursor=None, **filters):
+        """One page of alerts older than ``cursor`` (an ``_id``) matching ``filters``.
+
+        Filters are the keys of ``FILTERS``; None values are ignored. Returns
+        ``(alerts oldest first, next_cursor or None)``. Without a time bound the
+        page is a ``LIMIT`` walk down ``id``; with ``since``/``until`` it walks
+        down ``(ts, id)`` on the ``alerts_ts`` index (SQLite keeps the row id in
+        every index), continuing below the cursor row's ``ts``. Either way the
+        cost depends on the page, not on the history size, except that a time
+        bound combined with an IP or signature filter may sort the matching
+        rows of that filter.
+        """
+        conditions, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            conditions.append(FILTERS[name])
+            params.append(value)
+        by_time = filters.get("since") is not None or filters.get("until") is not None
+        conn = self._conn()
+        if cursor is not None and by_time:
+            row = conn.execute("SELECT ts FROM alerts WHERE id = ?", (cursor,)).fetchone()
+            if row is None:
+                # Removed by retention, and so is everything older
+                return [], None
+            conditions.append("ts <= ? AND (ts < ? OR id < ?)")
+            params.extend((row[0], row[0], cursor))
+        elif cursor is not None:
+            conditions.append("id < ?")
+            params.append(cursor)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "ts DESC, id DESC" if by_time else "id DESC"
+        rows = conn.execute(
+            f"SELECT id, body FROM alerts {where} ORDER BY {order} LIMIT ?", (*params, limit + 1)
+        ).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return self._decode(reversed(rows[:limit])), next_cursor
+
+    def summaries(self, batch=10000):
+        """Yield ``alert_summary`` tuples for every stored alert (used to seed AlertStats)."""
+        cur = self._conn().execute(f"SELECT {SUMMARY_COLUMNS} FROM alerts ORDER BY id")
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            yield from rows
+
+    def count(self) -> int:
+        return self._count
+
+    def clear(self):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM alerts")
+            self._count = 0
+            self.generation += 1
+
+    def migrate_json(self, path):
+        """Import the old alerts_history.json once, then rename it to ``*.migrated``.
+
+        The file's ``_fingerprint``s are the old MD5 ones, so every alert is
+        fingerprinted again; otherwise the tailer would re-insert them.
+        """
+        path = str(path)
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path) as f:
+                history = json.load(f)
+        except Exception as e:
+            print(f"[ERROR] Could not migrate {path}: {e}")
+            return 0
+        alerts = [a for a in history if isinstance(a, dict)]
+        for alert in alerts:
+            alert["_fingerprint"] = alert_fingerprint(alert)
+        added = self.add_many(alerts)
+        os.replace(path, path + ".migrated")
+        print(f"[ALERTS] Migrated {len(added)} alerts from {path}")
+        return len(added)
@@ -0,0 +1,88 @@
+import json
+import time
+import hashlib
+from collections import deque
+
+# Alert fields that identify one Suricata alert (same set the old MD5 fingerprint used)
+FINGERPRINT_FIELDS = ("timestamp", "src_ip", "dest_ip", "proto")
+ALERT_FIELDS = ("signature", "signature_id", "severity")
+# Keys added by the web API itself, left out when hashing a whole record
+LOCAL_KEYS = ("_fingerprint", "_id", "stored_at")
+
+
+def fingerprint_digest(obj) -> bytes:
+    """16-byte blake2b digest of an alert's identifying fields.
+
+    The fields are joined in a fixed order, so no dict or JSON is built per
+    alert. A record without a timestamp or a proper ``alert`` object is
+    hashed over its whole canonical JSON instead: identical copies still
+    collide, different malformed records do not.
+    """
+    alert = obj.get("alert") if isinstance(obj, dict) else None
+    if isinstance(alert, dict) and obj.get("timestamp"):
+        values = [obj.get(k) for k in FINGERPRINT_FIELDS] + [alert.get(k) for k in ALERT_FIELDS]
+        data = "\x1f".join("" if v is None else str(v) for v in values).encode("utf-8", "surrogatepass")
+    else:
+        if isinstance(obj, dict):
+            obj = {k: v for k, v in obj.items() if k not in LOCAL_KEYS}
+        data = b"raw\x1f" + json.dumps(obj, sort_keys=True, default=str).encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def alert_fingerprint(obj) -> str:
+    return fingerprint_digest(obj).hex()
+
+
+class AlertDeduper:
+    """Drops alerts already seen in the last ``window_seconds``.
+
+    Keeps at most ``max_entries`` digests (about 100 bytes each, so the
+    default is ~10 MB); during an alert storm the oldest batches are
+    forgotten first.
+    Anything that slips past the window is still rejected by the store's
+    unique fingerprint index, this only keeps repeats away from SQLite.
+    """
+
+    def __init__(self, window_seconds=3600.0, max_entries=100000):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._seen = set()
+        self._order = deque()  # (monotonic time, [digests]) per filter() call, oldest first
+        self.duplicates = 0
+
+    def _expire(self, now):
+        cutoff = now - self.window_seconds
+        order, seen = self._order, self._seen
+        while order and (order[0][0] < cutoff or len(seen) > self.max_entries):
+            for digest in order.popleft()[1]:
+                seen.discard(digest)
+
+    def filter(self, alerts) -> list:
+        """Set ``_fingerprint`` on each alert and return those not seen recently."""
+        now = time.monotonic()
+        fresh, digests = [], []
+        for obj in alerts:
+            digest = fingerprint_digest(obj)
+            obj["_fingerprint"] = digest.hex()
+            if digest in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen.add(digest)
+            digests.append(digest)
+            fresh.append(obj)
+        if digests:
+            self._order.append((now, digests))
+        self._expire(now)
+        return fresh
+
+    def forget(self, alerts):
+        """Un-see alerts that were returned by filter() but could not be stored."""
+        for obj in alerts:
+            self._seen.discard(bytes.fromhex(obj["_fingerprint"]))
+
+    def clear(self):
+        self._seen.clear()
+        self._order.clear()
+
+    def __len__(self):
+        return len(self._seen)
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+try:
+    import orjson
+    loads = orjson.loads  # several times faster than json.loads on eve records
+except ImportError:
+    loads = json.loads
+
+# Every alert record contains this (as the "alert" key and the event_type value),
+# with or without spaces after the colons; flow/dns/http/stats lines almost never do
+ALERT_MARKER = b'"alert"'
+
+
+def parse_alerts(chunk, loads=loads):
+    """Decode the alert records in ``chunk`` (complete lines) and count its lines.
+
+    Only lines containing ``ALERT_MARKER`` are decoded; they are located with
+    bytes.find, so the other lines are never split out in Python.
+    """
+    alerts = []
+    end = 0
+    pos = chunk.find(ALERT_MARKER)
+    while pos != -1:
+        start = chunk.rfind(b"\n", 0, pos) + 1
+        end = chunk.find(b"\n", pos)
+        if end == -1:
+            end = len(chunk)
+        try:
+            obj = loads(chunk[start:end])
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict) and obj.get("alert"):
+            alerts.append(obj)
+        pos = chunk.find(ALERT_MARKER, end)
+    lines = chunk.count(b"\n") + (not chunk.endswith(b"\n") and bool(chunk))
+    return lines, alerts
+
+
+class EveTailer:
+    """Follows Suricata's eve.json from a background thread and publishes alerts.
+
+    Reads new bytes in large chunks, keeps a partial trailing line until its
+    newline arrives, and calls ``on_alerts(list_of_dicts)`` for every chunk that
+    contained alerts. Log rotation (inode change) is handled by draining the old
+    file before reopening the new one from the start; truncation (size below
+    the read position) restarts at offset 0. The read position and inode are
+    saved to ``state_file`` so a restart does not re-ingest old lines.
+    """
+
+    def __init__(self, path, on_alerts, state_file=None, poll_interval=0.5, read_size=1 << 20):
+        self.path = str(path)
+        self.on_alerts = on_alerts
+        self.state_file = state_file
+        self.poll_interval = poll_interval
+        self.read_size = read_size
+
+        self._file = None
+        self._inode = None
+        self._position = 0
+        self._buf = b""
+        self._stop = threading.Event()
+        self._reset = threading.Event()
+        self._thread = None
+
+        self.lines_total = 0
+        self.alerts_total = 0
+        self.bytes_total = 0
+        self.rotations = 0
+        self.truncations = 0
+        self.errors = 0
+        self._window = deque()  # (monotonic time, lines) for lines/sec over the last 10 s
+
+    # State persistence (same file/format as the old per-request reader, plus the inode)
+    def _load_state(self):
+        try:
+            with open(self.state_file) as f:
+                data = json.load(f)
+            return data.get("position", 0), data.get("inode")
+        except Exception:
+            return 0, None
+
+    def _save_state(self):
+        if not self.state_file:
+            return
+        try:
+            tmp = f"{self.state_file}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"position": self._position, "inode": self._inode}, f)
+            os.replace(tmp, self.state_file)
+        except Exception:
+            pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="eve-tailer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._close()
+
+    def reset(self):
+        """Re-read eve.json from the beginning (used when history is cleared)."""
+        self._reset.set()
+
+    def _close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file, self._buf = None, b""
+
+    def _open(self, resume):
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return False
+        st = os.fstat(f.fileno())
+        position = 0
+        if resume and self.state_file:
+            saved_pos, saved_inode = self._load_state()
+            # Old state files have no inode; trust them if the file is long enough
+            if (saved_inode is None or saved_inode == st.st_ino) and saved_pos <= st.st_size:
+                position = saved_pos
+        f.seek(position)
+        self._file, self._inode, self._position, self._buf = f, st.st_ino, position, b""
+        return True
+
+    def _run(self):
+        resume = True
+        while not self._stop.is_set():
+            try:
+                if self._reset.is_set():
+                    self._reset.clear()
+                    self._close()
+                    resume = False
+                if self._file is None:
+                    if not self._open(resume):
+                        self._stop.wait(self.poll_interval)
+                        continue
+                    resume = False
+                if self._read_available():
+                    continue  # more may be waiting; poll only when caught up
+                self._check_rotation()
+            except Exception as e:
+                self.errors += 1
+                print(f"[ERROR] eve.json tailer: {e}")
+                self._close()
+                resume = True  # pick up again from the last saved position
+            self._stop.wait(self.poll_interval)
+
+    def _read_available(self):
+        data = self._file.read(self.read_size)
+        if not data:
+            return False
+        self.bytes_total += len(data)
+        data = self._buf + data
+        end = data.rfind(b"\n") + 1
+        self._buf = data[end:]
+        if end:
+            self._process(data[:end])
+            self._position += end
+            self._save_state()
+        return True
+
+    def _check_rotation(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return  # rotated away, new file not created yet
+        if st.st_ino != self._inode:
+            # Old file fully drained above; follow the new one from the start
+            self.rotations += 1
+            self._close()
+            self._open(resume=False)
+        elif st.st_size < self._position:
+            self.truncations += 1
+            self._file.seek(0)
+            self._position, self._buf = 0, b""
+
+    def _process(self, chunk):
+        lines, alerts = parse_alerts(chunk)
+        self._count(lines)
+        if alerts:
+            self.alerts_total += len(alerts)
+            self.on_alerts(alerts)
+
+    def _count(self, lines):
+        now = time.monotonic()
+        self.lines_total += lines
+        self._window.append((now, lines))
+        while self._window and now - self._window[0][0] > 10.0:
+            self._window.popleft()
+
+    def lines_per_sec(self):
+        now = time.monotonic()
+        recent = [n for t, n in list(self._window) if now - t <= 10.0]
+        return sum(recent) / 10.0
+
+    def lag_bytes(self):
+        """Bytes written to eve.json that have not been ingested yet."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return 0
+        if st.st_ino != self._inode:
+            return st.st_size  # rotated (or not opened yet): all of the new file is pending
+        return max(0, st.st_size - self._position)
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "position": self._position,
+            "lag_bytes": self.lag_bytes(),
+            "lines_total": self.lines_total,
+            "alerts_total": self.alerts_total,
+            "bytes_total": self.bytes_total,
+            "lines_per_sec": round(self.lines_per_sec(), 1),
+            "rotations": self.rotations,
+            "truncations": self.truncations,
+            "errors": self.errors,
+        }
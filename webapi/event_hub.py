@@ -0,0 +1,97 @@
+import json
+import asyncio
+import threading
+from collections import deque
+from itertools import islice
+
+
+class EventHub:
+    """Fan-out of server events to Server-Sent Events clients.
+
+    ``publish()`` may be called from any thread (the eve.json tailer, the file
+    watcher). Each event gets an increasing id and is serialized once, then kept
+    in a bounded replay buffer; a client that reconnects with ``Last-Event-ID``
+    (or ``?cursor=``) gets everything after that id. If the id has already left
+    the buffer the client receives a ``reset`` event and should refetch.
+    """
+
+    def __init__(self, buffer_size=10000, keepalive=15.0):
+        self.keepalive = keepalive
+        self._events = deque(maxlen=buffer_size)  # (id, encoded SSE frame)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._loop = None
+        self._wakeup = None
+        self.clients = 0
+        self.published = 0
+
+    def attach(self, loop):
+        """Bind to the server's event loop (call from FastAPI startup)."""
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+
+    @property
+    def last_id(self):
+        return self._next_id - 1
+
+    def publish(self, event, data):
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            frame = f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+            self._events.append((event_id, frame))
+            self.published += 1
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._notify)
+        return event_id
+
+    def _notify(self):
+        # Wake every waiting client, then arm a fresh event for the next publish
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    def _after(self, cursor):
+        with self._lock:
+            if cursor >= self._next_id:
+                return [], True  # cursor from before a server restart
+            if not self._events:
+                return [], False
+            oldest = self._events[0][0]
+            if cursor < oldest - 1:
+                return [], True
+            if cursor >= self._events[-1][0]:
+                return [], False
+            # ids are contiguous, so the start index is a subtraction
+            start = cursor - oldest + 1
+            return list(islice(self._events, start, None)), False
+
+    async def stream(self, cursor=None, is_disconnected=None):
+        """Async generator of SSE frames for one client, starting after ``cursor``.
+
+        Without a cursor only events published from now on are sent.
+        """
+        if cursor is None:
+            cursor = self.last_id
+        self.clients += 1
+        try:
+            yield f"retry: 3000\nevent: hello\ndata: {json.dumps({'cursor': cursor})}\n\n".encode()
+            while True:
+                wakeup = self._wakeup
+                events, reset = self._after(cursor)
+                if reset:
+                    # Missed events are gone; the client refetches and we continue from now
+                    cursor = self.last_id
+                    yield f"event: reset\ndata: {json.dumps({'cursor': cursor})}\n\n".encode()
+                    continue
+                if events:
+                    cursor = events[-1][0]
+                    yield b"".join(frame for _, frame in events)
+                    continue
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            self.clients -= 1
@@ -0,0 +1,213 @@
+import os
+import time
+import fnmatch
+import threading
+from pathlib import Path
+
+from row_index import INDEX_SUFFIX
+
+# Written by snids (src/load_shedding.py) while a segment waits for analysis
+PENDING_SUFFIX = ".pending"
+
+
+class FileCatalog:
+    """In-memory listing of capture segments, kept current by a background scan.
+
+    Every ``interval`` seconds the capture and saved directories are listed
+    once with ``os.scandir``. Segments in the capture directory older than
+    ``max_age_minutes`` are deleted during the scan (with their row-index
+    sidecars), so requests never glob or stat; a segment with a ``.pending``
+    marker is still queued for analysis and is kept until the marker is gone
+    or older than ``pending_max_age_minutes``. ``describe(path)`` adds
+    per-file metadata (row count, first/last flow time) and is only called
+    again when a file's size or mtime changes. ``on_change(payload)`` is
+    called when a file appears, disappears, or changes size or mtime, so a
+    segment that is still being written is reported as it grows.
+
+    ``latest_rows`` caches its result for the newest non-empty segment and
+    recomputes it only when that segment changes or a newer one appears.
+    """
+
+    def __init__(self, csv_dir, saved_dir, patterns, read_rows, describe=None, max_age_minutes=10,
+                 interval=2.0, on_change=None, on_delete=None, pending_max_age_minutes=60):
+        self.csv_dir = Path(csv_dir)
+        self.saved_dir = Path(saved_dir)
+        self.patterns = patterns
+        self.read_rows = read_rows
+        self.describe = describe
+        self.max_age_minutes = max_age_minutes
+        self.pending_max_age_minutes = pending_max_age_minutes
+        self.interval = interval
+        self.on_change = on_change
+        self.on_delete = on_delete
+
+        self._files = {}  # (name, saved) -> info dict
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._latest_key = None
+        self._latest = {}  # (limit, columns) -> (name, rows), for _latest_key only
+        self._stop = threading.Event()
+        self._thread = None
+        self.scans = 0
+        self.deleted = 0
+
+    def start(self):
+        self.scan()
+        self._thread = threading.Thread(target=self._run, name="file-catalog", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"[ERROR] File catalog scan: {e}")
+
+    def _is_segment(self, name):
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    def _delete(self, path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return False
+        if self.on_delete is not None:
+            self.on_delete(path)
+        return True
+
+    def scan(self, max_age_minutes=None):
+        """Rescan both directories; returns the number of expired segments deleted."""
+        if max_age_minutes is None:
+            max_age_minutes = self.max_age_minutes
+        with self._scan_lock:
+            now = time.time()
+            cutoff = now - max_age_minutes * 60
+            pending_cutoff = now - self.pending_max_age_minutes * 60
+            deleted = 0
+            files = {}
+            for directory, saved in ((self.csv_dir, False), (self.saved_dir, True)):
+                try:
+                    entries = list(os.scandir(directory))
+                except FileNotFoundError:
+                    continue
+                names = {e.name for e in entries}
+                pending = {e.name[:-len(PENDING_SUFFIX)]: e for e in entries if e.name.endswith(PENDING_SUFFIX)}
+                for entry in entries:
+                    if entry.name.endswith((INDEX_SUFFIX, PENDING_SUFFIX)):
+                        # Sidecar whose segment is gone
+                        if entry.name.rsplit(".", 1)[0] not in names:
+                            try:
+                                os.unlink(entry.path)
+                            except FileNotFoundError:
+                                pass
+                        continue
+                    if not self._is_segment(entry.name):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    if not saved and st.st_mtime < cutoff and not self._pending(pending.get(entry.name), pending_cutoff):
+                        deleted += self._delete(entry.path)
+                        continue
+                    files[(entry.name, saved)] = self._info(entry, st, saved)
+            with self._lock:
+                # _info returns the old entry when size and mtime are unchanged
+                changed = files.keys() != self._files.keys() or any(
+                    info is not self._files[key] for key, info in files.items())
+                self._files = files
+            self.scans += 1
+            self.deleted += deleted
+        if changed and self.on_change is not None:
+            self.on_change(self.payload())
+        return deleted
+
+    def _pending(self, marker, cutoff):
+        # A marker older than the cutoff was left behind by a snids that is gone
+        if marker is None:
+            return False
+        try:
+            return marker.stat().st_mtime >= cutoff
+        except FileNotFoundError:
+            return False
+
+    def _info(self, entry, st, saved):
+        old = self._files.get((entry.name, saved))
+        if old is not None and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            return old
+        info = {
+            "name": entry.name,
+            "path": Path(entry.path),
+            "saved": saved,
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "mtime_ns": st.st_mtime_ns,
+            "rows": None,
+            "first_time": None,
+            "last_time": None,
+        }
+        if self.describe is not None and st.st_size:
+            try:
+                info.update(self.describe(info["path"]))
+            except Exception as e:
+                print(f"[ERROR] Could not describe {entry.name}: {e}")
+        return info
+
+    def files(self, include_saved=True):
+        """Catalog entries, newest first."""
+        with self._lock:
+            files = [f for f in self._files.values() if include_saved or not f["saved"]]
+        files.sort(key=lambda f: f["mtime"], reverse=True)
+        return files
+
+    def get(self, name):
+        """The entry for ``name`` (capture directory first, then saved), or None."""
+        with self._lock:
+            return self._files.get((name, False)) or self._files.get((name, True))
+
+    def payload(self):
+        now = time.time()
+        files = self.files()
+        return {
+            "count": len(files),
+            "files": [{
+                "name": f["name"],
+                "saved": f["saved"],
+                "age_minutes": round((now - f["mtime"]) / 60, 1),
+                "size": f["size"],
+                "rows": f["rows"],
+                "first_time": f["first_time"],
+                "last_time": f["last_time"],
+            } for f in files],
+        }
+
+    def latest_rows(self, limit=200, columns=None):
+        """``(name, rows)``: the newest ``limit`` rows of the newest non-empty capture segment."""
+        for f in self.files(include_saved=False):
+            if not f["size"]:
+                continue
+            key = (f["name"], f["size"], f["mtime_ns"])
+            request = (limit, tuple(columns) if columns else None)
+            with self._lock:
+                if key != self._latest_key:
+                    self._latest_key, self._latest = key, {}
+                cached = self._latest.get(request)
+            if cached is not None:
+                return cached
+            try:
+                _, _, rows = self.read_rows(f["path"], limit=limit, tail=True, columns=columns)
+            except Exception:
+                # Try the next older file if this one is mid-write or malformed
+                continue
+            if rows:
+                with self._lock:
+                    if key == self._latest_key:
+                        self._latest[request] = (f["name"], rows)
+                return f["name"], rows
+        return None, []
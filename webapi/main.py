@@ -1,50 +1,124 @@
+import io
 import os
+import sys
 import csv
 import time
 import shutil
 import json
-import hashlib
-import random
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+from eve_tailer import EveTailer
+from alert_store import AlertStore, alert_summary, parse_iso_time
+from alert_stats import AlertStats
+from dedupe import AlertDeduper
+from row_index import RowIndexCache
+from file_catalog import FileCatalog
+from event_hub import EventHub
+
+# Shared with snids.py (src/metrics.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+from metrics import CONTENT_TYPE, REGISTRY, Counter, Gauge, Histogram  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow/Parquet segments are skipped without pyarrow
+    pa = None
+
 BASE_DIR = Path(__file__).resolve().parent
-CSV_DIR = (BASE_DIR.parent / "traffic-csv").resolve()
+CSV_DIR = Path(os.environ.get("TRAFFIC_CSV_DIR", BASE_DIR.parent / "traffic-csv")).resolve()
 SAVED_DIR = (BASE_DIR.parent / "traffic-csv-saved").resolve()
-ALERTS_DIR = (BASE_DIR.parent / "alerts-history").resolve()
+ALERTS_DIR = Path(os.environ.get("ALERTS_DIR", BASE_DIR.parent / "alerts-history")).resolve()
 EVE_PATH = Path(os.environ.get("EVE_PATH", "/var/log/suricata/eve.json"))
-ALERTS_DB_PATH = ALERTS_DIR / "alerts_history.json"
+ALERTS_DB_PATH = ALERTS_DIR / "alerts.db"
+# Pre-SQLite history, imported into ALERTS_DB_PATH on first start
+LEGACY_ALERTS_PATH = ALERTS_DIR / "alerts_history.json"
+ALERT_RETENTION_COUNT = int(os.environ.get("ALERT_RETENTION_COUNT", "1000000"))
+# Age-based retention is opt-in (0 = off) so migrated legacy history is never dropped on upgrade
+ALERT_RETENTION_DAYS = float(os.environ.get("ALERT_RETENTION_DAYS", "0"))
+ALERT_DEDUPE_WINDOW = float(os.environ.get("ALERT_DEDUPE_WINDOW", "3600"))
+ALERT_DEDUPE_MAX = int(os.environ.get("ALERT_DEDUPE_MAX", "100000"))
+# Threads for blocking disk/SQLite work of async endpoints (Starlette's shared pool is not used)
+IO_WORKERS = int(os.environ.get("WEBAPI_IO_WORKERS", "8"))
+STREAM_BATCH_ROWS = 5000
+# Capture segments: CSV always, Arrow IPC / Parquet when pyarrow is installed
+SEGMENT_PATTERNS = ("*.csv", "*.arrow", "*.parquet") if pa is not None else ("*.csv",)
 
 # Create directories if they don't exist
 SAVED_DIR.mkdir(exist_ok=True)
 ALERTS_DIR.mkdir(exist_ok=True)
 
-# Track last processed position in eve.json to avoid duplicates
+# Track last processed position in eve.json to avoid duplicates (owned by the tailer)
 LAST_PROCESSED_FILE = ALERTS_DIR / ".last_processed"
+MAX_ALERT_HISTORY = 10000
 
-def get_last_processed_position():
-    """Get the last processed position in eve.json."""
-    try:
-        if LAST_PROCESSED_FILE.exists():
-            with LAST_PROCESSED_FILE.open('r') as f:
-                data = json.load(f)
-                return data.get('position', 0)
-    except Exception:
-        pass
-    return 0
+REQUEST_SECONDS = Histogram("webapi_request_seconds", "Time to response headers per endpoint",
+                            labels=("method", "route"),
+                            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+REQUESTS = Counter("webapi_requests_total", "Requests per endpoint and status code",
+                   labels=("method", "route", "status"))
+EVE_LAG_BYTES = Gauge("webapi_eve_ingest_lag_bytes", "Bytes of eve.json not yet ingested")
+
+
+class AlertCache:
+    """Newest alerts kept in memory so /api/alerts does not hit the database."""
+
+    def __init__(self, max_alerts: int = MAX_ALERT_HISTORY):
+        self._alerts = deque(maxlen=max_alerts)
+        self._lock = threading.Lock()
+
+    def load(self, alerts: list):
+        with self._lock:
+            self._alerts.clear()
+            self._alerts.extend(alerts)
+
+    def add(self, alerts: list):
+        with self._lock:
+            self._alerts.extend(alerts)
+
+    def recent(self, limit: int) -> list:
+        with self._lock:
+            alerts = list(self._alerts)
+        return alerts[-limit:] if limit > 0 else []
+
+    def all(self) -> list:
+        with self._lock:
+            return list(self._alerts)
+
+    def clear(self):
+        with self._lock:
+            self._alerts.clear()
+
+    def __len__(self):
+        return len(self._alerts)
 
-def set_last_processed_position(position):
-    """Save the last processed position in eve.json."""
-    try:
-        with LAST_PROCESSED_FILE.open('w') as f:
-            json.dump({'position': position}, f)
-    except Exception:
-        pass
+
+alert_cache = AlertCache()
+alert_store: Optional[AlertStore] = None
+alert_stats = AlertStats()
+alert_deduper = AlertDeduper(ALERT_DEDUPE_WINDOW, ALERT_DEDUPE_MAX)
+row_indexes = RowIndexCache()
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="webapi-io")
+event_hub = EventHub()
+eve_tailer: Optional[EveTailer] = None
 
 app = FastAPI(title="Suricata IDS Web API")
 
@@ -58,6 +132,50 @@ app.add_middleware(
 )
 
 
+class RequestMetricsMiddleware:
+    """Per-endpoint latency (to response headers) and status counts, as plain ASGI.
+
+    Labels use the route template (/api/file/{name}), so the series stay bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = []
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+                self.record(scope, message["status"], start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            if not status:
+                self.record(scope, 500, start)
+
+    @staticmethod
+    def record(scope, status, start):
+        route = scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        REQUEST_SECONDS.labels(scope["method"], path).observe(time.perf_counter() - start)
+        REQUESTS.labels(scope["method"], path, status).inc()
+
+
+app.add_middleware(RequestMetricsMiddleware)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text format: per-endpoint latency, eve.json ingest lag."""
+    return Response(REGISTRY.expose(), media_type=CONTENT_TYPE)
+
+
 class Flow(BaseModel):
     src_ip: Optional[str] = None
     dst_ip: Optional[str] = None
@@ -69,356 +187,477 @@ class Flow(BaseModel):
     extra: dict
 
 
-def list_csv_files(include_saved: bool = True, max_age_minutes: int = 10) -> List[dict]:
-    """List CSV files with metadata, filtering by age and including saved files."""
-    if not CSV_DIR.exists():
-        return []
-    
-    files_info = []
-    cutoff_time = time.time() - (max_age_minutes * 60)
-    
-    # Get regular CSV files
-    for p in sorted(CSV_DIR.glob("*.csv")):
-        try:
-            stat = p.stat()
-            file_info = {
-                "name": p.name,
-                "path": p,
-                "mtime": stat.st_mtime,
-                "saved": False,
-                "age_minutes": (time.time() - stat.st_mtime) / 60
-            }
-            # Only include if within age limit
-            if stat.st_mtime >= cutoff_time:
-                files_info.append(file_info)
-        except Exception:
-            continue
-    
-    # Get saved CSV files if requested
-    if include_saved and SAVED_DIR.exists():
-        for p in sorted(SAVED_DIR.glob("*.csv")):
-            try:
-                stat = p.stat()
-                files_info.append({
-                    "name": p.name,
-                    "path": p,
-                    "mtime": stat.st_mtime,
-                    "saved": True,
-                    "age_minutes": (time.time() - stat.st_mtime) / 60
-                })
-            except Exception:
-                continue
-    
-    # Sort by modification time (newest first)
-    files_info.sort(key=lambda x: x["mtime"], reverse=True)
-    return files_info
+async def run_io(func, *args, **kwargs):
+    """Run blocking I/O on the bounded io_executor without holding up the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(io_executor, partial(func, *args, **kwargs))
 
 
-def cleanup_old_csvs(max_age_minutes: int = 10):
-    """Delete CSV files older than max_age_minutes from CSV_DIR."""
-    if not CSV_DIR.exists():
-        return 0
-    
-    deleted_count = 0
-    cutoff_time = time.time() - (max_age_minutes * 60)
-    
-    for p in CSV_DIR.glob("*.csv"):
-        try:
-            if p.stat().st_mtime < cutoff_time:
-                p.unlink()
-                deleted_count += 1
-        except Exception:
-            continue
-    
-    return deleted_count
+def encode_json(data) -> bytes:
+    return orjson.dumps(data) if orjson is not None else json.dumps(data).encode()
+
+
+async def json_io(func, *args, **kwargs) -> Response:
+    """Run ``func`` on the I/O executor and JSON-encode its result there as well.
+
+    FastAPI encodes the return value of an async endpoint on the event loop;
+    for thousands of rows that would stall every other request.
+    """
+    body = await run_io(lambda: encode_json(func(*args, **kwargs)))
+    return Response(body, media_type="application/json")
+
+
+def _json_value(v):
+    # Columnar segments store every number as float64; show 6 rather than 6.0
+    if isinstance(v, float):
+        if v != v:
+            return None
+        if v.is_integer():
+            return int(v)
+    return v
+
+
+def _columnar_window(total, offset, limit, tail):
+    end = max(0, total - offset) if tail else min(total, offset + limit)
+    start = max(0, end - limit) if tail else min(offset, total)
+    return start, end
+
+
+def read_columnar_rows(p: Path, offset: int = 0, limit: int = 100, tail: bool = False,
+                       columns: Optional[List[str]] = None):
+    """Rows ``offset``..``offset+limit`` (or from the end with ``tail``) of an Arrow IPC / Parquet segment.
 
+    Only the record batches / row groups covering the window are read.
+    """
+    def project(table):
+        if columns:
+            table = table.select([c for c in table.column_names if c in set(columns)])
+        return [{k: _json_value(v) for k, v in row.items()} for row in table.to_pylist()]
 
-def read_csv_head(p: Path, limit: int = 100) -> List[dict]:
+    try:
+        if p.suffix == ".parquet":
+            pf = pq.ParquetFile(p)
+            total = pf.metadata.num_rows
+            start, end = _columnar_window(total, offset, limit, tail)
+            groups, first, row = [], None, 0
+            for i in range(pf.num_row_groups):
+                n = pf.metadata.row_group(i).num_rows
+                if row + n > start and row < end:
+                    groups.append(i)
+                    first = row if first is None else first
+                row += n
+            if not groups:
+                return total, start, []
+            wanted = [c for c in pf.schema_arrow.names if c in set(columns)] if columns else None
+            table = pf.read_row_groups(groups, columns=wanted).slice(start - first, end - start)
+            return total, start, project(table)
+        with pa.memory_map(str(p), "r") as source:
+            # Zero-copy over the mapping; slicing touches only the rows returned
+            table = pa.ipc.open_file(source).read_all()
+            total = table.num_rows
+            start, end = _columnar_window(total, offset, limit, tail)
+            return total, start, project(table.slice(start, end - start))
+    except Exception:
+        return 0, 0, []
+
+
+def file_columns(p: Path) -> List[str]:
+    """Every field name of a segment (header / schema), without reading rows."""
+    try:
+        if p.suffix == ".parquet":
+            return pq.ParquetFile(p).schema_arrow.names
+        if p.suffix == ".arrow":
+            with pa.memory_map(str(p), "r") as source:
+                return pa.ipc.open_file(source).schema.names
+        return list(row_indexes.get(p).header)
+    except Exception:
+        return []
+
+
+def read_rows(p: Path, offset: int = 0, limit: int = 100, tail: bool = False,
+              columns: Optional[List[str]] = None):
+    """``(total_rows, start, rows)`` for a segment; CSVs are read through their row index."""
     if not p.exists():
         raise FileNotFoundError(str(p))
-    rows: List[dict] = []
+    if p.suffix in (".arrow", ".parquet"):
+        return read_columnar_rows(p, offset, limit, tail, columns)
     try:
-        with p.open("r", newline="") as f:
-            # Assume header exists; DictReader will handle normal CSVs
-            reader = csv.DictReader(f)
-            # If no header detected, fieldnames may be None; guard
-            if getattr(reader, 'fieldnames', None) is None:
-                return []
-            for i, row in enumerate(reader):
-                if i >= limit:
-                    break
-                rows.append(row)
+        return row_indexes.get(p).rows(offset, limit, tail=tail, columns=columns)
     except Exception:
         # If anything goes wrong (encoding, malformed), return empty rows
-        return []
-    return rows
+        return 0, 0, []
 
 
-def latest_nonempty_rows(limit: int = 200, skip_newest: bool = True):
-    files = list_csv_files(include_saved=False, max_age_minutes=10)  # Don't include saved files for latest
-    if not files:
-        return None, []
+def describe_segment(p: Path) -> dict:
+    """Row count and first/last flow timestamp of a segment, for the file catalog."""
+    total, _, first = read_rows(p, limit=1, columns=["timestamp"])
+    _, _, last = read_rows(p, limit=1, tail=True, columns=["timestamp"])
+    return {
+        "rows": total,
+        "first_time": first[0].get("timestamp") if first else None,
+        "last_time": last[0].get("timestamp") if last else None,
+    }
 
-    # Extract Path objects (already sorted newest first by list_csv_files)
-    file_paths = [f["path"] for f in files]
-    
-    if skip_newest:
-        # Optionally skip the newest file to avoid reading an in-progress capture
-        candidates = file_paths[1:] if len(file_paths) > 1 else file_paths
-    else:
-        # Include all files, starting with newest
-        candidates = file_paths
 
-    # Search from newest to oldest among candidates
-    for p in candidates:
-        try:
-            if p.stat().st_size == 0:
-                continue
-            rows = read_csv_head(p, limit=limit)
-            if rows:
-                return p.name, rows
-        except Exception:
-            # Try the next older file if this one is mid-write or malformed
-            continue
-    
-    return None, []
+file_catalog = FileCatalog(
+    CSV_DIR, SAVED_DIR, SEGMENT_PATTERNS, read_rows, describe=describe_segment,
+    on_change=lambda payload: event_hub.publish("files", payload), on_delete=row_indexes.discard,
+)
+
+
+def files_payload():
+    return file_catalog.payload()
 
 
 @app.get("/api/files")
-def api_files(background_tasks: BackgroundTasks):
-    # Schedule cleanup in background
-    background_tasks.add_task(cleanup_old_csvs, max_age_minutes=10)
-    
-    files = list_csv_files(include_saved=True, max_age_minutes=10)
-    return {
-        "count": len(files),
-        "files": [{
-            "name": f["name"],
-            "saved": f["saved"],
-            "age_minutes": round(f["age_minutes"], 1)
-        } for f in files]
-    }
+async def api_files():
+    # Served from the catalog; expired segments are deleted by its scan loop
+    return files_payload()
+
+
+def parse_columns(columns: Optional[str]) -> Optional[List[str]]:
+    """``?columns=a,b,c`` -> ["a", "b", "c"]; None/empty means all columns."""
+    if not columns:
+        return None
+    return [c.strip() for c in columns.split(",") if c.strip()] or None
+
+
+def latest_page(limit: int, columns: Optional[List[str]]):
+    name, rows = file_catalog.latest_rows(limit=limit, columns=columns)
+    return {"file": name, "rows": rows, "columns": file_columns(CSV_DIR / name) if name else []}
 
 
 @app.get("/api/latest")
-def api_latest(limit: int = 200):
-    name, rows = latest_nonempty_rows(limit=limit, skip_newest=False)
-    return {"file": name, "rows": rows}
+async def api_latest(limit: int = 200, columns: Optional[str] = None):
+    return await json_io(latest_page, limit, parse_columns(columns))
 
 
-@app.get("/api/file/{name}")
-def api_file(name: str, limit: int = 500):
-    # Check both regular and saved directories
-    target = CSV_DIR / name
-    saved = False
-    
-    if not target.exists():
-        target = SAVED_DIR / name
-        saved = True
-        
-    if not target.exists():
-        raise HTTPException(status_code=404, detail="File not found")
-    
+def resolve_segment(name: str):
+    """``(path, saved)`` of a segment; raises 404 if it is in neither directory."""
+    # Catalog lookup (regular, then saved); the disk is only checked for files newer than the last scan
+    info = file_catalog.get(name)
+    if info is not None:
+        target, saved = info["path"], info["saved"]
+    else:
+        target = CSV_DIR / name
+        saved = False
+        if not target.exists():
+            target = SAVED_DIR / name
+            saved = True
+        if not target.exists():
+            raise HTTPException(status_code=404, detail="File not found")
+    return target, saved
+
+
+def file_page(name: str, limit: int, offset: int, tail: bool, columns: Optional[List[str]]):
+    target, saved = resolve_segment(name)
     # Never fail: on read error, return empty rows for a smoother UX
-    rows = read_csv_head(target, limit=limit)
-    return {"file": target.name, "rows": rows, "saved": saved}
+    total, start, rows = read_rows(target, offset=offset, limit=limit, tail=tail, columns=columns)
+    return {"file": target.name, "rows": rows, "saved": saved,
+            "columns": file_columns(target), "total_rows": total, "offset": start}
+
+
+@app.get("/api/file/{name}")
+async def api_file(name: str, limit: int = 500, offset: int = 0, tail: bool = False, columns: Optional[str] = None):
+    """Rows ``offset``..``offset+limit`` of a segment; ``tail=true`` counts from the newest row.
+
+    ``columns`` (comma-separated) limits the fields returned; ``columns`` in
+    the response always lists every field of the file.
+    """
+    return await json_io(file_page, name, limit, offset, tail, parse_columns(columns))
+
+
+def iter_segment(target: Path, fmt: str, offset: int, limit: Optional[int], columns: Optional[List[str]]):
+    """Encoded chunks of rows ``offset``.. of a segment, ``STREAM_BATCH_ROWS`` rows at a time."""
+    if fmt == "csv" and not columns and target.suffix == ".csv":
+        # Whole rows are copied as stored: header, then the indexed row range.
+        # Older segments end rows with \r\n; those are rewritten to the \n used below.
+        index = row_indexes.get(target)
+        total = index.refresh()
+        start = min(max(0, offset), total)
+        end = total if limit is None else min(total, start + max(0, limit))
+        with open(target, "rb") as f:
+            yield f.read(index.header_bytes()).replace(b"\r\n", b"\n")
+            first, last = index.byte_range(start, end)
+            f.seek(first)
+            carry = b""
+            while first < last:
+                data = f.read(min(1 << 20, last - first))
+                if not data:
+                    break
+                first += len(data)
+                data = carry + data
+                # Keep a trailing \r until the next chunk shows whether \n follows
+                carry = data[-1:] if data.endswith(b"\r") else b""
+                yield data[:len(data) - len(carry)].replace(b"\r\n", b"\n")
+            if carry:
+                yield carry
+        return
+
+    total = None
+    position = max(0, offset)
+    remaining = limit
+    header_done = False
+    while remaining is None or remaining > 0:
+        batch = STREAM_BATCH_ROWS if remaining is None else min(STREAM_BATCH_ROWS, remaining)
+        n, _, rows = read_rows(target, offset=position, limit=batch, columns=columns)
+        total = n if total is None else total  # rows appended after the first batch are not streamed
+        rows = rows[:max(0, total - position)]
+        if fmt == "csv" and not header_done:
+            header_done = True
+            fields = list(rows[0].keys()) if rows else [c for c in file_columns(target) if not columns or c in columns]
+            buf = io.StringIO()
+            writer = csv.writer(buf, lineterminator="\n")
+            writer.writerow(fields)
+            yield buf.getvalue().encode()
+        if not rows:
+            return
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf, lineterminator="\n")
+            writer.writerows(row.values() for row in rows)
+            yield buf.getvalue().encode()
+        else:
+            yield "".join(json.dumps(row) + "\n" for row in rows).encode()
+        position += len(rows)
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+@app.get("/api/file/{name}/stream")
+async def api_file_stream(name: str, format: str = "ndjson", offset: int = 0, limit: Optional[int] = None,
+                          columns: Optional[str] = None):
+    """Stream a whole segment (or ``offset``/``limit`` rows) as NDJSON or CSV without building a row list.
+
+    Rows are read and encoded ``STREAM_BATCH_ROWS`` at a time on the I/O
+    executor, so memory stays flat however large the file is.
+    """
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    target, _ = await run_io(resolve_segment, name)
+    chunks = iter_segment(target, format, offset, limit, parse_columns(columns))
+
+    async def body():
+        try:
+            while True:
+                chunk = await run_io(next, chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            try:
+                chunks.close()
+            except ValueError:
+                pass  # still running on the executor after a disconnect; closed when collected
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{Path(target.name).stem}.{'csv' if format == 'csv' else 'ndjson'}"
+    return StreamingResponse(body(), media_type=media_type,
+                             headers={"Content-Disposition": f'inline; filename="{filename}"'})
 
 
 @app.get("/api/health")
-def health():
+async def health():
     return {"status": "ok", "csv_dir": str(CSV_DIR), "eve_path": str(EVE_PATH)}
 
 
 # Entry for `uvicorn main:app --reload --port 8000`
 
 
-def load_alert_history() -> list:
-    """Load alert history from JSON file."""
+def ingest_alerts(alerts: list):
+    """Tailer callback: fingerprint, dedupe and persist newly read alerts."""
+    alerts = alert_deduper.filter(alerts)
+    if not alerts:
+        return
+    stored_at = datetime.now().isoformat()
+    for obj in alerts:
+        obj['stored_at'] = stored_at
+    # Recent repeats are dropped above; the store's unique fingerprint index catches the rest
     try:
-        if ALERTS_DB_PATH.exists():
-            with ALERTS_DB_PATH.open('r') as f:
-                return json.load(f)
+        added = alert_store.add_many(alerts)
     except Exception:
-        pass
-    return []
-
-def save_alert_history(alerts: list):
-    """Save alert history to JSON file."""
+        alert_deduper.forget(alerts)  # the tailer retries these lines
+        raise
+    alert_cache.add(added)
+    alert_stats.add(alert_summary(a) for a in added)
+    if added:
+        # Counters only; top lists stay on /api/alerts/stats to keep pushes small
+        event_hub.publish("alerts", {"alerts": added, "stats": alert_stats.snapshot(top=0)})
+
+
+@app.on_event("startup")
+async def attach_event_hub():
+    event_hub.attach(asyncio.get_running_loop())
+    file_catalog.start()
+
+
+@app.on_event("startup")
+def start_eve_tailer():
+    global eve_tailer, alert_store
+    alert_store = AlertStore(ALERTS_DB_PATH, max_alerts=ALERT_RETENTION_COUNT,
+                             max_age_days=ALERT_RETENTION_DAYS, legacy_json=LEGACY_ALERTS_PATH)
+    alert_store.enforce_retention()
+    alert_cache.load(alert_store.recent(MAX_ALERT_HISTORY))
+    # Seed the running aggregates once; from here on they follow inserts and evictions
+    alert_stats.clear()
+    alert_stats.add(alert_store.summaries())
+    alert_store.on_evict = alert_stats.remove
+    eve_tailer = EveTailer(EVE_PATH, ingest_alerts, state_file=str(LAST_PROCESSED_FILE)).start()
+    EVE_LAG_BYTES.set_function(eve_tailer.lag_bytes)
+
+
+@app.on_event("shutdown")
+def stop_eve_tailer():
+    file_catalog.stop()
+    if eve_tailer is not None:
+        eve_tailer.stop()
+    io_executor.shutdown(wait=False)
+
+
+@app.get("/api/events")
+async def api_events(request: Request, cursor: Optional[int] = None):
+    """Server-Sent Events: ``alerts`` (new alerts + stats) and ``files`` (segment list changed).
+
+    Resume with ``Last-Event-ID`` (sent automatically by EventSource) or ``?cursor=``.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if cursor is None and last_event_id and last_event_id.isdigit():
+        cursor = int(last_event_id)
+    return StreamingResponse(
+        event_hub.stream(cursor, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from an epoch number or an ISO-8601 string."""
+    if value is None:
+        return None
     try:
-        with ALERTS_DB_PATH.open('w') as f:
-            json.dump(alerts, f, indent=2)
-    except Exception:
+        return float(value)
+    except ValueError:
         pass
-
-def generate_alert_fingerprint(alert_obj):
-    """Generate a unique fingerprint for an alert to detect duplicates."""
     try:
-        alert = alert_obj.get('alert', {})
-        
-        # Create fingerprint from key fields
-        fingerprint_data = {
-            'timestamp': alert_obj.get('timestamp', ''),
-            'signature': alert.get('signature', ''),
-            'signature_id': alert.get('signature_id', ''),
-            'severity': alert.get('severity', ''),
-            'src_ip': alert_obj.get('src_ip', ''),
-            'dest_ip': alert_obj.get('dest_ip', ''),
-            'proto': alert_obj.get('proto', '')
-        }
-        
-        # Create hash from the fingerprint data
-        fingerprint_str = json.dumps(fingerprint_data, sort_keys=True)
-        return hashlib.md5(fingerprint_str.encode()).hexdigest()
-    except Exception:
-        # If we can't generate fingerprint, return random to allow storage
-        return f"random_{random.randint(0, 999999)}"
-
-def store_new_alerts():
-    """Process new alerts from eve.json and store them in history (without duplicates)."""
-    try:
-        if not EVE_PATH.exists():
-            return 0
-        
-        last_pos = get_last_processed_position()
-        new_alerts = []
-        
-        with EVE_PATH.open('r') as f:
-            # Seek to last processed position
-            f.seek(last_pos)
-            
-            for line in f:
-                try:
-                    obj = json.loads(line.strip())
-                    if isinstance(obj, dict) and obj.get("alert"):
-                        # Add processing timestamp and fingerprint
-                        obj['stored_at'] = datetime.now().isoformat()
-                        obj['_fingerprint'] = generate_alert_fingerprint(obj)
-                        new_alerts.append(obj)
-                except Exception:
-                    continue
-            
-            # Save current position
-            current_pos = f.tell()
-            set_last_processed_position(current_pos)
-        
-        if new_alerts:
-            # Load existing history
-            history = load_alert_history()
-            
-            # Build set of existing fingerprints for fast lookup
-            existing_fingerprints = set()
-            for alert in history:
-                if '_fingerprint' in alert:
-                    existing_fingerprints.add(alert['_fingerprint'])
-            
-            # Filter out duplicates from new alerts
-            unique_new_alerts = []
-            for alert in new_alerts:
-                if alert['_fingerprint'] not in existing_fingerprints:
-                    unique_new_alerts.append(alert)
-                    existing_fingerprints.add(alert['_fingerprint'])
-            
-            if unique_new_alerts:
-                # Add only unique new alerts
-                history.extend(unique_new_alerts)
-                
-                # Keep only last 10000 alerts to prevent file from growing too large
-                if len(history) > 10000:
-                    history = history[-10000:]
-                
-                # Save updated history
-                save_alert_history(history)
-                
-                return len(unique_new_alerts)
-        
-        return 0
-    except Exception:
-        return 0
-
-def read_eve_alerts(limit: int = 200) -> list:
-    """Read alerts from history (stored alerts)."""
-    try:
-        # First, process any new alerts from eve.json
-        store_new_alerts()
-        
-        # Then return from history
-        history = load_alert_history()
-        
-        # Return most recent alerts
-        return history[-limit:] if history else []
-    except Exception:
-        return []
+        return parse_iso_time(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid time: {value!r}")
 
 
 @app.get("/api/alerts")
-def api_alerts(limit: int = 200, background_tasks: BackgroundTasks = None):
-    """Get alerts from history. New alerts are automatically stored."""
-    alerts = read_eve_alerts(limit=limit)
-    return {
-        "alerts": alerts,
-        "total_in_history": len(load_alert_history()),
-        "returned": len(alerts)
+async def api_alerts(
+    request: Request,
+    limit: int = 200,
+    cursor: Optional[int] = None,
+    src_ip: Optional[str] = None,
+    dest_ip: Optional[str] = None,
+    signature_id: Optional[int] = None,
+    severity: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
+    """Get alerts from history, newest page first. New alerts are stored by the background eve.json tailer.
+
+    Pass ``next_cursor`` from a response as ``cursor`` to page back. Filters
+    run against the store's indexes. Responses carry an ETag derived from the
+    returned page; a matching If-None-Match gets 304.
+    """
+    limit = max(1, limit)
+    filters = {
+        "src_ip": src_ip, "dest_ip": dest_ip, "signature_id": signature_id,
+        "severity": severity, "since": parse_time(since), "until": parse_time(until),
     }
+    if_none_match = request.headers.get("if-none-match")
+
+    def page():
+        # Read before the rows so an eviction mid-read yields a newer tag on the next poll
+        generation = alert_store.generation
+        if cursor is None and not any(v is not None for v in filters.values()):
+            alerts = alert_cache.recent(limit) if limit <= MAX_ALERT_HISTORY else alert_store.recent(limit)
+            total = alert_store.count()
+            next_cursor = alerts[0].get("_id") if alerts and total > len(alerts) else None
+        else:
+            alerts, next_cursor = alert_store.query(limit=limit, cursor=cursor, **filters)
+            total = alert_store.count()
+        # Versioned by what is actually returned, not by the store head, which
+        # ingest_alerts advances before the cache sees the new rows
+        newest = max((a.get("_id") or 0 for a in alerts), default=0)
+        etag = f'"{generation}.{newest}.{total}"'
+        if if_none_match == etag:
+            return etag, None
+        return etag, encode_json({
+            "alerts": alerts,
+            "total_in_history": total,
+            "returned": len(alerts),
+            "next_cursor": next_cursor,
+        })
+
+    etag, body = await run_io(page)
+    if body is None:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/api/alerts/ingest")
+async def api_alerts_ingest():
+    """eve.json ingestion counters (lines/sec, rotations, ...)."""
+    if eve_tailer is None:
+        return {"running": False}
+    return {"running": True, **eve_tailer.stats()}
 
 
 @app.get("/api/alerts/stats")
-def api_alerts_stats():
-    """Get alert statistics."""
-    history = load_alert_history()
-    
-    if not history:
-        return {
-            "total": 0,
-            "by_severity": {},
-            "recent_24h": 0
-        }
-    
-    # Count by severity
-    by_severity = {}
-    recent_24h = 0
-    now = datetime.now()
-    
-    for alert in history:
-        severity = alert.get('alert', {}).get('severity', 'unknown')
-        by_severity[str(severity)] = by_severity.get(str(severity), 0) + 1
-        
-        # Count recent alerts (last 24 hours)
-        try:
-            if 'stored_at' in alert:
-                stored_time = datetime.fromisoformat(alert['stored_at'])
-                if (now - stored_time).total_seconds() < 86400:
-                    recent_24h += 1
-        except Exception:
-            pass
-    
-    return {
-        "total": len(history),
-        "by_severity": by_severity,
-        "recent_24h": recent_24h
-    }
+async def api_alerts_stats(top: int = 10):
+    """Get alert statistics (maintained incrementally, no history scan)."""
+    return alert_stats.snapshot(top=top)
 
 
-@app.delete("/api/alerts/clear")
-def api_clear_alerts():
-    """Clear alert history (useful for testing or cleanup)."""
+@app.get("/api/alerts/timeseries")
+async def api_alerts_timeseries(minutes: int = 60, bucket: int = 1):
+    """Alert counts per ``bucket`` minutes over the last ``minutes`` (max 24 h)."""
+    return {"bucket_minutes": max(1, bucket), "series": alert_stats.timeseries(minutes=minutes, bucket_minutes=bucket)}
+
+
+def clear_alert_history():
     try:
-        if ALERTS_DB_PATH.exists():
-            ALERTS_DB_PATH.unlink()
+        alert_cache.clear()
+        alert_deduper.clear()
+        alert_store.clear()
+        alert_stats.clear()
         if LAST_PROCESSED_FILE.exists():
             LAST_PROCESSED_FILE.unlink()
+        if eve_tailer is not None:
+            eve_tailer.reset()
         return {"message": "Alert history cleared successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clear alerts: {str(e)}")
 
 
-@app.post("/api/save/{name}")
-def api_save_csv(name: str):
-    """Save a CSV file to prevent auto-deletion."""
+@app.delete("/api/alerts/clear")
+async def api_clear_alerts():
+    """Clear alert history (useful for testing or cleanup)."""
+    return await run_io(clear_alert_history)
+
+
+def save_as_parquet(source: Path, target: Path):
+    """Re-encode an Arrow IPC segment as zstd Parquet (much smaller on disk)."""
+    with pa.memory_map(str(source), "r") as f:
+        table = pa.ipc.open_file(f).read_all()
+    partial = target.with_name(target.name + ".part")
+    pq.write_table(table, partial, compression="zstd")
+    os.replace(partial, target)
+    shutil.copystat(source, target)
+
+
+def save_segment(name: str):
     source = CSV_DIR / name
     
     if not source.exists():
         raise HTTPException(status_code=404, detail="File not found")
     
+    # Arrow segments are kept as Parquet once saved
+    if source.suffix == ".arrow":
+        name = source.with_suffix(".parquet").name
+
     # Check if already saved
     target = SAVED_DIR / name
     if target.exists():
@@ -426,15 +665,24 @@ def api_save_csv(name: str):
     
     # Copy file to saved directory
     try:
-        shutil.copy2(source, target)
+        if source.suffix == ".arrow":
+            save_as_parquet(source, target)
+        else:
+            shutil.copy2(source, target)
+        file_catalog.scan()
         return {"message": "File saved successfully", "name": name, "saved": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
 
 
-@app.delete("/api/save/{name}")
-def api_unsave_csv(name: str):
-    """Remove a CSV from saved directory."""
+@app.post("/api/save/{name}")
+async def api_save_csv(name: str):
+    """Save a CSV file to prevent auto-deletion."""
+    # Copying / Parquet re-encoding can take seconds; keep it off the event loop
+    return await run_io(save_segment, name)
+
+
+def unsave_segment(name: str):
     target = SAVED_DIR / name
     
     if not target.exists():
@@ -442,13 +690,21 @@ def api_unsave_csv(name: str):
     
     try:
         target.unlink()
+        row_indexes.discard(target)
+        file_catalog.scan()
         return {"message": "File removed from saved", "name": name, "saved": False}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to unsave file: {str(e)}")
 
 
+@app.delete("/api/save/{name}")
+async def api_unsave_csv(name: str):
+    """Remove a CSV from saved directory."""
+    return await run_io(unsave_segment, name)
+
+
 @app.post("/api/cleanup")
-def api_cleanup(max_age_minutes: int = 10):
+async def api_cleanup(max_age_minutes: int = 10):
     """Manually trigger cleanup of old CSV files."""
-    deleted = cleanup_old_csvs(max_age_minutes=max_age_minutes)
+    deleted = await run_io(file_catalog.scan, max_age_minutes=max_age_minutes)
     return {"message": f"Deleted {deleted} old CSV files", "deleted_count": deleted}
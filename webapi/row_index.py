@@ -0,0 +1,172 @@
+import os
+import csv
+import io
+import threading
+from array import array
+from collections import OrderedDict
+
+INDEX_SUFFIX = ".idx"
+MAGIC = b"TRIDX001"
+SCAN_SIZE = 1 << 20
+
+
+def index_path(path) -> str:
+    return f"{path}{INDEX_SUFFIX}"
+
+
+class RowIndex:
+    """Byte offsets of the data rows of a CSV segment, kept in a ``.idx`` sidecar.
+
+    The sidecar is MAGIC, the CSV's inode, then one little-endian uint64 per
+    row start plus a final entry for the end of the last complete row. It is
+    built on first access and extended by scanning only the bytes appended
+    since, so it keeps up with a capture that is still being written (a
+    trailing partial row is not indexed until its newline arrives). Rows are
+    assumed not to contain quoted newlines, which cicflowmeter never writes.
+    If the sidecar cannot be written the index is still kept in memory.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.header = []
+        self._offsets = array("Q")
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def _load(self, inode):
+        try:
+            with open(index_path(self.path), "rb") as f:
+                head = f.read(16)
+                if head[:8] != MAGIC or int.from_bytes(head[8:], "little") != inode:
+                    return False
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+        except (OSError, ValueError):
+            return False
+        self._offsets = offsets
+        return True
+
+    def _save(self, new_offsets, rewrite):
+        try:
+            if rewrite:
+                with open(index_path(self.path), "wb") as f:
+                    f.write(MAGIC + self._inode.to_bytes(8, "little"))
+                    self._offsets.tofile(f)
+            elif new_offsets:
+                with open(index_path(self.path), "ab") as f:
+                    new_offsets.tofile(f)
+        except OSError:
+            pass
+
+    def refresh(self):
+        """Bring the index up to date with the file; returns the row count."""
+        with self._lock:
+            st = os.stat(self.path)
+            rewrite = False
+            if st.st_ino != self._inode or (self._offsets and self._offsets[-1] > st.st_size):
+                # First use, or the file was replaced/truncated
+                self._inode = st.st_ino
+                self.header = []
+                self._offsets = array("Q")
+                if not self._load(st.st_ino) or (self._offsets and self._offsets[-1] > st.st_size):
+                    self._offsets = array("Q")
+                    rewrite = True
+            with open(self.path, "rb") as f:
+                if not self.header:
+                    header_line = f.readline()
+                    if not header_line.endswith(b"\n"):
+                        return 0
+                    self.header = next(csv.reader([header_line.decode("utf-8", "replace")]), [])
+                    if not self._offsets:
+                        self._offsets.append(len(header_line))
+                        rewrite = True
+                new_offsets = self._scan(f, self._offsets[-1], st.st_size)
+            self._offsets.extend(new_offsets)
+            self._save(self._offsets if rewrite else new_offsets, rewrite)
+            return len(self._offsets) - 1
+
+    @staticmethod
+    def _scan(f, start, size):
+        # Start offset of every row after each newline found past ``start``
+        found = array("Q")
+        f.seek(start)
+        position = start
+        while position < size:
+            data = f.read(min(SCAN_SIZE, size - position))
+            if not data:
+                break
+            i = data.find(b"\n")
+            while i != -1:
+                found.append(position + i + 1)
+                i = data.find(b"\n", i + 1)
+            position += len(data)
+        return found
+
+    def byte_range(self, start, end):
+        """File offsets spanning rows ``start``..``end`` as of the last refresh()."""
+        with self._lock:
+            return self._offsets[start], self._offsets[end]
+
+    def header_bytes(self):
+        with self._lock:
+            return self._offsets[0] if self._offsets else 0
+
+    def rows(self, offset=0, limit=100, tail=False, columns=None):
+        """Return ``(total_rows, start, rows)`` reading only the requested rows.
+
+        With ``tail`` the window is counted back from the last row, so
+        ``offset=0, tail=True`` gives the newest ``limit`` rows. ``columns``
+        restricts each row dict to those fields (unknown names are ignored).
+        """
+        total = self.refresh()
+        limit = max(0, limit)
+        offset = max(0, offset)
+        end = max(0, total - offset) if tail else min(total, offset + limit)
+        start = max(0, end - limit) if tail else min(offset, total)
+        if start >= end:
+            return total, start, []
+        with self._lock:
+            first, last = self._offsets[start], self._offsets[end]
+        with open(self.path, "rb") as f:
+            f.seek(first)
+            data = f.read(last - first)
+        fields = self.header
+        if columns:
+            columns = set(columns)
+            wanted = [(i, name) for i, name in enumerate(fields) if name in columns]
+        else:
+            wanted = list(enumerate(fields))
+        rows = []
+        for values in csv.reader(io.StringIO(data.decode("utf-8", "replace"), newline="")):
+            rows.append({name: values[i] if i < len(values) else None for i, name in wanted})
+        return total, start, rows
+
+
+class RowIndexCache:
+    """Keeps the ``RowIndex`` of the most recently read files in memory."""
+
+    def __init__(self, max_files=32):
+        self.max_files = max_files
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path) -> RowIndex:
+        key = str(path)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._indexes[key] = RowIndex(key)
+                while len(self._indexes) > self.max_files:
+                    self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(key)
+            return index
+
+    def discard(self, path):
+        """Forget a file and delete its sidecar (call when the file is deleted)."""
+        with self._lock:
+            self._indexes.pop(str(path), None)
+        try:
+            os.unlink(index_path(path))
+        except FileNotFoundError:
+            pass
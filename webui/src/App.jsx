@@ -1,5 +1,5 @@
-import React, { useEffect, useMemo, useState } from 'react'
-import { FlowsTable } from './components/FlowsTable.jsx'
+import React, { useEffect, useMemo, useRef, useState } from 'react'
+import { FlowsTable, getImportantColumns } from './components/FlowsTable.jsx'
 import { Alerts } from './components/Alerts.jsx'
 import { Shield, RefreshCw, FileText, Activity, AlertTriangle, Bookmark, X, Clock, Trash2, Settings } from 'lucide-react'
 
@@ -16,6 +16,18 @@ export default function App() {
   const [alertStats, setAlertStats] = useState({ total: 0, recent_24h: 0, by_severity: {} })
   const [hasUserSelected, setHasUserSelected] = useState(false)
   const [advancedMode, setAdvancedMode] = useState(false)
+  // true while the /api/events stream is open; polling only runs as a fallback
+  const [pushConnected, setPushConnected] = useState(false)
+  const [filesVersion, setFilesVersion] = useState(0)
+  // Every column of the last file shown (the API returns this even for projected reads)
+  const fileColumns = useRef(null)
+
+  // Basic mode only renders the important columns, so only fetch those
+  const columnsParam = () => {
+    if (advancedMode || !fileColumns.current) return ''
+    const cols = getImportantColumns(fileColumns.current)
+    return cols.length ? `&columns=${encodeURIComponent(cols.join(','))}` : ''
+  }
 
   const loadFiles = async () => {
     try {
@@ -62,9 +74,10 @@ export default function App() {
     try {
       setLoading(true)
       setError(null)
-      const res = await fetch(`/api/latest?limit=${limit}`)
+      const res = await fetch(`/api/latest?limit=${limit}${columnsParam()}`)
       if (!res.ok) throw new Error(`HTTP ${res.status}`)
       const json = await res.json()
+      if (json.columns?.length) fileColumns.current = json.columns
       setData(json)
     } catch (e) {
       setError(e?.message || 'Failed to fetch latest')
@@ -78,9 +91,10 @@ export default function App() {
     try {
       setLoading(true)
       setError(null)
-      const res = await fetch(`/api/file/${encodeURIComponent(name)}?limit=${limit}`)
+      const res = await fetch(`/api/file/${encodeURIComponent(name)}?limit=${limit}${columnsParam()}`)
       if (!res.ok) throw new Error(`HTTP ${res.status}`)
       const json = await res.json()
+      if (json.columns?.length) fileColumns.current = json.columns
       setData(json)
     } catch (e) {
       setError(e?.message || 'Failed to fetch file')
@@ -89,57 +103,85 @@ export default function App() {
     }
   }
 
-  // Load files list once and when a new file might appear (poll lightly)
+  const loadAlerts = async () => {
+    try {
+      const res = await fetch('/api/alerts?limit=200')
+      if (!res.ok) return
+      const json = await res.json()
+      setAlerts(json.alerts || [])
+    } catch (e) {
+      // ignore
+    }
+  }
+
+  const loadAlertStats = async () => {
+    try {
+      const res = await fetch('/api/alerts/stats')
+      if (!res.ok) return
+      const json = await res.json()
+      setAlertStats(json)
+    } catch (e) {
+      // ignore
+    }
+  }
+
+  // Server push: new alerts and segment list changes arrive over SSE
+  useEffect(() => {
+    if (!window.EventSource) return
+    const es = new EventSource('/api/events')
+    // Connecting flips pushConnected, which refetches everything once (see effects below)
+    es.addEventListener('hello', () => setPushConnected(true))
+    es.addEventListener('alerts', (e) => {
+      const msg = JSON.parse(e.data)
+      setAlerts(prev => prev.concat(msg.alerts || []).slice(-200))
+      if (msg.stats) setAlertStats(msg.stats)
+    })
+    es.addEventListener('files', (e) => {
+      const msg = JSON.parse(e.data)
+      setFiles(msg.files || [])
+      setFilesVersion(v => v + 1)
+    })
+    es.addEventListener('reset', () => {
+      loadAlerts()
+      loadAlertStats()
+      loadFiles()
+    })
+    es.onerror = () => setPushConnected(false) // EventSource retries on its own
+    return () => es.close()
+  }, [])
+
+  // Load files list once and poll lightly while push is unavailable
   useEffect(() => {
     loadFiles()
+    if (pushConnected) return
     const id = setInterval(loadFiles, 10000)
     return () => clearInterval(id)
-  }, [])
+  }, [pushConnected])
 
-  // Fetch depending on mode
+  // Fetch depending on mode; with push, "latest" refreshes when a segment appears or grows
   useEffect(() => {
     if (mode === 'latest') {
       fetchLatest()
+      if (pushConnected) return
       const id = setInterval(fetchLatest, intervalMs)
       return () => clearInterval(id)
     } else if (mode === 'file' && selected) {
       fetchFile(selected)
     }
-  }, [mode, selected, limit, intervalMs])
+  }, [mode, selected, limit, intervalMs, pushConnected, advancedMode, mode === 'latest' ? filesVersion : 0])
 
-  // Alerts polling
+  // Alerts polling (fallback when push is unavailable)
   useEffect(() => {
-    const loadAlerts = async () => {
-      try {
-        const res = await fetch('/api/alerts?limit=200')
-        if (!res.ok) return
-        const json = await res.json()
-        setAlerts(json.alerts || [])
-      } catch (e) {
-        // ignore
-      }
-    }
-    
-    const loadAlertStats = async () => {
-      try {
-        const res = await fetch('/api/alerts/stats')
-        if (!res.ok) return
-        const json = await res.json()
-        setAlertStats(json)
-      } catch (e) {
-        // ignore
-      }
-    }
-    
     loadAlerts()
     loadAlertStats()
+    if (pushConnected) return
     const id1 = setInterval(loadAlerts, 5000)
     const id2 = setInterval(loadAlertStats, 10000)
     return () => {
       clearInterval(id1)
       clearInterval(id2)
     }
-  }, [])
+  }, [pushConnected])
 
   const title = useMemo(() => {
     if (!data.file) return 'No CSV selected'
@@ -181,7 +223,7 @@ export default function App() {
                 padding: '2px 8px',
                 borderRadius: '4px'
               }}>
-                Syncing every {intervalMs / 1000}s
+                {pushConnected ? 'Live updates' : `Syncing every ${intervalMs / 1000}s`}
               </span>
             )}
           </div>
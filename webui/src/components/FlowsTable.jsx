@@ -1,34 +1,34 @@
 import React, { useState } from 'react'
 
+// Define important columns for basic view (App.jsx also uses this to ask the API for just these)
+export const getImportantColumns = (allColumns) => {
+  const importantPatterns = [
+    'timestamp',
+    'src_ip', 'srcip', 'source_ip',
+    'dst_ip', 'dstip', 'destination_ip', 'dest_ip',
+    'src_port', 'srcport', 'source_port',
+    'dst_port', 'dstport', 'destination_port', 'dest_port',
+    'protocol', 'proto',
+    'flow_duration', 'flowduration',
+    'tot_fwd_packets', 'totfwdpackets',
+    'tot_bwd_packets', 'totbwdpackets',
+    'flow_byts_s', 'flowbytess',
+    'byt_sec', 'bytsec',
+    'prediction', 'label'
+  ]
+  
+  return allColumns.filter(col => {
+    const colLower = col.toLowerCase().replace(/_/g, '')
+    return importantPatterns.some(pattern => 
+      colLower.includes(pattern.replace(/_/g, ''))
+    )
+  })
+}
+
 export function FlowsTable({ rows, advancedMode = false }) {
   const [hoveredRow, setHoveredRow] = useState(null)
   const [hoveredColumn, setHoveredColumn] = useState(null)
 
-  // Define important columns for basic view
-  const getImportantColumns = (allColumns) => {
-    const importantPatterns = [
-      'timestamp',
-      'src_ip', 'srcip', 'source_ip',
-      'dst_ip', 'dstip', 'destination_ip', 'dest_ip',
-      'src_port', 'srcport', 'source_port',
-      'dst_port', 'dstport', 'destination_port', 'dest_port',
-      'protocol', 'proto',
-      'flow_duration', 'flowduration',
-      'tot_fwd_packets', 'totfwdpackets',
-      'tot_bwd_packets', 'totbwdpackets',
-      'flow_byts_s', 'flowbytess',
-      'byt_sec', 'bytsec',
-      'prediction', 'label'
-    ]
-    
-    return allColumns.filter(col => {
-      const colLower = col.toLowerCase().replace(/_/g, '')
-      return importantPatterns.some(pattern => 
-        colLower.includes(pattern.replace(/_/g, ''))
-      )
-    })
-  }
-
   // Tooltip descriptions for common network properties
   const getColumnDescription = (columnName) => {
     const col = columnName.toLowerCase().replace(/_/g, '')